@@ -1,5 +1,17 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import User
-admin.site.register(User)
\ No newline at end of file
+from .models import User, OutboundEmail, EmailVerificationToken
+admin.site.register(User)
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ('id', 'subject', 'status', 'attempts', 'next_attempt_at', 'sent_at')
+    list_filter = ('status',)
+
+
+@admin.register(EmailVerificationToken)
+class EmailVerificationTokenAdmin(admin.ModelAdmin):
+    list_display = ('id', 'user', 'created_at', 'expires_at')
+    raw_id_fields = ('user',)
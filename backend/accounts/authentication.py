@@ -0,0 +1,54 @@
+"""
+JWT authentication that resolves users from the cache instead of the database.
+
+simplejwt's ``JWTAuthentication`` loads the ``User`` row on every request.
+``CachedJWTAuthentication`` keeps the row in the Django cache for
+``ACCOUNTS_AUTH_CACHE_SECONDS`` under ``auth_cache_key(user_id)``, so a client
+polling ``/history/`` costs one cache read instead of one query per request.
+
+Each token carries the user's ``auth_version`` as the ``ver`` claim (tokens
+minted before the field existed count as version 0). A token whose version
+differs from the user's is rejected, so bumping it (``set_password`` does)
+revokes every token issued before. ``User.save()``/``delete()`` evict the
+entry, which covers deactivation and password changes; logout evicts it too.
+With the default per-process local-memory cache, other processes may keep a
+stale copy until the TTL expires; point ``CACHE_URL`` at a shared cache to make
+eviction global.
+
+The cached row is loaded with ``password`` deferred, so the hash never sits in
+the cache (it is fetched on access, and ``save()`` on such an instance leaves
+the column alone).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import AUTH_VERSION_CLAIM, auth_cache_key
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        key = auth_cache_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            try:
+                user = self.user_model.objects.defer('password').get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            cache.set(key, user, getattr(settings, 'ACCOUNTS_AUTH_CACHE_SECONDS', 60))
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if validated_token.get(AUTH_VERSION_CLAIM, 0) != user.auth_version:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        return user
@@ -0,0 +1,103 @@
+"""
+Password hashing policy.
+
+``PASSWORD_HASHERS`` is built in settings from ``ACCOUNTS_PASSWORD_HASHER``:
+the chosen hasher comes first (``argon2`` when the optional ``argon2-cffi``
+package is installed, otherwise ``pbkdf2``) and the others follow so existing
+hashes keep verifying. Django re-hashes a password on the next successful login
+whenever it was stored with another hasher or other cost parameters, so
+changing the policy upgrades accounts as users sign in.
+
+The cost parameters of both hashers come from settings
+(``ACCOUNTS_ARGON2_*``, ``ACCOUNTS_PBKDF2_ITERATIONS``).
+
+Hashing is CPU-bound and runs on the request thread. ``hashing_slot()`` caps
+how many requests hash at once (``ACCOUNTS_HASHING_CONCURRENCY``, one per core
+by default), so a login burst queues for a slot instead of taking every
+worker thread and core from the other endpoints. A request that cannot get a
+slot within ``ACCOUNTS_HASHING_QUEUE_SECONDS`` fails with 503 and
+``Retry-After``.
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Django's Argon2id hasher with its cost parameters taken from settings."""
+
+    @property
+    def time_cost(self):
+        return getattr(settings, 'ACCOUNTS_ARGON2_TIME_COST', 2)
+
+    @property
+    def memory_cost(self):
+        return getattr(settings, 'ACCOUNTS_ARGON2_MEMORY_COST', 19456)
+
+    @property
+    def parallelism(self):
+        return getattr(settings, 'ACCOUNTS_ARGON2_PARALLELISM', 1)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """Django's PBKDF2-SHA256 hasher with the iteration count taken from settings."""
+
+    @property
+    def iterations(self):
+        return getattr(settings, 'ACCOUNTS_PBKDF2_ITERATIONS', PBKDF2PasswordHasher.iterations)
+
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many sign-ins right now, please retry shortly.'
+    default_code = 'hashing_busy'
+    # DRF's exception handler turns this into a Retry-After header
+    wait = 1
+
+
+class _HashingSlots:
+    """A process-wide semaphore sized from settings on first use."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._semaphore = None
+        self.limit = 0
+        self.active = 0
+        self.peak = 0
+        self.rejected = 0
+
+    def _get(self):
+        with self._lock:
+            if self._semaphore is None:
+                self.limit = getattr(settings, 'ACCOUNTS_HASHING_CONCURRENCY', 0) or os.cpu_count() or 1
+                self._semaphore = threading.BoundedSemaphore(self.limit)
+            return self._semaphore
+
+    @contextmanager
+    def __call__(self):
+        semaphore = self._get()
+        if not semaphore.acquire(timeout=getattr(settings, 'ACCOUNTS_HASHING_QUEUE_SECONDS', 5)):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusy()
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+            semaphore.release()
+
+    def stats(self):
+        with self._lock:
+            return {'limit': self.limit, 'active': self.active, 'peak': self.peak, 'rejected': self.rejected}
+
+
+hashing_slot = _HashingSlots()
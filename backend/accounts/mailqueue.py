@@ -0,0 +1,198 @@
+"""
+Database-backed outbound email queue.
+
+Views call ``enqueue()``, which only inserts an ``OutboundEmail`` row, so
+registration, password reset and approval responses never wait on SMTP.
+``drain()`` sends due messages in batches over a single backend connection
+(one SMTP/TLS handshake per drain instead of one per message) and reschedules
+failures with exponential backoff until ``EMAIL_QUEUE_MAX_ATTEMPTS``.
+
+Messages are drained by ``python manage.py send_queued_emails`` and, when
+``EMAIL_QUEUE_IN_PROCESS`` is true (the default), also by one background thread
+per process that is woken after every enqueue. Rows survive restarts: a claim
+left behind by a crashed worker is released after ``EMAIL_QUEUE_LEASE_SECONDS``
+and the message is sent again (delivery is at least once).
+
+Settings: ``EMAIL_QUEUE_IN_PROCESS``, ``EMAIL_QUEUE_BATCH_SIZE``,
+``EMAIL_QUEUE_MAX_ATTEMPTS``, ``EMAIL_QUEUE_RETRY_SECONDS`` (first retry delay,
+doubled per attempt up to ``EMAIL_QUEUE_MAX_RETRY_SECONDS``),
+``EMAIL_QUEUE_LEASE_SECONDS`` and ``EMAIL_QUEUE_POLL_SECONDS``.
+"""
+import logging
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import connections, transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def default_from_email():
+    return getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', None) or 'no-reply@trippick.local'
+
+
+def enqueue(subject, body, to, from_email=None, html=False, html_body=''):
+    """
+    Queues one email and returns the ``OutboundEmail`` row.
+
+    ``html=True`` sends ``body`` as HTML; ``html_body`` instead attaches an HTML
+    alternative to a plaintext ``body``.
+    """
+    email = OutboundEmail.objects.create(
+        subject=subject[:255],
+        body=body,
+        html_body=html_body or '',
+        to=[to] if isinstance(to, str) else list(to),
+        from_email=from_email or default_from_email(),
+        content_subtype='html' if html else 'plain',
+    )
+    # Only wake the sender once the row is visible to other connections
+    transaction.on_commit(kick)
+    return email
+
+
+def retry_delay(attempts):
+    base = _setting('EMAIL_QUEUE_RETRY_SECONDS', 30)
+    return min(base * 2 ** max(attempts - 1, 0), _setting('EMAIL_QUEUE_MAX_RETRY_SECONDS', 3600))
+
+
+def release_stale_claims():
+    """Returns rows claimed by a worker that died mid-batch to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=_setting('EMAIL_QUEUE_LEASE_SECONDS', 300))
+    released = OutboundEmail.objects.filter(status=OutboundEmail.SENDING, claimed_at__lt=cutoff).update(
+        status=OutboundEmail.PENDING, claim_token='', claimed_at=None,
+    )
+    if released:
+        logger.warning(f"Released {released} stale outbound email claims")
+    return released
+
+
+def _claim(batch_size):
+    now = timezone.now()
+    due = OutboundEmail.objects.filter(status=OutboundEmail.PENDING, next_attempt_at__lte=now)
+    ids = list(due.order_by('next_attempt_at', 'pk').values_list('pk', flat=True)[:batch_size])
+    if not ids:
+        return []
+    token = uuid.uuid4().hex
+    # Conditional update: rows another worker claimed in the meantime are skipped
+    OutboundEmail.objects.filter(pk__in=ids, status=OutboundEmail.PENDING).update(
+        status=OutboundEmail.SENDING, claim_token=token, claimed_at=now,
+    )
+    return list(OutboundEmail.objects.filter(claim_token=token, status=OutboundEmail.SENDING).order_by('pk'))
+
+
+def _close_quietly(connection):
+    try:
+        connection.close()
+    except Exception:
+        pass
+
+
+def drain(batch_size=None, connection=None):
+    """
+    Sends every due message, ``batch_size`` rows at a time, over one connection.
+
+    Returns ``{'sent': n, 'retrying': n, 'failed': n}``.
+    """
+    batch_size = batch_size or _setting('EMAIL_QUEUE_BATCH_SIZE', 50)
+    max_attempts = _setting('EMAIL_QUEUE_MAX_ATTEMPTS', 5)
+    stats = {'sent': 0, 'retrying': 0, 'failed': 0}
+    release_stale_claims()
+
+    connection = connection or get_connection(fail_silently=False)
+    is_open = False
+    try:
+        while True:
+            batch = _claim(batch_size)
+            if not batch:
+                break
+            for email in batch:
+                try:
+                    if not is_open:
+                        # Opened explicitly so send_messages() leaves it open for the next message
+                        connection.open()
+                        is_open = True
+                    connection.send_messages([email.to_message(connection)])
+                except Exception as e:
+                    # The connection may be broken; reconnect for the next message
+                    _close_quietly(connection)
+                    is_open = False
+                    attempts = email.attempts + 1
+                    if attempts >= max_attempts:
+                        changes = {'status': OutboundEmail.FAILED}
+                        stats['failed'] += 1
+                        logger.error(f"Giving up on email {email.pk} to {email.to} after {attempts} attempts: {e}")
+                    else:
+                        delay = retry_delay(attempts)
+                        changes = {'status': OutboundEmail.PENDING,
+                                   'next_attempt_at': timezone.now() + timedelta(seconds=delay)}
+                        stats['retrying'] += 1
+                        logger.warning(f"Email {email.pk} to {email.to} failed (attempt {attempts}), retrying in {delay}s: {e}")
+                    OutboundEmail.objects.filter(pk=email.pk).update(
+                        attempts=attempts, last_error=str(e)[:2000], claim_token='', claimed_at=None, **changes,
+                    )
+                    continue
+                OutboundEmail.objects.filter(pk=email.pk).update(
+                    status=OutboundEmail.SENT, attempts=email.attempts + 1, sent_at=timezone.now(),
+                    claim_token='', claimed_at=None, last_error='',
+                )
+                stats['sent'] += 1
+    finally:
+        if is_open:
+            _close_quietly(connection)
+    if any(stats.values()):
+        logger.info(f"Outbound email queue drained: {stats}")
+    return stats
+
+
+def queue_stats():
+    from django.db.models import Count
+    counts = dict(OutboundEmail.objects.values_list('status').annotate(n=Count('pk')))
+    return {status: counts.get(status, 0) for status, _ in OutboundEmail.STATUS_CHOICES}
+
+
+class _InProcessSender:
+    """One daemon thread per process that drains the queue when kicked (and every poll interval)."""
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def kick(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='email-queue', daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=_setting('EMAIL_QUEUE_POLL_SECONDS', 30))
+            self._wake.clear()
+            try:
+                drain()
+            except Exception:
+                logger.exception("In-process email queue drain failed")
+            finally:
+                # Connections are per thread; don't keep this one open between wakeups
+                connections.close_all()
+
+
+_sender = _InProcessSender()
+
+
+def kick():
+    """Wakes the in-process sender, if enabled."""
+    if _setting('EMAIL_QUEUE_IN_PROCESS', True):
+        _sender.kick()
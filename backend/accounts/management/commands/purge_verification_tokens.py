@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import EmailVerificationToken
+
+
+class Command(BaseCommand):
+    help = "Deletes expired email verification tokens in batches; run it periodically (e.g. daily from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Seconds to sleep between batches, to leave room for other writers.")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = EmailVerificationToken.objects.filter(expires_at__lte=now)
+        deleted = 0
+        while True:
+            # Short transactions: SQLite holds the write lock for the whole DELETE
+            ids = list(expired.order_by('expires_at').values_list('pk', flat=True)[:options['batch_size']])
+            if not ids:
+                break
+            deleted += EmailVerificationToken.objects.filter(pk__in=ids).delete()[0]
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired verification tokens"))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts import mailqueue
+
+
+class Command(BaseCommand):
+    help = "Sends queued outbound emails over one reused connection; runs as a worker with --loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help="Keep polling the queue instead of exiting when it is empty.")
+        parser.add_argument('--interval', type=float, default=5.0, help="Seconds between polls in --loop mode.")
+        parser.add_argument('--batch-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        while True:
+            stats = mailqueue.drain(batch_size=options['batch_size'])
+            if any(stats.values()) or not options['loop']:
+                self.stdout.write(f"sent={stats['sent']} retrying={stats['retrying']} failed={stats['failed']}")
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+        self.stdout.write(self.style.SUCCESS(f"Queue: {mailqueue.queue_stats()}"))
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:40
+
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+
+def move_tokens_to_table(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    EmailVerificationToken = apps.get_model('accounts', 'EmailVerificationToken')
+    # Links already sent get a full lifetime from now rather than being cut off
+    expires_at = timezone.now() + timedelta(hours=getattr(settings, 'ACCOUNTS_VERIFICATION_TOKEN_HOURS', 48))
+    pending = User.objects.filter(verification_token__isnull=False).exclude(verification_token='')
+    last_pk = 0
+    while True:
+        batch = list(pending.filter(pk__gt=last_pk).order_by('pk').values_list('pk', 'verification_token')[:BATCH_SIZE])
+        if not batch:
+            return
+        EmailVerificationToken.objects.bulk_create([
+            EmailVerificationToken(user_id=pk, token=token, expires_at=expires_at) for pk, token in batch
+        ], ignore_conflicts=True)
+        last_pk = batch[-1][0]
+
+
+def move_tokens_to_users(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    EmailVerificationToken = apps.get_model('accounts', 'EmailVerificationToken')
+    for pk, token in EmailVerificationToken.objects.filter(expires_at__gt=timezone.now()).values_list('user_id', 'token').iterator():
+        User.objects.filter(pk=pk).update(verification_token=token)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_user_auth_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailVerificationToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='verification_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.RunPython(move_tokens_to_table, move_tokens_to_users),
+        migrations.RemoveField(
+            model_name='user',
+            name='verification_token',
+        ),
+    ]
@@ -1,10 +1,23 @@
 # Create your models here.
+from django.contrib.auth.hashers import check_password
 from django.contrib.auth.models import AbstractUser, PermissionsMixin
+from django.core.cache import cache
+from django.core.mail import EmailMessage, EmailMultiAlternatives
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from rest_framework_simplejwt.tokens import RefreshToken
+from .hashers import hashing_slot
 from .managers import UserManager
-import uuid
+import secrets
+from datetime import timedelta
+
+AUTH_VERSION_CLAIM = 'ver'
+
+
+def auth_cache_key(user_id):
+    return f'accounts:authuser:{user_id}'
 
 
 class User(AbstractUser, PermissionsMixin):
@@ -19,8 +32,8 @@ class User(AbstractUser, PermissionsMixin):
     is_active = models.BooleanField(default=True)
     date_joined = models.DateTimeField(auto_now_add=True)
     last_login = models.DateTimeField(auto_now=True)
-    verification_token = models.CharField(max_length=100, blank=True, null=True)
-
+    # Copied into every token as the 'ver' claim; bumping it revokes tokens issued before
+    auth_version = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['first_name', 'last_name']
@@ -33,16 +46,48 @@ class User(AbstractUser, PermissionsMixin):
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}"
     
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Deactivation, password changes etc. must not be hidden by a cached copy
+        self.evict_cached()
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        cache.delete(auth_cache_key(pk))
+        return result
+
+    def evict_cached(self):
+        """Drops this user from the authentication cache, see accounts/authentication.py."""
+        cache.delete(auth_cache_key(self.pk))
+
+    def set_password(self, raw_password):
+        with hashing_slot():
+            super().set_password(raw_password)
+        # Tokens issued before a password change stop authenticating
+        self.auth_version += 1
+
+    def check_password(self, raw_password):
+        def upgrade(raw_password):
+            # Re-hash with the current policy; the password is unchanged, so tokens stay valid
+            super(User, self).set_password(raw_password)
+            self._password = None
+            self.save(update_fields=['password'])
+
+        with hashing_slot():
+            return check_password(raw_password, self.password, upgrade)
+
     def generate_verification_token(self):
         """Generate a unique verification token for email verification"""
-        self.verification_token = str(uuid.uuid4())
-        self.save()
-        return self.verification_token
+        # Only the latest link stays valid
+        self.verification_tokens.all().delete()
+        return EmailVerificationToken.issue(self).token
     
     # @property
     def tokens(self):
         # pass
         refresh = RefreshToken.for_user(self)
+        refresh[AUTH_VERSION_CLAIM] = self.auth_version
         return {
             'refresh': str(refresh),
             'access': str(refresh.access_token)
@@ -53,4 +98,88 @@ class OneTimePassword(models.Model):
     code = models.CharField(max_length=6, unique=True)
 
     def __str__(self):
-        return f"{self.user.first_name}.passcode"
\ No newline at end of file
+        return f"{self.user.first_name}.passcode"
+
+class EmailVerificationToken(models.Model):
+    """
+    A pending email verification link.
+
+    ``token`` is unique (and therefore indexed), so verifying is one index
+    lookup; rows expire after ``ACCOUNTS_VERIFICATION_TOKEN_HOURS`` and are
+    removed by ``python manage.py purge_verification_tokens``.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='verification_tokens')
+    token = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id}.verification (expires {self.expires_at:%Y-%m-%d %H:%M})"
+
+    @classmethod
+    def lifetime(cls):
+        return timedelta(hours=getattr(settings, 'ACCOUNTS_VERIFICATION_TOKEN_HOURS', 48))
+
+    @classmethod
+    def issue(cls, user):
+        return cls.objects.create(user=user, token=secrets.token_urlsafe(32), expires_at=timezone.now() + cls.lifetime())
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+
+class OutboundEmail(models.Model):
+    """
+    An email waiting in (or delivered through) the outbound queue.
+
+    Requests only insert rows; ``accounts.mailqueue.drain`` sends them over one
+    reused backend connection, retrying failures with exponential backoff.
+    """
+    PENDING = 'PENDING'
+    SENDING = 'SENDING'
+    SENT = 'SENT'
+    FAILED = 'FAILED'
+    STATUS_CHOICES = (
+        (PENDING, 'Pending'),
+        (SENDING, 'Sending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    )
+
+    to = models.JSONField(default=list)
+    from_email = models.CharField(max_length=255, blank=True, default='')
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    content_subtype = models.CharField(max_length=10, default='plain', help_text="'plain' or 'html'.")
+    # Optional HTML alternative sent alongside a plaintext ``body``
+    html_body = models.TextField(blank=True, default='')
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Set while a worker owns the row; stale claims are released after EMAIL_QUEUE_LEASE_SECONDS
+    claim_token = models.CharField(max_length=32, blank=True, default='')
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='accounts_outbound_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.to)} ({self.status})"
+
+    def to_message(self, connection=None):
+        if self.html_body:
+            message = EmailMultiAlternatives(subject=self.subject, body=self.body, from_email=self.from_email or None,
+                                             to=self.to, connection=connection)
+            message.attach_alternative(self.html_body, 'text/html')
+            return message
+        message = EmailMessage(subject=self.subject, body=self.body, from_email=self.from_email or None,
+                               to=self.to, connection=connection)
+        message.content_subtype = self.content_subtype
+        return message
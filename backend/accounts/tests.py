@@ -1,3 +1,248 @@
-from django.test import TestCase
+from datetime import timedelta
+from smtplib import SMTPException
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from . import mailqueue
+from .models import OutboundEmail, User, auth_cache_key
+
+
+class CountingBackend(EmailBackend):
+    """locmem backend that counts how often a connection is opened."""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return True
+
+
+class FailingBackend(EmailBackend):
+    def send_messages(self, messages):
+        raise SMTPException('mailbox unavailable')
+
+
+@override_settings(
+    EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+    EMAIL_QUEUE_IN_PROCESS=False,
+    EMAIL_QUEUE_MAX_ATTEMPTS=2,
+    EMAIL_QUEUE_RETRY_SECONDS=30,
+    EMAIL_QUEUE_LEASE_SECONDS=300,
+)
+class MailQueueTests(TestCase):
+
+    def enqueue(self, n=1):
+        return [mailqueue.enqueue(f'Subject {i}', 'Body', f'user{i}@example.com') for i in range(n)]
+
+    def test_drain_sends_due_messages_over_one_connection(self):
+        self.enqueue(3)
+        CountingBackend.opened = 0
+
+        stats = mailqueue.drain(batch_size=2, connection=CountingBackend())
+
+        self.assertEqual(stats, {'sent': 3, 'retrying': 0, 'failed': 0})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(mailqueue.queue_stats()[OutboundEmail.SENT], 3)
+        self.assertFalse(OutboundEmail.objects.exclude(claim_token='').exists())
+
+    def test_html_alternative_is_attached(self):
+        mailqueue.enqueue('Trip', 'plain text', ['a@example.com'], html_body='<p>html</p>')
+        mailqueue.drain()
+        self.assertEqual(mail.outbox[0].body, 'plain text')
+        self.assertEqual(mail.outbox[0].alternatives[0][0], '<p>html</p>')
+
+    def test_claim_skips_rows_owned_by_another_worker(self):
+        mine, theirs = self.enqueue(2)
+        OutboundEmail.objects.filter(pk=theirs.pk).update(
+            status=OutboundEmail.SENDING, claim_token='other-worker', claimed_at=timezone.now(),
+        )
+
+        claimed = mailqueue._claim(10)
+
+        self.assertEqual([email.pk for email in claimed], [mine.pk])
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.claim_token, 'other-worker')
+
+    def test_messages_not_due_yet_are_left_alone(self):
+        email, = self.enqueue()
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now() + timedelta(minutes=5))
+        self.assertEqual(mailqueue.drain(), {'sent': 0, 'retrying': 0, 'failed': 0})
+        self.assertEqual(mail.outbox, [])
+
+    def test_failure_is_retried_with_backoff_then_given_up(self):
+        email, = self.enqueue()
+
+        before = timezone.now()
+        with self.assertLogs('accounts.mailqueue', 'WARNING'):
+            stats = mailqueue.drain(connection=FailingBackend())
+        self.assertEqual(stats, {'sent': 0, 'retrying': 1, 'failed': 0})
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.PENDING)
+        self.assertEqual(email.attempts, 1)
+        self.assertIn('mailbox unavailable', email.last_error)
+        self.assertGreaterEqual(email.next_attempt_at, before + timedelta(seconds=30))
+        self.assertEqual(email.claim_token, '')
+
+        # Not due again until the backoff has passed
+        self.assertEqual(mailqueue.drain(connection=FailingBackend())['retrying'], 0)
+
+        OutboundEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        with self.assertLogs('accounts.mailqueue', 'ERROR'):
+            stats = mailqueue.drain(connection=FailingBackend())
+        self.assertEqual(stats, {'sent': 0, 'retrying': 0, 'failed': 1})
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutboundEmail.FAILED)
+        self.assertEqual(email.attempts, 2)
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        with self.settings(EMAIL_QUEUE_MAX_RETRY_SECONDS=100):
+            self.assertEqual([mailqueue.retry_delay(n) for n in (1, 2, 3, 4)], [30, 60, 100, 100])
+
+    def test_stale_claim_is_released_after_the_lease(self):
+        stale, fresh = self.enqueue(2)
+        OutboundEmail.objects.filter(pk=stale.pk).update(
+            status=OutboundEmail.SENDING, claim_token='dead-worker', claimed_at=timezone.now() - timedelta(seconds=301),
+        )
+        OutboundEmail.objects.filter(pk=fresh.pk).update(
+            status=OutboundEmail.SENDING, claim_token='live-worker', claimed_at=timezone.now(),
+        )
+
+        with self.assertLogs('accounts.mailqueue', 'WARNING') as logs:
+            stats = mailqueue.drain()
+
+        self.assertIn('Released 1 stale', logs.output[0])
+        self.assertEqual(stats['sent'], 1)
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        self.assertEqual(stale.status, OutboundEmail.SENT)
+        self.assertEqual(fresh.status, OutboundEmail.SENDING)
+        self.assertEqual(fresh.claim_token, 'live-worker')
+
+
+@override_settings(ACCOUNTS_AUTH_CACHE_SECONDS=60)
+class CachedJWTAuthenticationTests(TestCase):
+    profile_url = '/api/accounts/profile/'
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('jwt@example.com', 'Jo', 'Doe', 'first-secret')
+        self.tokens = self.user.tokens()
+
+    def get_profile(self, access=None):
+        return self.client.get(self.profile_url, HTTP_AUTHORIZATION=f"Bearer {access or self.tokens['access']}")
+
+    def cached_user(self):
+        return cache.get(auth_cache_key(self.user.pk))
+
+    def test_user_is_served_from_the_cache(self):
+        self.assertEqual(self.get_profile().status_code, 200)
+        cached = self.cached_user()
+        self.assertEqual(cached.pk, self.user.pk)
+        # The password hash never sits in the cache
+        self.assertIn('password', cached.get_deferred_fields())
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_profile().status_code, 200)
+
+    def test_password_change_revokes_earlier_tokens(self):
+        self.get_profile()
+        version = self.user.auth_version
+
+        self.user.set_password('second-secret')
+        self.user.save()
+
+        self.assertEqual(self.user.auth_version, version + 1)
+        self.assertIsNone(self.cached_user())
+        response = self.get_profile()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'].code, 'token_revoked')
+        self.assertEqual(self.get_profile(self.user.tokens()['access']).status_code, 200)
+
+    def test_rehash_on_login_keeps_tokens_valid(self):
+        self.get_profile()
+        version = self.user.auth_version
+        # A new preferred hasher makes check_password() upgrade the stored hash
+        with self.settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher', *settings.PASSWORD_HASHERS]):
+            self.assertTrue(self.user.check_password('first-secret'))
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('md5$'))
+        self.assertEqual(self.user.auth_version, version)
+        self.assertEqual(self.get_profile().status_code, 200)
+
+    def test_logout_blacklists_the_refresh_token_and_evicts_the_user(self):
+        self.get_profile()
+
+        response = self.client.post('/api/accounts/logout/', {'refresh_token': self.tokens['refresh']},
+                                    content_type='application/json',
+                                    HTTP_AUTHORIZATION=f"Bearer {self.tokens['access']}")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertIsNone(self.cached_user())
+        self.assertTrue(BlacklistedToken.objects.filter(token__user=self.user).exists())
+        with self.assertRaises(TokenError):
+            RefreshToken(self.tokens['refresh'])
+
+    def test_deactivation_takes_effect_despite_the_cache(self):
+        self.get_profile()
+        self.assertIsNotNone(self.cached_user())
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.get_profile()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'].code, 'user_inactive')
+
+    def test_deleted_user_is_rejected(self):
+        self.get_profile()
+        self.user.delete()
+        self.assertIsNone(self.cached_user())
+        self.assertEqual(self.get_profile().status_code, 401)
+
+    def test_tokens_without_version_claim_count_as_version_zero(self):
+        legacy = str(RefreshToken.for_user(self.user).access_token)
+        self.assertEqual(self.get_profile(legacy).status_code, 401)
+
+        User.objects.filter(pk=self.user.pk).update(auth_version=0)
+        cache.clear()
+        self.assertEqual(self.get_profile(legacy).status_code, 200)
+
+
+class HealthTests(TestCase):
+
+    def test_reports_database_and_cache(self):
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertTrue(body['ok'])
+        self.assertEqual(body['database']['vendor'], 'sqlite')
+        self.assertTrue(body['database']['ok'])
+        self.assertTrue(body['cache']['ok'])
+        self.assertEqual(body['cache']['backend'], 'LocMemCache')
+
+    def test_failing_cache_returns_503(self):
+        with mock.patch.object(cache, 'set', side_effect=ConnectionError('cache down')), \
+                self.assertLogs('accounts.views', 'ERROR'):
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 503)
+        body = response.json()
+        self.assertFalse(body['ok'])
+        self.assertTrue(body['database']['ok'])
+        self.assertFalse(body['cache']['ok'])
+
+    def test_failing_database_returns_503_without_details(self):
+        with mock.patch('accounts.views._check_database', side_effect=RuntimeError('connection refused')), \
+                self.assertLogs('accounts.views', 'ERROR'):
+            response = self.client.get('/')
+        self.assertEqual(response.status_code, 503)
+        self.assertFalse(response.json()['database']['ok'])
+        self.assertNotIn('connection refused', response.content.decode())
@@ -1,6 +1,6 @@
-from django.core.mail import EmailMessage
 from django.conf import settings
 from .models import User
+from . import mailqueue
 
 
 def send_verification_email(email, request):
@@ -29,18 +29,17 @@ Trip Pick Team"""
     
     from_email = settings.DEFAULT_FROM_EMAIL
     
-    send_email = EmailMessage(subject=subject, body=email_body, from_email=from_email, to=[email])
-    send_email.send(fail_silently=True)
+    # Queued; delivered by accounts.mailqueue so registration doesn't wait on SMTP
+    mailqueue.enqueue(subject, email_body, [email], from_email=from_email)
 
 
 def send_normal_email(data):
-    email = EmailMessage(
+    mailqueue.enqueue(
         subject=data['email_subject'],
         body=data['email_body'],
         from_email=settings.EMAIL_HOST_USER,
         to=[data['to_email']]
     )
-    email.send(fail_silently=True)
 
 
 
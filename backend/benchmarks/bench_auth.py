@@ -0,0 +1,115 @@
+"""Per-request cost of JWT user resolution on the history endpoint.
+
+Creates ``--users`` users with a few itineraries each, then sends ``--requests``
+``GET /api/planner/history/`` requests spread round-robin over them, once with
+simplejwt's ``JWTAuthentication`` (one ``accounts_user`` query per request) and
+once with ``CachedJWTAuthentication`` starting from an empty cache. Every
+user's first request misses, so the hit rate is ``1 - users / requests`` (99%
+with the defaults). Queries against the user table are counted for both runs.
+
+    python -m benchmarks.bench_auth --users 50 --requests 5000
+"""
+import argparse
+import sys
+
+from benchmarks import harness
+
+USER_TABLE = '"accounts_user"'
+
+
+def populate(users, rows_per_user):
+    from planner.models import Itinerary
+
+    tokens = []
+    rows = []
+    for n in range(users):
+        user, access = harness.create_user(f'auth{n}@trippick.local')
+        tokens.append(access)
+        for i in range(rows_per_user):
+            prefs = {'origin': 'Kathmandu', 'destination': 'Paris, France', 'Days': 3 + i, 'budget': 'Moderate'}
+            itinerary = {
+                'meta': {'destination': prefs['destination'], 'days': prefs['Days'], 'budget': prefs['budget']},
+                'flights': [], 'hotels': [],
+                'day_plan': [{'day': d + 1, 'activities': ['Old town walk']} for d in range(prefs['Days'])],
+            }
+            rows.append(Itinerary(user=user, preferences=prefs, itinerary=itinerary))
+    Itinerary.bulk_create_prepared(rows)
+    return tokens
+
+
+class UserQueryCounter:
+    """``execute_wrapper`` hook counting statements that read the user table."""
+
+    def __init__(self):
+        self.user_queries = 0
+        self.queries = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.queries += 1
+        if USER_TABLE in sql:
+            self.user_queries += 1
+        return execute(sql, params, many, context)
+
+
+def measure(name, auth_class, client, tokens, requests):
+    from django.core.cache import cache
+    from django.db import connection
+    from planner.views import UserItinerariesView
+
+    UserItinerariesView.authentication_classes = [auth_class]
+    cache.clear()
+    counter = UserQueryCounter()
+    latencies, statuses = [], {}
+    with connection.execute_wrapper(counter), harness.Timer() as wall:
+        for i in range(requests):
+            token = tokens[i % len(tokens)]
+            with harness.Timer() as t:
+                response = client.get('/api/planner/history/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            latencies.append(t.elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    res = harness.summarize(latencies, wall.elapsed, statuses=statuses)
+    res.update({
+        'queries_per_request': round(counter.queries / requests, 3),
+        'user_queries': counter.user_queries,
+        'user_cache_hit_rate': round(1 - counter.user_queries / requests, 4),
+    })
+    print(f"{name:<7} {res['throughput_rps']}/s p50={res['latency_ms']['p50']}ms "
+          f"queries/request={res['queries_per_request']} user hit rate={res['user_cache_hit_rate']:.2%}", file=sys.stderr)
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--rows-per-user', type=int, default=3)
+    parser.add_argument('--db', default=None, help='SQLite file for the generated rows (default: temp dir)')
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    harness.setup_django(args.db)
+    try:
+        from django.conf import settings
+        from django.test import Client
+        from rest_framework_simplejwt.authentication import JWTAuthentication
+        from accounts.authentication import CachedJWTAuthentication
+
+        tokens = populate(args.users, args.rows_per_user)
+        client = Client()
+        results = {
+            'meta': harness.run_metadata(),
+            'config': {'users': args.users, 'requests': args.requests, 'rows_per_user': args.rows_per_user,
+                       'database': settings.DATABASES['default']['ENGINE'],
+                       'cache': settings.CACHES['default']['BACKEND'],
+                       'cache_seconds': settings.ACCOUNTS_AUTH_CACHE_SECONDS},
+            'jwt': measure('jwt', JWTAuthentication, client, tokens, args.requests),
+            'cached': measure('cached', CachedJWTAuthentication, client, tokens, args.requests),
+        }
+        results['speedup'] = round(results['cached']['throughput_rps'] / results['jwt']['throughput_rps'], 3)
+        harness.write_results(args.output, results)
+    finally:
+        harness.teardown_django()
+
+
+if __name__ == '__main__':
+    main()
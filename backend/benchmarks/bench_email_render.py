@@ -0,0 +1,95 @@
+"""Approval email rendering: template compile, cold renders and content-keyed cache hits.
+
+Builds ``--count`` itineraries from orchestrator output against the stub
+providers, then times rendering both bodies (HTML + plaintext) of every one
+through ``planner.emails.render_itinerary_email``, followed by two passes of
+``planner.emails.itinerary_email`` (the cached path approvals and previews use):
+the first fills the cache, the second is served from it.
+
+    python -m benchmarks.bench_email_render --count 1000
+"""
+import argparse
+import copy
+import os
+import sys
+
+from benchmarks import harness
+from benchmarks.stubs import AmadeusStub, GeminiStub, OpenWeatherStub
+
+DESTINATIONS = ['Paris, France', 'Tokyo, Japan', 'Rome, Italy', 'Bangkok, Thailand', 'Sydney, Australia']
+
+
+def build_itineraries(count):
+    from planner.agents.orchestrator import orchestrate_itinerary
+    from planner.models import Itinerary
+
+    generated = []
+    for n, destination in enumerate(DESTINATIONS):
+        prefs = {'origin': 'Kathmandu', 'destination': destination, 'Days': 5 + n * 2, 'budget': 'Moderate'}
+        generated.append((prefs, orchestrate_itinerary({'preferences': prefs})['itinerary']))
+    itineraries = []
+    for i in range(count):
+        prefs, itinerary = generated[i % len(generated)]
+        itinerary = copy.deepcopy(itinerary)
+        itinerary['meta']['destination'] = f"{itinerary['meta'].get('destination')} #{i}"
+        # Unsaved rows are enough: the cache is keyed by content, and each row differs
+        itineraries.append(Itinerary(pk=i + 1, preferences=prefs, itinerary=itinerary))
+    return itineraries
+
+
+def timed_pass(fn, items):
+    latencies = []
+    with harness.Timer() as wall:
+        for item in items:
+            with harness.Timer() as t:
+                fn(item)
+            latencies.append(t.elapsed)
+    return harness.summarize(latencies, wall.elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    stubs = [AmadeusStub(), OpenWeatherStub(), GeminiStub()]
+    for stub in stubs:
+        stub.start()
+    harness.configure_provider_env(*stubs)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    # Room for every rendered email in the local-memory cache (it holds 300 entries by default)
+    settings.CACHES['default'].setdefault('OPTIONS', {})['MAX_ENTRIES'] = args.count * 2
+    from django.core.cache import cache
+    from planner import emails
+
+    try:
+        itineraries = build_itineraries(args.count)
+        cache.clear()
+        with harness.Timer() as compile_timer:
+            emails._templates()
+        results = {
+            'meta': harness.run_metadata(),
+            'config': {'count': args.count, 'cache': settings.CACHES['default']['BACKEND']},
+            'template_compile_ms': round(compile_timer.elapsed * 1000, 3),
+            'render': timed_pass(lambda it: emails.render_itinerary_email(it.preferences, it.itinerary), itineraries),
+            'cache_fill': timed_pass(emails.itinerary_email, itineraries),
+            'cache_hit': timed_pass(emails.itinerary_email, itineraries),
+        }
+        html, text = emails.render_itinerary_email(itineraries[0].preferences, itineraries[0].itinerary)
+        results['body_bytes'] = {'html': len(html.encode('utf-8')), 'text': len(text.encode('utf-8'))}
+        for name in ('render', 'cache_fill', 'cache_hit'):
+            row = results[name]
+            print(f"{name:<10} {row['throughput_rps']}/s mean={row['latency_ms']['mean']}ms p95={row['latency_ms']['p95']}ms",
+                  file=sys.stderr)
+        harness.write_results(args.output, results)
+    finally:
+        for stub in stubs:
+            stub.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Thread count and latency of agent fan-out at high concurrency.
+
+Compares the old pattern (a fresh ``ThreadPoolExecutor`` per request) with the
+shared ``planner.executor.FairExecutor``. Each simulated request fans out seven
+agent tasks that sleep for a sampled upstream latency, like the real agents
+waiting on Amadeus / OpenWeatherMap / Gemini.
+
+    python -m benchmarks.bench_executor --requests 500 --concurrency 100 --workers 32
+"""
+import argparse
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import harness
+from benchmarks.stubs import LatencyModel
+
+AGENTS = ('flights', 'hotels', 'weather', 'activities', 'packing', 'co2', 'food_culture')
+
+
+class ThreadSampler:
+    """Samples ``threading.active_count()`` in the background and keeps the peak."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self.peak = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, threading.active_count())
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def _agent(latency, rng_lock, rng):
+    with rng_lock:
+        delay = latency.sample(rng)
+    time.sleep(delay)
+    return delay
+
+
+def per_request_pool(latency, rng_lock, rng):
+    with ThreadPoolExecutor() as ex:
+        futures = [ex.submit(_agent, latency, rng_lock, rng) for _ in AGENTS]
+        return [f.result() for f in futures]
+
+
+def shared_pool(executor):
+    def run(latency, rng_lock, rng):
+        calls = {name: (_agent, latency, rng_lock, rng) for name in AGENTS}
+        return executor.map_group(calls)
+    return run
+
+
+def drive(strategy, total, concurrency, latency, seed):
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+    latencies = []
+    lock = threading.Lock()
+
+    def one(_):
+        with harness.Timer() as t:
+            strategy(latency, rng_lock, rng)
+        with lock:
+            latencies.append(t.elapsed)
+
+    baseline_threads = threading.active_count()
+    with ThreadSampler() as sampler, harness.Timer() as wall:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='bench-client') as clients:
+            list(clients.map(one, range(total)))
+    result = harness.summarize(latencies, wall.elapsed)
+    # Client threads are part of the harness, not the system under test
+    result['peak_threads'] = sampler.peak - baseline_threads - concurrency
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=100, help='Concurrent in-flight generate requests')
+    parser.add_argument('--workers', type=int, default=32, help='Shared executor size')
+    parser.add_argument('--agent-latency', default='lognormal:150:60', help='Latency spec for each agent task')
+    parser.add_argument('--seed', type=int, default=1234)
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    from planner.executor import FairExecutor
+
+    latency = LatencyModel.parse(args.agent_latency)
+    executor = FairExecutor(max_workers=args.workers, max_queue=args.requests * len(AGENTS))
+    results = {
+        'meta': harness.run_metadata(),
+        'config': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'workers': args.workers,
+            'agent_latency': latency.to_dict(),
+        },
+        'strategies': {
+            'thread_pool_per_request': drive(per_request_pool, args.requests, args.concurrency, latency, args.seed),
+            'shared_fair_executor': drive(shared_pool(executor), args.requests, args.concurrency, latency, args.seed),
+        },
+    }
+    results['strategies']['shared_fair_executor']['executor'] = executor.stats()
+    executor.shutdown()
+
+    for name, res in results['strategies'].items():
+        lat = res['latency_ms']
+        print(
+            f"{name:>24}: peak_threads={res['peak_threads']} {res['throughput_rps']} req/s "
+            f"p50={lat['p50']}ms p95={lat['p95']}ms p99={lat['p99']}ms",
+            file=sys.stderr,
+        )
+    harness.write_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
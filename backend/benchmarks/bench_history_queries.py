@@ -0,0 +1,178 @@
+"""History query latency on a large generated itinerary table.
+
+Fills a throwaway SQLite database with ``--rows`` itineraries spread over
+``--users`` users, then times the history queries the API issues, each against
+the indexed summary columns and (for comparison) the equivalent JSON lookup.
+The SQLite query plan is recorded next to every timing so index use can be
+checked directly.
+
+    python -m benchmarks.bench_history_queries --rows 1000000 --users 2000
+"""
+import argparse
+import random
+import sys
+from datetime import date, datetime, timedelta, timezone
+
+from benchmarks import harness
+
+DESTINATIONS = [
+    'Paris, France', 'Tokyo, Japan', 'New York, USA', 'London, UK', 'Rome, Italy', 'Bangkok, Thailand',
+    'Sydney, Australia', 'Barcelona, Spain', 'Dubai, UAE', 'Kathmandu, Nepal', 'Delhi, India', 'Berlin, Germany',
+]
+ORIGINS = ['Kathmandu', 'Pokhara', 'Delhi', 'London', 'New York']
+BUDGETS = ['Budget', 'Moderate', 'Luxury']
+STATUSES = ['GENERATED', 'APPROVED', 'CANCELLED']
+
+
+def make_itinerary(rng, i):
+    from planner.models import Itinerary
+    from planner.summaries import build_itinerary_summary, summary_columns
+
+    start = date(2025, 1, 1) + timedelta(days=rng.randrange(365))
+    days = rng.randint(2, 14)
+    prefs = {
+        'origin': rng.choice(ORIGINS), 'destination': rng.choice(DESTINATIONS),
+        'Days': days, 'budget': rng.choice(BUDGETS), 'travelers': 'Couple',
+    }
+    flights = [{
+        'id': str(n), 'airline': 'QR', 'price': round(rng.uniform(300, 2500), 2), 'currency': 'EUR', 'stops': 1,
+        'duration': 'PT14H30M', 'departure_time': f"{start.isoformat()}T08:00:00",
+        'return_departure': f"{(start + timedelta(days=days)).isoformat()}T10:00:00",
+    } for n in range(3)]
+    itinerary = {
+        'meta': {'destination': prefs['destination'], 'days': days, 'budget': prefs['budget']},
+        'flights': flights,
+        'hotels': [{'id': f'H{n}', 'name': f'Hotel {n}'} for n in range(3)],
+        'day_plan': [{'day': d + 1, 'activities': ['Old town walk', 'Museum visit']} for d in range(days)],
+    }
+    summary = build_itinerary_summary(prefs, itinerary)
+    obj = Itinerary(preferences=prefs, itinerary=itinerary, summary=summary, status=rng.choice(STATUSES),
+                    **summary_columns(summary))
+    # Spread creation times out so history pages and cursors span a realistic range
+    obj.created_at = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=i * 30)
+    return obj
+
+
+def populate(rows, users, batch_size, seed):
+    from accounts.models import User
+    from planner.models import Itinerary
+
+    rng = random.Random(seed)
+    User.objects.bulk_create([
+        User(email=f'user{n}@trippick.local', first_name='Bench', last_name=str(n), is_verified=True)
+        for n in range(users)
+    ], batch_size=batch_size)
+    user_ids = list(User.objects.values_list('pk', flat=True))
+
+    # auto_now_add would overwrite the generated timestamps on insert
+    created_at = Itinerary._meta.get_field('created_at')
+    created_at.auto_now_add = False
+    try:
+        created = 0
+        while created < rows:
+            batch = []
+            for i in range(created, min(created + batch_size, rows)):
+                obj = make_itinerary(rng, i)
+                obj.user_id = rng.choice(user_ids)
+                batch.append(obj)
+            Itinerary.objects.bulk_create(batch, batch_size=batch_size)
+            created += len(batch)
+            if created % (batch_size * 20) == 0 or created == rows:
+                print(f"  inserted {created}/{rows}", file=sys.stderr)
+    finally:
+        created_at.auto_now_add = True
+    return user_ids
+
+
+def query_plan(queryset):
+    from django.db import connection
+
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def build_queries(rng, user_ids):
+    """Each entry returns a fresh queryset for one randomly chosen user/filter."""
+    from django.db.models import Q
+    from planner.models import Itinerary
+
+    summary_fields = ('id', 'destination', 'start_date', 'end_date', 'status', 'summary', 'created_at')
+
+    def for_user():
+        return Itinerary.objects.filter(user_id=rng.choice(user_ids))
+
+    def window():
+        start = date(2025, 1, 1) + timedelta(days=rng.randrange(300))
+        return start, start + timedelta(days=30)
+
+    return {
+        'history_full_page': lambda: for_user().order_by('-created_at', '-id')[:20],
+        'history_summary_page': lambda: for_user().only(*summary_fields).order_by('-created_at', '-id')[:20],
+        'history_next_page': lambda: for_user().only(*summary_fields).filter(
+            Q(created_at__lt=datetime(2025, 6, 1, tzinfo=timezone.utc))
+        ).order_by('-created_at', '-id')[:20],
+        'destination_column': lambda: Itinerary.objects.filter(destination=rng.choice(DESTINATIONS)).only(*summary_fields).order_by('-created_at')[:50],
+        'destination_json': lambda: Itinerary.objects.filter(preferences__destination=rng.choice(DESTINATIONS)).only(*summary_fields).order_by('-created_at')[:50],
+        'status_count_column': lambda: Itinerary.objects.filter(status='APPROVED', destination=rng.choice(DESTINATIONS)),
+        'date_range_column': lambda: Itinerary.objects.filter(start_date__range=window()).only(*summary_fields)[:50],
+        'date_range_json': lambda: Itinerary.objects.filter(
+            summary__start_date__gte=window()[0].isoformat(), summary__start_date__lte=window()[1].isoformat()
+        ).only(*summary_fields)[:50],
+        'user_destination_column': lambda: for_user().filter(destination=rng.choice(DESTINATIONS)).only(*summary_fields),
+        'user_price_column': lambda: for_user().filter(total_flight_price__lte=800).only(*summary_fields),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--repeat', type=int, default=50, help='Executions per query')
+    parser.add_argument('--queries', default=None, help='Comma separated subset of queries')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--db', default=None, help='SQLite file for the generated table (default: temp dir)')
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    db_path = harness.setup_django(args.db)
+    try:
+        print(f"Generating {args.rows} itineraries in {db_path}", file=sys.stderr)
+        with harness.Timer() as fill:
+            user_ids = populate(args.rows, args.users, args.batch_size, args.seed)
+
+        rng = random.Random(args.seed)
+        queries = build_queries(rng, user_ids)
+        if args.queries:
+            queries = {name: queries[name] for name in args.queries.split(',')}
+
+        results = {
+            'meta': harness.run_metadata(),
+            'config': {'rows': args.rows, 'users': args.users, 'repeat': args.repeat, 'populate_s': round(fill.elapsed, 1)},
+            'queries': {},
+        }
+        for name, make in queries.items():
+            plan = query_plan(make())
+            latencies = []
+            with harness.Timer() as wall:
+                for _ in range(args.repeat):
+                    queryset = make()
+                    with harness.Timer() as t:
+                        if name.startswith('status_count'):
+                            queryset.count()
+                        else:
+                            list(queryset)
+                    latencies.append(t.elapsed)
+            res = harness.summarize(latencies, wall.elapsed)
+            res['plan'] = plan
+            results['queries'][name] = res
+            print(f"{name:<24} p50={res['latency_ms']['p50']}ms p95={res['latency_ms']['p95']}ms  {' / '.join(plan)}", file=sys.stderr)
+        harness.write_results(args.output, results)
+    finally:
+        harness.teardown_django()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""Serialization and rendering cost of the history endpoint.
+
+Saves ``--rows`` itineraries (generated through the orchestrator against the
+stub providers) for one user, then requests ``GET /api/planner/history/``
+``--repeat`` times with the previous configuration (``ItinerarySerializer`` +
+DRF ``JSONRenderer``) and the current one (``ItineraryReadSerializer`` +
+``ORJSONRenderer``). Besides end-to-end latency it times the serializer and the
+renderer on their own, and checks both configurations return the same body.
+
+    python -m benchmarks.bench_history_render --rows 500
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+
+from benchmarks import harness
+from benchmarks.stubs import AmadeusStub, GeminiStub, OpenWeatherStub
+
+DESTINATIONS = ['Paris, France', 'Tokyo, Japan', 'Rome, Italy', 'Bangkok, Thailand', 'Sydney, Australia']
+
+
+def populate(user, rows):
+    from planner.agents.orchestrator import orchestrate_itinerary
+    from planner.models import Itinerary
+
+    generated = []
+    for n, destination in enumerate(DESTINATIONS):
+        prefs = {'origin': 'Kathmandu', 'destination': destination, 'Days': 5 + n * 2, 'budget': 'Moderate'}
+        generated.append((prefs, orchestrate_itinerary({'preferences': prefs})['itinerary']))
+    Itinerary.bulk_create_prepared([
+        Itinerary(user=user, preferences=generated[i % len(generated)][0], itinerary=generated[i % len(generated)][1])
+        for i in range(rows)
+    ])
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, round(statistics.median(samples) * 1000, 3)
+
+
+def measure(name, serializer_class, renderer_class, client, token, repeat):
+    from planner.models import Itinerary
+    from planner.views import UserItinerariesView
+
+    UserItinerariesView.read_serializer_class = serializer_class
+    UserItinerariesView.renderer_classes = [renderer_class]
+
+    rows = Itinerary.prefetch_sections(Itinerary.objects.order_by('-created_at'))
+    data, serialize_ms = median_ms(lambda: serializer_class(rows, many=True).data, repeat)
+    body, render_ms = median_ms(lambda: renderer_class().render(data), repeat)
+
+    latencies, statuses = [], {}
+    with harness.Timer() as wall:
+        for _ in range(repeat):
+            with harness.Timer() as t:
+                response = client.get('/api/planner/history/', HTTP_AUTHORIZATION=f'Bearer {token}')
+            latencies.append(t.elapsed)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    res = harness.summarize(latencies, wall.elapsed, statuses=statuses)
+    res.update({'serialize_ms': serialize_ms, 'render_ms': render_ms, 'body_bytes': len(response.content)})
+    print(f"{name:<7} p50={res['latency_ms']['p50']}ms serialize={serialize_ms}ms render={render_ms}ms "
+          f"body={len(response.content)}B", file=sys.stderr)
+    return res, json.loads(response.content)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=20, help='Requests (and component timings) per configuration')
+    parser.add_argument('--db', default=None, help='SQLite file for the generated rows (default: temp dir)')
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    stubs = [AmadeusStub(), OpenWeatherStub(), GeminiStub()]
+    for stub in stubs:
+        stub.start()
+    harness.configure_provider_env(*stubs)
+    harness.setup_django(args.db)
+    try:
+        from django.test import Client
+        from rest_framework.renderers import JSONRenderer
+        from planner import renderers
+        from planner.serializers import ItinerarySerializer, ItineraryReadSerializer
+        from planner.views import UserItinerariesView
+
+        user, token = harness.create_user()
+        print(f"Saving {args.rows} itineraries", file=sys.stderr)
+        populate(user, args.rows)
+
+        client = Client()
+        original = (UserItinerariesView.read_serializer_class, UserItinerariesView.renderer_classes)
+        try:
+            before, before_body = measure('before', ItinerarySerializer, JSONRenderer, client, token, args.repeat)
+            after, after_body = measure('after', ItineraryReadSerializer, renderers.ORJSONRenderer, client, token, args.repeat)
+        finally:
+            UserItinerariesView.read_serializer_class, UserItinerariesView.renderer_classes = original
+
+        results = {
+            'meta': harness.run_metadata(),
+            'config': {'rows': args.rows, 'repeat': args.repeat, 'orjson': renderers.ORJSON_AVAILABLE},
+            'before': before,
+            'after': after,
+            'identical_output': before_body == after_body,
+            'speedup_p50': round(before['latency_ms']['p50'] / after['latency_ms']['p50'], 2),
+        }
+        print(f"speedup p50 x{results['speedup_p50']}, identical output: {results['identical_output']}", file=sys.stderr)
+        harness.write_results(args.output, results)
+    finally:
+        harness.teardown_django()
+        for stub in stubs:
+            stub.stop()
+
+
+if __name__ == '__main__':
+    main()
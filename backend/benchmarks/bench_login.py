@@ -0,0 +1,122 @@
+"""Login throughput per password hashing policy, including rehash-on-login.
+
+Serves the API from a live server and, for every policy in ``--hashers``, creates
+``--users`` verified users whose passwords are stored with the legacy
+PBKDF2-SHA1 hasher, then sends ``--requests`` ``POST /api/accounts/login/`` calls
+over them at ``--concurrency``. Each user's first login verifies the legacy hash
+and transparently re-hashes it with the policy's hasher, later logins use the
+new hash; ``upgraded`` counts the accounts that ended up on the new hasher.
+Throughput is also reported per usable CPU core, next to the hashing slot
+counters (``accounts.hashers.hashing_slot``).
+
+    python -m benchmarks.bench_login --users 50 --requests 400 --concurrency 8
+"""
+import argparse
+import importlib.util
+import os
+import sys
+
+from benchmarks import harness
+from benchmarks.load_test import run_scenario
+
+PASSWORD = 'bench-password-123'
+POLICIES = {
+    'pbkdf2': 'accounts.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'accounts.hashers.TunedArgon2PasswordHasher',
+}
+LEGACY_HASHER = 'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher'
+
+
+def usable_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on macOS/Windows
+        return os.cpu_count() or 1
+
+
+def create_users(prefix, count):
+    from django.contrib.auth.hashers import make_password
+    from accounts.models import User
+
+    # One legacy hash shared by every account keeps setup fast; each login still verifies it in full
+    legacy = make_password(PASSWORD, hasher='pbkdf2_sha1')
+    users = [User(email=f'{prefix}{n}@trippick.local', first_name='Bench', last_name=str(n),
+                  password=legacy, is_verified=True) for n in range(count)]
+    User.objects.bulk_create(users)
+    return [user.email for user in users]
+
+
+def measure(name, base_url, args):
+    import requests
+    from django.contrib.auth.hashers import identify_hasher
+    from django.test import override_settings
+    from accounts.hashers import hashing_slot
+    from accounts.models import User
+
+    hashers = [POLICIES[name]] + [h for h in POLICIES.values() if h != POLICIES[name]] + [LEGACY_HASHER]
+    with override_settings(PASSWORD_HASHERS=hashers):
+        emails = create_users(f'{name}-', args.users)
+
+        def login(i):
+            response = requests.post(f'{base_url}/api/accounts/login/', timeout=60,
+                                     json={'email': emails[i % len(emails)], 'password': PASSWORD})
+            return response.status_code
+
+        res = run_scenario(f'login-{name}', login, args.requests, args.concurrency)
+        algorithm = identify_hasher(User.objects.get(email=emails[0]).password).algorithm
+        upgraded = sum(
+            identify_hasher(password).algorithm == algorithm
+            for password in User.objects.filter(email__in=emails).values_list('password', flat=True)
+        )
+    cores = usable_cores()
+    res.update({
+        'hasher': POLICIES[name],
+        'upgraded': f'{upgraded}/{len(emails)}',
+        'cores': cores,
+        'throughput_rps_per_core': round(res['throughput_rps'] / cores, 2) if res['throughput_rps'] else None,
+        'hashing_slots': hashing_slot.stats(),
+    })
+    print(f"{name:<7} {res['throughput_rps']}/s ({res['throughput_rps_per_core']}/s per core) "
+          f"p50={res['latency_ms']['p50']}ms p95={res['latency_ms']['p95']}ms upgraded={res['upgraded']} "
+          f"statuses={res['statuses']}", file=sys.stderr)
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--hashers', default=','.join(POLICIES), help='Comma separated subset of %s' % (tuple(POLICIES),))
+    parser.add_argument('--db', default=None, help='SQLite file for the generated users (default: temp dir)')
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    names = args.hashers.split(',')
+    if 'argon2' in names and importlib.util.find_spec('argon2') is None:
+        print("argon2-cffi is not installed, skipping the argon2 policy", file=sys.stderr)
+        names.remove('argon2')
+
+    harness.setup_django(args.db)
+    server = harness.LiveServer().start()
+    try:
+        from django.conf import settings
+
+        results = {
+            'meta': harness.run_metadata(),
+            'config': {'users': args.users, 'requests': args.requests, 'concurrency': args.concurrency,
+                       'pbkdf2_iterations': settings.ACCOUNTS_PBKDF2_ITERATIONS,
+                       'argon2': {'time_cost': settings.ACCOUNTS_ARGON2_TIME_COST,
+                                  'memory_cost_kib': settings.ACCOUNTS_ARGON2_MEMORY_COST,
+                                  'parallelism': settings.ACCOUNTS_ARGON2_PARALLELISM}},
+        }
+        for name in names:
+            results[name] = measure(name, server.base_url, args)
+        harness.write_results(args.output, results)
+    finally:
+        server.stop()
+        harness.teardown_django()
+
+
+if __name__ == '__main__':
+    main()
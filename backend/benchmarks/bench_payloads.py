@@ -0,0 +1,113 @@
+"""Payload size and serialization cost of the regular vs compact itinerary format.
+
+Generates representative itineraries through the orchestrator against the stub
+providers (a week in one city, a two-week trip and a four-city trip), plus a
+history page holding ``--history`` of them, then reports for each payload the
+rendered JSON size, the compact size, their gzip/brotli sizes and the time to
+render and compress.
+
+    python -m benchmarks.bench_payloads --iterations 200
+"""
+import argparse
+import gzip
+import os
+import statistics
+import sys
+import time
+
+from benchmarks import harness
+from benchmarks.stubs import AmadeusStub, GeminiStub, OpenWeatherStub
+
+SCENARIOS = {
+    'single_7d': {'origin': 'Kathmandu', 'destination': 'Paris, France', 'Days': 7, 'budget': 'Moderate'},
+    'single_14d': {'origin': 'Kathmandu', 'destination': 'Tokyo, Japan', 'Days': 14, 'budget': 'Luxury'},
+    'multi_city_4': {
+        'origin': 'Kathmandu', 'budget': 'Moderate', 'start_date': '2026-03-01',
+        'stops': [{'city': 'Paris', 'nights': 3}, {'city': 'Rome', 'nights': 2},
+                  {'city': 'Barcelona', 'nights': 3}, {'city': 'London', 'nights': 2}],
+    },
+}
+
+
+def timed(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = fn()
+        samples.append(time.perf_counter() - start)
+    return result, round(statistics.median(samples) * 1000, 3)
+
+
+def measure(data, iterations):
+    from rest_framework.renderers import JSONRenderer
+    from planner import middleware
+    from planner.renderers import CompactItineraryRenderer
+
+    full, full_ms = timed(lambda: JSONRenderer().render(data), iterations)
+    compact, compact_ms = timed(lambda: CompactItineraryRenderer().render(data), iterations)
+    row = {
+        'json_bytes': len(full),
+        'compact_bytes': len(compact),
+        'compact_ratio': round(len(compact) / len(full), 3),
+        'render_ms': full_ms,
+        'render_compact_ms': compact_ms,
+    }
+    for name, body in (('json', full), ('compact', compact)):
+        gz, gz_ms = timed(lambda: gzip.compress(body, compresslevel=6, mtime=0), iterations)
+        row[f'{name}_gzip_bytes'] = len(gz)
+        row[f'{name}_gzip_ms'] = gz_ms
+        if middleware.BROTLI_AVAILABLE:
+            br, br_ms = timed(lambda: middleware.compress(body, 'br'), iterations)
+            row[f'{name}_br_bytes'] = len(br)
+            row[f'{name}_br_ms'] = br_ms
+    return row
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=200, help='Repetitions per measurement (median reported)')
+    parser.add_argument('--history', type=int, default=50, help='Itineraries in the simulated history page')
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    stubs = [AmadeusStub(), OpenWeatherStub(), GeminiStub()]
+    for stub in stubs:
+        stub.start()
+    harness.configure_provider_env(*stubs)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+    from planner.agents.orchestrator import orchestrate_itinerary
+
+    try:
+        payloads = {}
+        for name, prefs in SCENARIOS.items():
+            result = orchestrate_itinerary({'preferences': prefs})
+            # Same body GenerateItineraryView returns
+            payloads[name] = {'itinerary': result, 'email_sent': False, 'email_error': None}
+        single = payloads['single_7d']['itinerary']['itinerary']
+        payloads[f'history_{args.history}'] = [
+            {'id': i, 'preferences': SCENARIOS['single_7d'], 'itinerary': single, 'status': 'GENERATED'}
+            for i in range(args.history)
+        ]
+
+        from planner import middleware
+        results = {
+            'meta': harness.run_metadata(),
+            'config': {'iterations': args.iterations, 'brotli': middleware.BROTLI_AVAILABLE},
+            'payloads': {},
+        }
+        for name, data in payloads.items():
+            row = measure(data, args.iterations)
+            results['payloads'][name] = row
+            print(f"{name:<14} json={row['json_bytes']}B compact={row['compact_bytes']}B "
+                  f"gzip={row['json_gzip_bytes']}B compact+gzip={row['compact_gzip_bytes']}B "
+                  f"render={row['render_ms']}ms compact={row['render_compact_ms']}ms", file=sys.stderr)
+        harness.write_results(args.output, results)
+    finally:
+        for stub in stubs:
+            stub.stop()
+
+
+if __name__ == '__main__':
+    main()
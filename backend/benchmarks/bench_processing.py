@@ -0,0 +1,111 @@
+"""Throughput of the CPU-bound post-processing stage versus process-pool size.
+
+Each simulated generation parses a large Amadeus flight-offers payload and
+builds the day plan, both through ``planner.processing.run_cpu`` as the agents
+do. (Approval e-mails are rendered on approval, not during generation; see
+``bench_email_render``.) Client threads keep the stage saturated while
+``PLANNER_PROCESS_WORKERS`` is stepped from 0 (inline, GIL-bound) up to the
+core count.
+
+    python -m benchmarks.bench_processing --offers 250 --jobs 400
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import harness
+from benchmarks.stubs import AmadeusStub
+
+PREFERENCES = {'origin': 'Kathmandu', 'destination': 'Paris, France', 'Days': 14, 'budget': 'Moderate'}
+
+
+def make_payload(offers):
+    stub = AmadeusStub()
+    try:
+        data = stub._flight_offers({
+            'originLocationCode': ['KTM'], 'destinationLocationCode': ['PAR'],
+            'departureDate': ['2025-05-01'], 'returnDate': ['2025-05-15'], 'max': [str(offers)],
+        })
+    finally:
+        stub.httpd.server_close()
+    return json.dumps({'meta': {'count': len(data)}, 'data': data}).encode('utf-8')
+
+
+def generation(payload, activities):
+    from planner import processing
+
+    flights = processing.run_cpu(processing.parse_flight_offers, payload, 'KTM', 'PAR', payload_size=len(payload))
+    day_plan = processing.run_cpu(processing.build_day_plan, activities, PREFERENCES['Days'], payload_size=len(activities))
+    return flights, day_plan
+
+
+def run(workers, jobs, clients, payload, activities):
+    from django.conf import settings
+    from planner import processing
+
+    settings.PLANNER_PROCESS_WORKERS = workers
+    settings.PLANNER_PROCESS_MIN_PAYLOAD = 0
+    processing.shutdown_pool()
+    # Warm the pool so worker start-up is not part of the measurement
+    for _ in range(max(workers, 1) * 2):
+        generation(payload, activities)
+
+    latencies = []
+    lock = threading.Lock()
+
+    def one(_):
+        with harness.Timer() as t:
+            generation(payload, activities)
+        with lock:
+            latencies.append(t.elapsed)
+
+    with harness.Timer() as wall:
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            list(pool.map(one, range(jobs)))
+    processing.shutdown_pool()
+    return harness.summarize(latencies, wall.elapsed)
+
+
+def main(argv=None):
+    cores = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--offers', type=int, default=250, help='Flight offers in the synthetic payload')
+    parser.add_argument('--jobs', type=int, default=200, help='Generations per configuration')
+    parser.add_argument('--clients', type=int, default=cores * 2, help='Concurrent client threads')
+    parser.add_argument('--workers', default=None, help='Comma separated pool sizes (default 0,1,2,4..cores)')
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    if args.workers:
+        sizes = [int(w) for w in args.workers.split(',')]
+    else:
+        sizes, n = [0], 1
+        while n <= cores:
+            sizes.append(n)
+            n *= 2
+        if sizes[-1] != cores:
+            sizes.append(cores)
+
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+    payload = make_payload(args.offers)
+    activities = [f'Activity {i}' for i in range(PREFERENCES['Days'] * 4)]
+    results = {
+        'meta': harness.run_metadata(),
+        'config': {'offers': args.offers, 'payload_bytes': len(payload), 'jobs': args.jobs, 'clients': args.clients},
+        'workers': {},
+    }
+    for size in sizes:
+        res = run(size, args.jobs, args.clients, payload, activities)
+        results['workers'][str(size)] = res
+        print(f"workers={size:>2}: {res['throughput_rps']} generations/s p50={res['latency_ms']['p50']}ms p95={res['latency_ms']['p95']}ms", file=sys.stderr)
+    harness.write_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Micro-benchmarks of the agents' parsing and the consolidation step on replayed responses.
+
+Provider responses come from a cassette (see ``planner.agents.providers``), so
+the numbers measure parsing, aggregation and serialization only — no network.
+
+    # record once from the real providers (credentials in .env)
+    PROVIDER_CASSETTE=benchmarks/cassettes/default.cassette PROVIDER_CASSETTE_MODE=record \
+        python -c "from benchmarks.bench_providers import record_live; record_live()"
+
+    # or record from the local stub servers, then benchmark
+    python -m benchmarks.bench_providers --record-from-stubs --iterations 500
+"""
+import argparse
+import json
+import logging
+import sys
+from pathlib import Path
+
+from benchmarks import harness
+from benchmarks.load_test import DEFAULT_PREFERENCES
+
+DEFAULT_CASSETTE = Path(__file__).resolve().parent / 'cassettes' / 'default.cassette'
+
+
+def _calls():
+    from planner.agents import (
+        activities_agent, flight_recommender, food_culture_agent, hotel_recommender,
+        orchestrator, packing_agent, weather_agent,
+    )
+
+    state = {'preferences': dict(DEFAULT_PREFERENCES)}
+    return {
+        'search_flights': lambda: flight_recommender.search_flights(state),
+        'search_hotels': lambda: hotel_recommender.search_hotels(state),
+        'get_forecast': lambda: weather_agent.get_forecast(state),
+        'recommend_activities': lambda: activities_agent.recommend_activities(state),
+        'food_culture': lambda: food_culture_agent.recommend(state),
+        'packing_list': lambda: packing_agent.generate_packing_list(
+            {'preferences': state['preferences'], **weather_agent.get_forecast(state)}
+        ),
+        'orchestrator': orchestrator,
+    }
+
+
+def record_live(path=None):
+    """Runs every agent once, then a full orchestration, with a recording cassette active."""
+    from planner.agents import providers
+
+    with providers.use_cassette(path or DEFAULT_CASSETTE, providers.MODE_RECORD) as cassette:
+        calls = _calls()
+        orchestrator = calls.pop('orchestrator')
+        for call in calls.values():
+            call()
+        # Replayed by benchmarks/test_cassette_replay.py
+        orchestrator.orchestrate_itinerary({'preferences': dict(DEFAULT_PREFERENCES)})
+    return cassette
+
+
+def record_from_stubs(path):
+    from benchmarks.stubs import AmadeusStub, GeminiStub, OpenWeatherStub
+
+    stubs = {'amadeus': AmadeusStub(), 'openweather': OpenWeatherStub(), 'gemini': GeminiStub()}
+    for stub in stubs.values():
+        stub.start()
+    harness.configure_provider_env(**stubs)
+    try:
+        return record_live(path)
+    finally:
+        for stub in stubs.values():
+            stub.stop()
+
+
+def measure(fn, iterations, warmup=5):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(iterations):
+        with harness.Timer() as t:
+            fn()
+        samples.append(t.elapsed)
+    summary = harness.summarize(samples, sum(samples))
+    return {
+        'iterations': iterations,
+        'calls_per_s': summary['throughput_rps'],
+        'latency_us': {k: round(v * 1000, 2) if v is not None else None for k, v in summary['latency_ms'].items()},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cassette', default=str(DEFAULT_CASSETTE))
+    parser.add_argument('--record-from-stubs', action='store_true', help='(Re)record the cassette from local stub servers first')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.CRITICAL)
+    cassette_path = Path(args.cassette)
+    if args.record_from_stubs:
+        recorded = record_from_stubs(cassette_path)
+        print(f'Recorded {len(recorded)} responses to {cassette_path}', file=sys.stderr)
+    elif not cassette_path.exists():
+        sys.exit(f'{cassette_path} does not exist; record it first (see --help)')
+
+    from planner.agents import providers
+
+    results = {'meta': harness.run_metadata(), 'config': {'iterations': args.iterations}, 'benchmarks': {}}
+    with providers.use_cassette(cassette_path, providers.MODE_REPLAY) as cassette:
+        calls = _calls()
+        orchestrator = calls.pop('orchestrator')
+        outputs = {}
+        for name, call in calls.items():
+            outputs.update(call())
+            results['benchmarks'][name] = measure(call, args.iterations)
+
+        prefs = DEFAULT_PREFERENCES
+        results['benchmarks']['consolidate_itinerary'] = measure(
+            lambda: orchestrator.consolidate_itinerary(prefs, outputs), args.iterations
+        )
+        itinerary = orchestrator.consolidate_itinerary(prefs, outputs)
+        results['benchmarks']['serialize_itinerary_json'] = measure(lambda: json.dumps(itinerary), args.iterations)
+        results['cassette'] = cassette.stats()
+
+    for name, bench in results['benchmarks'].items():
+        lat = bench['latency_us']
+        print(f"{name:>26}: p50={lat['p50']}us p95={lat['p95']}us p99={lat['p99']}us", file=sys.stderr)
+    harness.write_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Concurrent save/history throughput per SQLite profile.
+
+Serves the API from a live server and runs ``--writers`` signed-in clients at
+once, each alternating ``POST /api/planner/save/`` and ``GET /api/planner/history/``
+for its own user, ``--requests`` calls in total. Every profile in ``--profiles``
+runs in a fresh subprocess because the database settings are read at startup:
+
+    default               the stock database settings (rollback journal)
+    coalesced             stock settings plus save coalescing (planner/writebatch.py)
+    production            ``SQLITE_PRODUCTION=1`` (WAL, pragmas, BEGIN IMMEDIATE,
+                          busy timeout) without save coalescing
+    production-coalesced  both
+
+The live server closes database connections after every request, so the
+``CONN_MAX_AGE`` part of the production profile is not exercised here.
+
+Throughput and latency are reported per operation, with ``database is locked``
+failures counted separately from other errors and the coalescer's batch stats.
+
+    python -m benchmarks.bench_sqlite_concurrency --writers 50 --requests 2000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from benchmarks import harness
+from benchmarks.load_test import DEFAULT_PREFERENCES, Client, run_scenario
+
+PROFILES = {
+    'default': {'SQLITE_PRODUCTION': '0', 'PLANNER_SAVE_COALESCING': '0'},
+    'coalesced': {'SQLITE_PRODUCTION': '0', 'PLANNER_SAVE_COALESCING': '1'},
+    'production': {'SQLITE_PRODUCTION': '1', 'PLANNER_SAVE_COALESCING': '0'},
+    'production-coalesced': {'SQLITE_PRODUCTION': '1', 'PLANNER_SAVE_COALESCING': '1'},
+}
+LOCKED = 'database is locked'
+
+
+def sample_itinerary(days=5):
+    return {
+        'meta': {'destination': DEFAULT_PREFERENCES['destination'], 'days': days, 'budget': 'Moderate'},
+        'flights': [{'id': str(n), 'airline': 'QR', 'price': 850.0 + n * 120, 'currency': 'EUR', 'stops': 1,
+                     'duration': 'PT14H30M', 'departure_time': '2025-05-01T08:00:00',
+                     'return_departure': '2025-05-06T10:00:00'} for n in range(3)],
+        'hotels': [{'id': f'H{n}', 'name': f'Hotel {n}', 'rating': 4} for n in range(3)],
+        'day_plan': [{'day': d + 1, 'activities': ['Old town walk', 'Museum visit', 'Dinner cruise']}
+                     for d in range(days)],
+    }
+
+
+def measure(profile, args):
+    from django.conf import settings
+    from planner import writebatch
+
+    server = harness.LiveServer().start()
+    try:
+        clients = [Client(server.base_url, harness.create_user(f'writer{n}@trippick.local')[1], timeout=120)
+                   for n in range(args.writers)]
+        payload = {'preferences': DEFAULT_PREFERENCES, 'itinerary': sample_itinerary()}
+
+        def operation(i):
+            return 'save' if i % 2 == 0 else 'history'
+
+        def call(i):
+            client = clients[(i // 2) % len(clients)]
+            if operation(i) == 'save':
+                response = client.request('POST', '/api/planner/save/', json=payload)
+            else:
+                response = client.request('GET', '/api/planner/history/', params={'view': 'summary', 'limit': 20})
+            if response.status_code >= 500 and LOCKED in response.text:
+                return LOCKED
+            return response.status_code
+
+        res = run_scenario(profile, call, args.requests, args.writers, classify=operation)
+    finally:
+        server.stop()
+
+    db = settings.DATABASES['default']
+    res.update({
+        'profile': profile,
+        'env': PROFILES[profile],
+        'database': {'conn_max_age': db.get('CONN_MAX_AGE', 0), 'options': db.get('OPTIONS', {})},
+        'locked': res['statuses'].get(LOCKED, 0),
+        'writebatch': writebatch.stats(),
+    })
+    return res
+
+
+def run_profile(profile, args):
+    """Runs one profile in a subprocess with its settings environment and returns its results."""
+    with tempfile.TemporaryDirectory(prefix='trippick-bench-') as tmp:
+        output = os.path.join(tmp, 'result.json')
+        env = dict(os.environ, **PROFILES[profile])
+        subprocess.run([sys.executable, '-m', 'benchmarks.bench_sqlite_concurrency', '--profile', profile,
+                        '--writers', str(args.writers), '--requests', str(args.requests),
+                        '--db', os.path.join(tmp, 'bench.sqlite3'), '--output', output],
+                       env=env, check=True)
+        with open(output) as fh:
+            res = json.load(fh)
+    for label, entry in sorted(res['classes'].items()):
+        print(f"{profile:<20} {label:<8} {entry['throughput_rps']}/s p50={entry['latency_ms']['p50']}ms "
+              f"p95={entry['latency_ms']['p95']}ms p99={entry['latency_ms']['p99']}ms statuses={entry['statuses']}",
+              file=sys.stderr)
+    print(f"{profile:<20} total    {res['throughput_rps']}/s locked={res['locked']} writebatch={res['writebatch']}",
+          file=sys.stderr)
+    return res
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=50, help='Concurrent clients, one user each')
+    parser.add_argument('--requests', type=int, default=2000, help='Total calls, half saves and half history reads')
+    parser.add_argument('--profiles', default=','.join(PROFILES), help='Comma separated subset of %s' % (tuple(PROFILES),))
+    parser.add_argument('--profile', choices=PROFILES, help=argparse.SUPPRESS)  # set for the per-profile subprocess
+    parser.add_argument('--db', default=None, help=argparse.SUPPRESS)
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    if args.profile:
+        harness.setup_django(args.db)
+        try:
+            harness.write_results(args.output, measure(args.profile, args))
+        finally:
+            harness.teardown_django()
+        return
+
+    results = {'meta': harness.run_metadata(), 'config': {'writers': args.writers, 'requests': args.requests}}
+    for profile in args.profiles.split(','):
+        results[profile] = run_profile(profile, args)
+    harness.write_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+"""Email verification lookups and expired-token purging on a large user table.
+
+Fills a throwaway SQLite database with ``--users`` users, each holding one
+``EmailVerificationToken`` (``--expired`` of them already past their expiry),
+then compares:
+
+* ``legacy``: the previous layout, an unindexed ``verification_token`` column on
+  ``accounts_user`` (re-created with ``ALTER TABLE`` for the benchmark), looked
+  up with the query ``VerifyUserEmail`` used to issue;
+* ``token_table``: the unique ``token`` column the view now queries.
+
+The SQLite query plan is recorded with each timing. Finally
+``purge_verification_tokens`` is timed on the expired rows.
+
+    python -m benchmarks.bench_verification_tokens --users 1000000
+"""
+import argparse
+import random
+import secrets
+import sys
+from datetime import timedelta
+
+from benchmarks import harness
+
+
+def populate(users, expired_fraction, batch_size, seed):
+    from django.utils import timezone
+    from accounts.models import EmailVerificationToken, User
+
+    rng = random.Random(seed)
+    now = timezone.now()
+    tokens = []
+    created = expired = 0
+    while created < users:
+        batch = [User(email=f'verify{n}@trippick.local', first_name='Bench', last_name=str(n))
+                 for n in range(created, min(created + batch_size, users))]
+        # bulk_create sets primary keys on SQLite 3.35+ and PostgreSQL
+        User.objects.bulk_create(batch, batch_size=batch_size)
+        rows = []
+        for user in batch:
+            token = secrets.token_urlsafe(32)
+            if rng.random() < expired_fraction:
+                expires_at = now - timedelta(hours=1)
+                expired += 1
+            else:
+                expires_at = now + timedelta(hours=48)
+            rows.append(EmailVerificationToken(user=user, token=token, expires_at=expires_at))
+            tokens.append(token)
+        EmailVerificationToken.objects.bulk_create(rows, batch_size=batch_size)
+        created += len(batch)
+        if created % (batch_size * 20) == 0 or created == users:
+            print(f"  inserted {created}/{users}", file=sys.stderr)
+    return tokens, expired
+
+
+def add_legacy_column():
+    """Recreates the old unindexed ``accounts_user.verification_token`` column."""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute('ALTER TABLE accounts_user ADD COLUMN verification_token varchar(100) NULL')
+        cursor.execute(
+            'UPDATE accounts_user SET verification_token = '
+            '(SELECT token FROM accounts_emailverificationtoken t WHERE t.user_id = accounts_user.id)'
+        )
+
+
+def query_plan(sql, params):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def time_lookups(name, lookup, tokens, repeat, rng):
+    latencies = []
+    with harness.Timer() as wall:
+        for _ in range(repeat):
+            token = rng.choice(tokens)
+            with harness.Timer() as t:
+                found = lookup(token)
+            latencies.append(t.elapsed)
+            assert found, f"{name} lookup missed {token}"
+    return harness.summarize(latencies, wall.elapsed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=1_000_000)
+    parser.add_argument('--expired', type=float, default=0.5, help='Fraction of tokens already expired')
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--legacy-repeat', type=int, default=20, help='Lookups on the unindexed column (each is a scan)')
+    parser.add_argument('--repeat', type=int, default=2000, help='Lookups on the token table')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--db', default=None, help='SQLite file for the generated tables (default: temp dir)')
+    parser.add_argument('--output', default='-')
+    args = parser.parse_args(argv)
+
+    db_path = harness.setup_django(args.db)
+    try:
+        from django.core.management import call_command
+        from django.db import connection
+        from accounts.models import EmailVerificationToken
+
+        print(f"Generating {args.users} users in {db_path}", file=sys.stderr)
+        with harness.Timer() as fill:
+            tokens, expired = populate(args.users, args.expired, args.batch_size, args.seed)
+            add_legacy_column()
+
+        legacy_sql = 'SELECT id FROM accounts_user WHERE verification_token = %s'
+
+        def legacy(token):
+            with connection.cursor() as cursor:
+                cursor.execute(legacy_sql, [token])
+                return cursor.fetchone()
+
+        def token_table(token):
+            return EmailVerificationToken.objects.select_related('user').get(token=token)
+
+        token_sql, token_params = EmailVerificationToken.objects.select_related('user').filter(token=tokens[0]).query.sql_with_params()
+        rng = random.Random(args.seed)
+        results = {
+            'meta': harness.run_metadata(),
+            'config': {'users': args.users, 'expired': args.expired, 'populate_s': round(fill.elapsed, 1),
+                       'database': connection.vendor},
+            'legacy': time_lookups('legacy', legacy, tokens, args.legacy_repeat, rng),
+            'token_table': time_lookups('token_table', token_table, tokens, args.repeat, rng),
+        }
+        results['legacy']['plan'] = query_plan(legacy_sql, [tokens[0]])
+        results['token_table']['plan'] = query_plan(token_sql, token_params)
+        for name in ('legacy', 'token_table'):
+            row = results[name]
+            print(f"{name:<12} p50={row['latency_ms']['p50']}ms p95={row['latency_ms']['p95']}ms  {' / '.join(row['plan'])}",
+                  file=sys.stderr)
+
+        with harness.Timer() as purge:
+            call_command('purge_verification_tokens', batch_size=args.batch_size, stdout=sys.stderr)
+        results['purge'] = {'expired_rows': expired, 'remaining_rows': EmailVerificationToken.objects.count(),
+                            'seconds': round(purge.elapsed, 3),
+                            'rows_per_s': round(expired / purge.elapsed, 1) if purge.elapsed else None}
+        print(f"purge        {expired} rows in {results['purge']['seconds']}s", file=sys.stderr)
+        harness.write_results(args.output, results)
+    finally:
+        harness.teardown_django()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+"""pytest fixtures for deterministic, offline runs of the planner agents.
+
+``provider_cassette`` replays recorded Amadeus / OpenWeatherMap / Gemini
+responses through ``planner.agents.providers``. Pick the cassette with
+``@pytest.mark.cassette('name')`` (resolved inside ``benchmarks/cassettes/``) or
+the ``PROVIDER_CASSETTE`` environment variable; set
+``PROVIDER_CASSETTE_MODE=record`` to refresh it from the live providers.
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+from benchmarks import harness  # noqa: F401  (puts backend/ on sys.path)
+
+CASSETTE_DIR = Path(__file__).resolve().parent / 'cassettes'
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'cassette(name): provider cassette to replay for this test')
+
+
+@pytest.fixture
+def provider_cassette(request):
+    from planner.agents import providers
+
+    marker = request.node.get_closest_marker('cassette')
+    if marker is not None:
+        path = CASSETTE_DIR / f'{marker.args[0]}.cassette'
+    else:
+        path = Path(os.getenv('PROVIDER_CASSETTE', CASSETTE_DIR / 'default.cassette'))
+    mode = os.getenv('PROVIDER_CASSETTE_MODE', providers.MODE_REPLAY)
+    if mode == providers.MODE_REPLAY and not path.exists():
+        pytest.skip(f'cassette {path} has not been recorded')
+    with providers.use_cassette(path, mode) as cassette:
+        yield cassette
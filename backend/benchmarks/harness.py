@@ -0,0 +1,183 @@
+"""Shared plumbing for the offline benchmarks.
+
+Takes care of pointing the agents at the local stub servers, booting Django
+against a throwaway SQLite database, serving the WSGI app on a local port and
+summarising latency samples. Everything here must run before the planner
+agents are imported, because they read their configuration at import time.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+def configure_provider_env(amadeus=None, openweather=None, gemini=None):
+    """Points the agents at the given stub servers via environment variables."""
+    if amadeus is not None:
+        os.environ['AMADEUS_CLIENT_ID'] = 'stub-client'
+        os.environ['AMADEUS_CLIENT_SECRET'] = 'stub-secret'
+        os.environ['AMADEUS_BASE_URL'] = amadeus.base_url
+    if openweather is not None:
+        os.environ['OPENWEATHER_API_KEY'] = 'stub-key'
+        os.environ['OPENWEATHER_BASE_URL'] = openweather.base_url
+    if gemini is not None:
+        os.environ['GEMINI_API_KEY'] = 'stub-key'
+        os.environ['GEMINI_BASE_URL'] = gemini.base_url
+
+
+def setup_django(db_path=None):
+    """Runs ``django.setup()`` and migrates a fresh SQLite database.
+
+    The project's own ``db.sqlite3`` is never touched: a test database is
+    created at ``db_path`` (or in a temporary directory) and returned.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    import django
+    django.setup()
+
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    # Approval emails must never leave the machine during a benchmark
+    settings.EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+    settings.ALLOWED_HOSTS = ['*']
+    # All load comes from one client; generation limits (planner/throttling.py) would turn it into 429s.
+    # Admission control (planner/admission.py) is off too unless a benchmark turns it on.
+    settings.PLANNER_GENERATE_RATE_PER_MINUTE = 0
+    settings.PLANNER_BATCH_RATE_PER_MINUTE = 0
+    settings.PLANNER_GENERATE_MAX_CONCURRENT = 0
+    settings.PLANNER_ADMISSION_MAX_INFLIGHT = 0
+
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='trippick-bench-'), 'bench.sqlite3')
+    connection.settings_dict.setdefault('TEST', {})['NAME'] = str(db_path)
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=False)
+    return db_path
+
+
+def teardown_django():
+    from django.db import connection
+    connection.creation.destroy_test_db(connection.settings_dict['NAME'], verbosity=0)
+
+
+def create_user(email='bench@trippick.local', password='bench-password'):
+    """Creates a verified user and returns ``(user, access_token)``."""
+    from accounts.models import User
+
+    user = User.objects.create_user(email=email, first_name='Bench', last_name='User', password=password, is_verified=True)
+    return user, user.tokens()['access']
+
+
+class LiveServer:
+    """Serves the Django WSGI application from a background thread."""
+
+    def __init__(self, host='127.0.0.1', port=0):
+        from django.core.handlers.wsgi import WSGIHandler
+        from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+
+        class QuietHandler(WSGIRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadedWSGIServer((host, port), QuietHandler, allow_reuse_address=True)
+        self.httpd.set_app(WSGIHandler())
+        # The default listen backlog (5) is far too small for concurrent load tests
+        self.httpd.request_queue_size = 1024
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name='bench-live-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(latencies_s, duration_s, errors=0, statuses=None):
+    """Builds the per-scenario result block written to the JSON report."""
+    values = sorted(v * 1000.0 for v in latencies_s)
+    count = len(values)
+    return {
+        'requests': count,
+        'errors': errors,
+        'statuses': dict(statuses or {}),
+        'duration_s': round(duration_s, 4),
+        'throughput_rps': round(count / duration_s, 2) if duration_s > 0 else None,
+        'latency_ms': {
+            'mean': round(sum(values) / count, 3) if count else None,
+            'p50': _round(percentile(values, 50)),
+            'p95': _round(percentile(values, 95)),
+            'p99': _round(percentile(values, 99)),
+            'max': _round(values[-1] if values else None),
+        },
+    }
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata():
+    return {
+        'commit': git_revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def write_results(path, results):
+    """Writes a JSON report (``-`` writes to stdout)."""
+    payload = json.dumps(results, indent=2, sort_keys=True)
+    if not path or path == '-':
+        print(payload)
+        return
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    Path(path).write_text(payload + '\n', encoding='utf-8')
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
@@ -0,0 +1,254 @@
+"""Offline load test for the planner API.
+
+Starts stub Amadeus / OpenWeatherMap / Gemini servers, boots Django against a
+throwaway SQLite database and drives the planner endpoints at a configurable
+concurrency, reporting throughput and latency percentiles as JSON.
+
+Usage (from the backend/ directory):
+
+    python -m benchmarks.load_test --requests 200 --concurrency 20 \
+        --amadeus-latency lognormal:250:100 --gemini-latency lognormal:900:300 \
+        --error-rate 0.02 --output bench-results/load.json
+
+Compare two commits by running the same command on each and diffing the JSON.
+
+The ``mixed`` scenario (not run by default) sends generation traffic from three
+classes at once - signed-in /generate/, anonymous /generate/ and signed-in
+/regenerate/ - with admission control on (``--admission-max-inflight``), and
+reports latency and status codes per class plus the server's admission stats:
+
+    python -m benchmarks.load_test --scenarios mixed --requests 300 --concurrency 40 \
+        --admission-max-inflight 8 --admission-slo-ms 1500
+"""
+import argparse
+import logging
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks import harness
+from benchmarks.stubs import AmadeusStub, GeminiStub, LatencyModel, OpenWeatherStub
+
+SCENARIOS = ('generate', 'regenerate', 'save', 'history', 'approve', 'mixed')
+DEFAULT_SCENARIOS = SCENARIOS[:-1]
+# Traffic classes of the mixed scenario, repeated in this ratio
+MIXED_CLASSES = ('authenticated', 'authenticated', 'anonymous', 'regenerate')
+
+DEFAULT_PREFERENCES = {
+    'origin': 'Kathmandu',
+    'destination': 'Paris, France',
+    'Days': 5,
+    'budget': 'Moderate',
+    'travelers': 'Couple',
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=100, help='Requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=10, help='Concurrent clients per scenario')
+    parser.add_argument('--scenarios', default=','.join(DEFAULT_SCENARIOS), help='Comma separated subset of %s' % (SCENARIOS,))
+    parser.add_argument('--admission-max-inflight', type=int, default=0,
+                        help='Generations admitted at once by planner/admission.py (0 = admission control off)')
+    parser.add_argument('--admission-slo-ms', type=int, default=2000, help='Queue wait SLO for admission control')
+    parser.add_argument('--admission-max-queue', type=int, default=32)
+    parser.add_argument('--amadeus-latency', default='lognormal:200:80', help='Latency spec for the Amadeus stub')
+    parser.add_argument('--openweather-latency', default='lognormal:120:40', help='Latency spec for the OpenWeatherMap stub')
+    parser.add_argument('--gemini-latency', default='lognormal:800:250', help='Latency spec for the Gemini stub')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Default injected upstream error rate (0-1)')
+    parser.add_argument('--amadeus-error-rate', type=float, default=None)
+    parser.add_argument('--openweather-error-rate', type=float, default=None)
+    parser.add_argument('--gemini-error-rate', type=float, default=None)
+    parser.add_argument('--seed', type=int, default=1234, help='Seed for latency/error sampling')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Client timeout per request (seconds)')
+    parser.add_argument('--db', default=None, help='Path for the throwaway SQLite database')
+    parser.add_argument('--output', default='-', help="JSON report path ('-' for stdout)")
+    parser.add_argument('--log-level', default='CRITICAL', help='Log level for agent output during the run')
+    return parser.parse_args(argv)
+
+
+def _rate(specific, default):
+    return default if specific is None else specific
+
+
+class Client:
+    """Thread-safe wrapper that gives each worker thread its own HTTP session."""
+
+    def __init__(self, base_url, token, timeout):
+        import requests
+
+        self._requests = requests
+        self.base_url = base_url
+        self.token = token
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @property
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._requests.Session()
+            if self.token:
+                session.headers['Authorization'] = f'Bearer {self.token}'
+            self._local.session = session
+        return session
+
+    def request(self, method, path, **kwargs):
+        return self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+
+
+def run_scenario(name, make_call, total, concurrency, classify=None):
+    """Runs ``make_call(i)`` ``total`` times across ``concurrency`` threads.
+
+    With ``classify(i)``, results are also broken down per returned class under ``'classes'``.
+    """
+    latencies = []
+    statuses = Counter()
+    errors = 0
+    lock = threading.Lock()
+    per_class = {}
+
+    def one(i):
+        nonlocal errors
+        with harness.Timer() as t:
+            try:
+                status = make_call(i)
+            except Exception as exc:  # connection errors count as failed requests
+                status = type(exc).__name__
+        failed = not (isinstance(status, int) and 200 <= status < 300)
+        with lock:
+            latencies.append(t.elapsed)
+            statuses[str(status)] += 1
+            if failed:
+                errors += 1
+            if classify is not None:
+                entry = per_class.setdefault(classify(i), {'latencies': [], 'statuses': Counter(), 'errors': 0})
+                entry['latencies'].append(t.elapsed)
+                entry['statuses'][str(status)] += 1
+                entry['errors'] += failed
+
+    with harness.Timer() as wall:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f'load-{name}') as pool:
+            list(pool.map(one, range(total)))
+    result = harness.summarize(latencies, wall.elapsed, errors=errors, statuses=statuses)
+    if classify is not None:
+        result['classes'] = {
+            label: harness.summarize(entry['latencies'], wall.elapsed, errors=entry['errors'], statuses=entry['statuses'])
+            for label, entry in sorted(per_class.items())
+        }
+    return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    scenarios = [s.strip() for s in args.scenarios.split(',') if s.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        sys.exit(f'Unknown scenarios: {", ".join(sorted(unknown))}')
+
+    logging.basicConfig(level=args.log_level.upper())
+
+    stubs = {
+        'amadeus': AmadeusStub(LatencyModel.parse(args.amadeus_latency), _rate(args.amadeus_error_rate, args.error_rate), seed=args.seed),
+        'openweather': OpenWeatherStub(LatencyModel.parse(args.openweather_latency), _rate(args.openweather_error_rate, args.error_rate), seed=args.seed + 1),
+        'gemini': GeminiStub(LatencyModel.parse(args.gemini_latency), _rate(args.gemini_error_rate, args.error_rate), seed=args.seed + 2),
+    }
+    for stub in stubs.values():
+        stub.start()
+    harness.configure_provider_env(**stubs)
+    harness.setup_django(args.db)
+    from django.conf import settings
+    settings.PLANNER_ADMISSION_MAX_INFLIGHT = args.admission_max_inflight
+    settings.PLANNER_ADMISSION_QUEUE_SLO_MS = args.admission_slo_ms
+    settings.PLANNER_ADMISSION_MAX_QUEUE = args.admission_max_queue
+
+    _, token = harness.create_user()
+    server = harness.LiveServer().start()
+    client = Client(server.base_url, token, args.timeout)
+    anonymous = Client(server.base_url, None, args.timeout)
+
+    # A sample itinerary to save, and ids of saved itineraries to approve
+    sample = client.request('POST', '/api/planner/generate/', json={'preferences': DEFAULT_PREFERENCES}).json()
+    sample_itinerary = sample.get('itinerary', {}).get('itinerary', {})
+    saved_ids = []
+    saved_lock = threading.Lock()
+
+    def generate(i):
+        return client.request('POST', '/api/planner/generate/', json={'preferences': DEFAULT_PREFERENCES}).status_code
+
+    def regenerate(i):
+        # Alternate trip length so each call reruns flights + activities only
+        changes = {'Days': DEFAULT_PREFERENCES['Days'] + 1 + i % 2}
+        previous = {'preferences': DEFAULT_PREFERENCES, 'itinerary': sample_itinerary}
+        return client.request('POST', '/api/planner/regenerate/', json={'preferences': changes, 'previous': previous}).status_code
+
+    def save(i):
+        resp = client.request('POST', '/api/planner/save/', json={'preferences': DEFAULT_PREFERENCES, 'itinerary': sample_itinerary})
+        if resp.status_code == 201:
+            with saved_lock:
+                saved_ids.append(resp.json()['id'])
+        return resp.status_code
+
+    def history(i):
+        return client.request('GET', '/api/planner/history/').status_code
+
+    def approve(i):
+        itinerary_id = saved_ids[i % len(saved_ids)]
+        return client.request('POST', '/api/planner/approve/', json={'itinerary_id': itinerary_id}).status_code
+
+    def mixed_class(i):
+        return MIXED_CLASSES[i % len(MIXED_CLASSES)]
+
+    def mixed(i):
+        kind = mixed_class(i)
+        if kind == 'anonymous':
+            return anonymous.request('POST', '/api/planner/generate/', json={'preferences': DEFAULT_PREFERENCES}).status_code
+        if kind == 'regenerate':
+            return regenerate(i)
+        return generate(i)
+
+    calls = {'generate': generate, 'regenerate': regenerate, 'save': save, 'history': history, 'approve': approve,
+             'mixed': mixed}
+    if 'approve' in scenarios and 'save' not in scenarios:
+        for i in range(min(args.requests, 50)):
+            save(i)
+
+    results = {
+        'meta': harness.run_metadata(),
+        'config': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'scenarios': scenarios,
+            'seed': args.seed,
+            'admission': {'max_inflight': args.admission_max_inflight, 'slo_ms': args.admission_slo_ms,
+                          'max_queue': args.admission_max_queue},
+        },
+        'scenarios': {},
+    }
+    try:
+        for name in scenarios:
+            classify = mixed_class if name == 'mixed' else None
+            results['scenarios'][name] = run_scenario(name, calls[name], args.requests, args.concurrency, classify)
+            summary = results['scenarios'][name]
+            rows = [(name, summary)] + [(f'  {label}', row) for label, row in summary.get('classes', {}).items()]
+            for label, row in rows:
+                print(
+                    f"{label:>15}: {row['requests']} req, {row['errors']} err, "
+                    f"{row['throughput_rps']} req/s, p50={row['latency_ms']['p50']}ms "
+                    f"p95={row['latency_ms']['p95']}ms p99={row['latency_ms']['p99']}ms {row['statuses']}",
+                    file=sys.stderr,
+                )
+        results['admission'] = client.request('GET', '/api/planner/generate/status/').json()['admission']
+    finally:
+        results['upstream'] = {name: stub.stats() for name, stub in stubs.items()}
+        server.stop()
+        for stub in stubs.values():
+            stub.stop()
+        harness.teardown_django()
+
+    harness.write_results(args.output, results)
+
+
+if __name__ == '__main__':
+    main()
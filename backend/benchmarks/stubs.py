@@ -0,0 +1,300 @@
+"""Local stub servers that emulate the third-party APIs used by the planner agents.
+
+Each stub is a small threaded HTTP server that answers the handful of endpoints
+the agents call (Amadeus token/cities/flight-offers/hotels, OpenWeatherMap
+forecast and the Gemini generateContent endpoint) with realistic-looking JSON.
+Latency and error rate are configurable per service so load tests can model
+slow or flaky upstreams without touching the network.
+
+Latency specs use the form ``<distribution>:<mean_ms>[:<spread_ms>]``:
+
+    constant:50          always 50 ms
+    uniform:80:40        uniformly distributed in [40, 120] ms
+    exponential:100      exponential with a mean of 100 ms
+    lognormal:150:60     log-normal with mean 150 ms and stddev 60 ms
+"""
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class LatencyModel:
+    """Samples artificial response delays (in seconds) from a distribution."""
+
+    DISTRIBUTIONS = ('constant', 'uniform', 'exponential', 'lognormal')
+
+    def __init__(self, distribution='constant', mean_ms=0.0, spread_ms=0.0):
+        if distribution not in self.DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution '{distribution}'")
+        self.distribution = distribution
+        self.mean_ms = float(mean_ms)
+        self.spread_ms = float(spread_ms)
+
+    @classmethod
+    def parse(cls, spec):
+        """Builds a model from a ``dist:mean[:spread]`` string."""
+        if not spec:
+            return cls()
+        parts = spec.split(':')
+        distribution = parts[0]
+        mean_ms = float(parts[1]) if len(parts) > 1 else 0.0
+        spread_ms = float(parts[2]) if len(parts) > 2 else 0.0
+        return cls(distribution, mean_ms, spread_ms)
+
+    def sample(self, rng):
+        if self.mean_ms <= 0:
+            return 0.0
+        if self.distribution == 'constant':
+            ms = self.mean_ms
+        elif self.distribution == 'uniform':
+            ms = rng.uniform(self.mean_ms - self.spread_ms, self.mean_ms + self.spread_ms)
+        elif self.distribution == 'exponential':
+            ms = rng.expovariate(1.0 / self.mean_ms)
+        else:
+            # Convert the requested mean/stddev into the underlying normal parameters
+            spread = self.spread_ms or self.mean_ms / 2
+            sigma2 = math.log(1 + (spread / self.mean_ms) ** 2)
+            mu = math.log(self.mean_ms) - sigma2 / 2
+            ms = rng.lognormvariate(mu, math.sqrt(sigma2))
+        return max(ms, 0.0) / 1000.0
+
+    def to_dict(self):
+        return {'distribution': self.distribution, 'mean_ms': self.mean_ms, 'spread_ms': self.spread_ms}
+
+
+class StubServer:
+    """Runs a stub handler class on a background thread bound to an ephemeral port."""
+
+    name = 'stub'
+
+    def __init__(self, latency=None, error_rate=0.0, seed=None, host='127.0.0.1', port=0):
+        self.latency = latency or LatencyModel()
+        self.error_rate = float(error_rate)
+        self.calls = Counter()
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._lock = threading.Lock()
+        handler = type(f'{type(self).__name__}Handler', (_StubRequestHandler,), {'stub': self})
+        self.httpd = ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name=f'{self.name}-stub', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def record(self, endpoint):
+        with self._lock:
+            self.calls[endpoint] += 1
+
+    def delay_and_fault(self):
+        """Sleeps for a sampled latency and returns True if this call should fail."""
+        with self._rng_lock:
+            delay = self.latency.sample(self._rng)
+            fail = self._rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        return fail
+
+    def stats(self):
+        with self._lock:
+            return {
+                'base_url': self.base_url,
+                'latency': self.latency.to_dict(),
+                'error_rate': self.error_rate,
+                'calls': dict(self.calls),
+            }
+
+    def handle(self, method, path, query, body):
+        """Returns ``(endpoint_name, status, payload)`` for a request."""
+        raise NotImplementedError
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    stub = None
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def _dispatch(self, method):
+        parsed = urlparse(self.path)
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        endpoint, status, payload = self.stub.handle(method, parsed.path, parse_qs(parsed.query), body)
+        self.stub.record(endpoint)
+        if status == 200 and self.stub.delay_and_fault():
+            status, payload = 503, {'error': {'code': 503, 'message': 'Injected stub failure'}}
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep load test output readable
+        pass
+
+
+class AmadeusStub(StubServer):
+    """Emulates the Amadeus self-service endpoints used by the flight and hotel agents."""
+
+    name = 'amadeus'
+    airlines = ('AF', 'BA', 'LH', 'QR', 'EK', 'TK')
+
+    def handle(self, method, path, query, body):
+        if method == 'POST' and path == '/v1/security/oauth2/token':
+            return 'token', 200, {'type': 'amadeusOAuth2Token', 'access_token': 'stub-access-token', 'expires_in': 1799}
+        if path == '/v1/reference-data/locations/cities':
+            keyword = query.get('keyword', ['XXX'])[0]
+            return 'cities', 200, {'data': [self._city(keyword)]}
+        if path == '/v2/shopping/flight-offers':
+            return 'flight_offers', 200, {'data': self._flight_offers(query)}
+        if path == '/v1/reference-data/locations/hotels/by-city':
+            return 'hotels', 200, {'data': self._hotels(query.get('cityCode', ['XXX'])[0])}
+        return 'unknown', 404, {'errors': [{'status': 404, 'title': 'NOT FOUND', 'detail': path}]}
+
+    def _city(self, keyword):
+        letters = ''.join(c for c in keyword.upper() if c.isalpha()) or 'XXX'
+        return {
+            'type': 'location',
+            'subType': 'city',
+            'name': keyword.upper(),
+            'iataCode': (letters + 'XXX')[:3],
+            'address': {'countryCode': 'XX'},
+            'geoCode': {'latitude': 48.85, 'longitude': 2.35},
+        }
+
+    def _flight_offers(self, query):
+        origin = query.get('originLocationCode', ['AAA'])[0]
+        destination = query.get('destinationLocationCode', ['BBB'])[0]
+        departure = query.get('departureDate', ['2025-01-01'])[0]
+        returning = query.get('returnDate', [None])[0]  # one-way searches omit it
+        limit = int(query.get('max', ['5'])[0])
+        offers = []
+        for i in range(limit):
+            carrier = self.airlines[i % len(self.airlines)]
+            stops = i % 3
+            offers.append({
+                'type': 'flight-offer',
+                'id': str(i + 1),
+                'itineraries': [
+                    self._itinerary(carrier, origin, destination, departure, stops, i),
+                ] + ([self._itinerary(carrier, destination, origin, returning, stops, i)] if returning else []),
+                'price': {'currency': 'USD', 'total': f'{420 + 85 * i:.2f}', 'base': f'{300 + 70 * i:.2f}'},
+                'travelerPricings': [{
+                    'travelerId': '1',
+                    'fareDetailsBySegment': [{'segmentId': '1', 'cabin': 'ECONOMY', 'co2Emissions': {'weight': 180 + 20 * i, 'weightUnit': 'KG'}}],
+                }],
+            })
+        return offers
+
+    def _itinerary(self, carrier, origin, destination, date, stops, seed):
+        segments = []
+        hops = [origin] + [f'X{n}{seed % 10}' for n in range(stops)] + [destination]
+        for n in range(len(hops) - 1):
+            segments.append({
+                'departure': {'iataCode': hops[n], 'at': f'{date}T{8 + 3 * n:02d}:00:00'},
+                'arrival': {'iataCode': hops[n + 1], 'at': f'{date}T{10 + 3 * n:02d}:30:00'},
+                'carrierCode': carrier,
+                'number': str(100 + seed * 10 + n),
+            })
+        return {'duration': f'PT{7 + 3 * stops}H{15 * (seed % 4)}M', 'segments': segments}
+
+    def _hotels(self, city_code):
+        return [
+            {
+                'chainCode': 'HS',
+                'name': f'STUB HOTEL {city_code} {i + 1}',
+                'hotelId': f'HS{city_code}{i:03d}',
+                'geoCode': {'latitude': 48.85 + i / 1000, 'longitude': 2.35 - i / 1000},
+                'address': {'countryCode': 'XX', 'cityName': city_code, 'postalCode': f'{75000 + i}', 'lines': [f'{i + 1} STUB STREET']},
+                'distance': {'value': round(0.2 + i * 0.15, 2), 'unit': 'KM'},
+            }
+            for i in range(15)
+        ]
+
+
+class OpenWeatherStub(StubServer):
+    """Emulates the OpenWeatherMap 5-day / 3-hour forecast endpoint."""
+
+    name = 'openweather'
+    descriptions = ('clear sky', 'few clouds', 'light rain', 'overcast clouds', 'moderate rain')
+
+    def handle(self, method, path, query, body):
+        if path != '/data/2.5/forecast':
+            return 'unknown', 404, {'cod': '404', 'message': 'not found'}
+        start = int(time.time()) // 10800 * 10800
+        entries = []
+        for i in range(40):
+            entries.append({
+                'dt': start + i * 10800,
+                'main': {'temp': 12 + 6 * math.sin(i / 4), 'humidity': 70},
+                'weather': [{'description': self.descriptions[(i // 3) % len(self.descriptions)]}],
+            })
+        city = query.get('q', ['Stub City'])[0]
+        return 'forecast', 200, {'cod': '200', 'cnt': len(entries), 'list': entries, 'city': {'name': city}}
+
+
+class GeminiStub(StubServer):
+    """Emulates the Gemini ``models/<model>:generateContent`` endpoint.
+
+    The response text is chosen from the prompt so each agent receives the JSON
+    shape it expects (a list for activities/packing, an object for food & culture).
+    """
+
+    name = 'gemini'
+
+    def handle(self, method, path, query, body):
+        if method != 'POST' or not path.endswith(':generateContent'):
+            return 'unknown', 404, {'error': {'code': 404, 'message': 'not found'}}
+        try:
+            request = json.loads(body or b'{}')
+        except ValueError:
+            request = {}
+        prompt = ' '.join(
+            part.get('text', '')
+            for content in request.get('contents', [])
+            for part in content.get('parts', [])
+        )
+        if 'cultural guide' in prompt:
+            endpoint = 'food_culture'
+            text = json.dumps({
+                'cuisine_summary': 'Stub cuisine summary: bakeries, bistros and seasonal markets.',
+                'cultural_note': 'Stub cultural note: greet shopkeepers when entering.',
+            })
+        elif 'packing list' in prompt:
+            endpoint = 'packing'
+            text = json.dumps(['Passport', 'Phone charger', 'Umbrella', 'Light jacket', 'Walking shoes'])
+        else:
+            endpoint = 'activities'
+            text = json.dumps([f'Stub activity {i + 1}' for i in range(12)])
+        return endpoint, 200, {
+            'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]}, 'finishReason': 'STOP'}],
+            'usageMetadata': {'promptTokenCount': len(prompt.split()), 'candidatesTokenCount': len(text.split())},
+        }
@@ -0,0 +1,48 @@
+"""Replays a full orchestration from ``cassettes/default.cassette`` (no network, no credentials).
+
+Re-record the cassette with ``python -m benchmarks.bench_providers --record-from-stubs``.
+"""
+import pytest
+
+from benchmarks.load_test import DEFAULT_PREFERENCES
+
+
+@pytest.fixture(autouse=True)
+def cold_amadeus_caches():
+    # Token and IATA lookups must come from the cassette too, not from an earlier test
+    from planner.agents import amadeus_auth
+
+    amadeus_auth.clear_caches()
+    yield
+    amadeus_auth.clear_caches()
+
+
+@pytest.mark.cassette('default')
+def test_cassette_covers_every_provider(provider_cassette):
+    providers = {label.split()[0] for label in provider_cassette.labels()}
+    assert providers == {'amadeus', 'openweather', 'gemini'}
+
+
+@pytest.mark.cassette('default')
+def test_orchestration_replays_offline(provider_cassette):
+    from planner.agents.orchestrator import orchestrate_itinerary
+
+    result = orchestrate_itinerary({'preferences': dict(DEFAULT_PREFERENCES)})
+
+    assert result['ok']
+    assert provider_cassette.misses == 0
+    assert provider_cassette.hits == len(provider_cassette)
+    itinerary = result['itinerary']
+    assert itinerary['meta']['destination'] == DEFAULT_PREFERENCES['destination']
+    for section in ('flights', 'hotels', 'activities', 'packing_list'):
+        assert itinerary[section], section
+    assert itinerary['weather']['forecast']
+
+
+@pytest.mark.cassette('default')
+def test_replay_is_deterministic(provider_cassette):
+    from planner.agents.orchestrator import orchestrate_itinerary
+
+    first = orchestrate_itinerary({'preferences': dict(DEFAULT_PREFERENCES)})['itinerary']
+    second = orchestrate_itinerary({'preferences': dict(DEFAULT_PREFERENCES)})['itinerary']
+    assert first == second
@@ -0,0 +1,233 @@
+"""
+Admission control for itinerary generation.
+
+Generation requests take seconds and lean on rate-limited upstreams, so during
+a spike letting every request in degrades latency for everyone at once. The
+``AdmissionController`` admits at most ``PLANNER_ADMISSION_MAX_INFLIGHT``
+generations per process and queues the rest by priority:
+
+    PRIORITY       members of ``PLANNER_ADMISSION_PRIORITY_GROUP`` (paying users)
+    AUTHENTICATED  signed-in users generating a trip
+    REGENERATE     signed-in users rerunning agents for a changed trip
+    ANONYMOUS      everything without a user
+
+Within a priority the queue is FIFO. Load is shed from the bottom up: for
+each class the controller tracks the queue wait a new request would see (an
+EWMA of the waits of admitted requests of that class or better, and the age of
+the oldest such waiter) against ``PLANNER_ADMISSION_QUEUE_SLO_MS``. Once that
+pressure reaches the class's threshold in ``SHED_AT``, new requests of the
+class are rejected immediately instead of queueing behind work that will miss
+its SLO anyway. A full queue evicts its lowest-priority, newest entry for a
+better incoming request, and nobody waits longer than
+``PLANNER_ADMISSION_MAX_WAIT_SECONDS``. Rejections are 503s with ``Retry-After``.
+
+Queue-time percentiles and per-class admitted/shed counters are exposed through
+``stats()`` (served at ``GET /api/planner/generate/status/``). The controller
+is per process and sits in front of the cross-worker limits in
+``planner/throttling.py``. ``PLANNER_ADMISSION_MAX_INFLIGHT = 0`` turns it off.
+"""
+import bisect
+import itertools
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .conf import get_setting
+
+PRIORITY, AUTHENTICATED, REGENERATE, ANONYMOUS = range(4)
+PRIORITY_NAMES = {PRIORITY: 'priority', AUTHENTICATED: 'authenticated', REGENERATE: 'regenerate', ANONYMOUS: 'anonymous'}
+
+# Queue pressure (wait / SLO) at which new requests of each class are shed; None = never
+SHED_AT = {PRIORITY: None, AUTHENTICATED: 1.0, REGENERATE: 0.75, ANONYMOUS: 0.5}
+
+EWMA_ALPHA = 0.2
+WAIT_SAMPLES = 1000
+
+
+class Overloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Planner is busy, please retry shortly.'
+    default_code = 'overloaded'
+
+    def __init__(self, reason, wait):
+        super().__init__()
+        self.reason = reason
+        # DRF's exception handler turns this into a Retry-After header
+        self.wait = wait
+
+
+def priority_for(request, regenerate=False):
+    user = getattr(request, 'user', None)
+    if not user or not user.is_authenticated:
+        return ANONYMOUS
+    if regenerate:
+        return REGENERATE
+    group = get_setting('PLANNER_ADMISSION_PRIORITY_GROUP', 'priority')
+    if group and user.groups.filter(name=group).exists():
+        return PRIORITY
+    return AUTHENTICATED
+
+
+class _Waiter:
+    __slots__ = ('priority', 'seq', 'enqueued', 'event', 'outcome')
+
+    def __init__(self, priority, seq):
+        self.priority = priority
+        self.seq = seq
+        self.enqueued = time.monotonic()
+        self.event = threading.Event()
+        self.outcome = None  # 'admitted' or a shed reason
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class AdmissionController:
+
+    def __init__(self, max_inflight=None, max_queue=None, slo_ms=None, max_wait=None):
+        self._overrides = {'max_inflight': max_inflight, 'max_queue': max_queue, 'slo_ms': slo_ms, 'max_wait': max_wait}
+        self._lock = threading.Lock()
+        self._queue = []  # _Waiters sorted by (priority, seq)
+        self._seq = itertools.count()
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.ewma_wait = dict.fromkeys(PRIORITY_NAMES, 0.0)
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.admitted = Counter()
+        self.shed = Counter()
+
+    def _setting(self, name, setting, default):
+        value = self._overrides[name]
+        return get_setting(setting, default) if value is None else value
+
+    @property
+    def max_inflight(self):
+        return self._setting('max_inflight', 'PLANNER_ADMISSION_MAX_INFLIGHT', 8)
+
+    @property
+    def max_queue(self):
+        return self._setting('max_queue', 'PLANNER_ADMISSION_MAX_QUEUE', 32)
+
+    @property
+    def slo(self):
+        return self._setting('slo_ms', 'PLANNER_ADMISSION_QUEUE_SLO_MS', 2000) / 1000.0
+
+    @property
+    def max_wait(self):
+        return self._setting('max_wait', 'PLANNER_ADMISSION_MAX_WAIT_SECONDS', 10)
+
+    def pressure(self, priority=ANONYMOUS):
+        """Queue wait a request of ``priority`` can expect, relative to the SLO; call with the lock held."""
+        if self.slo <= 0:
+            return 0.0
+        # Lower-priority waiters never delay this request, so only its class and better count
+        ahead = [w.enqueued for w in self._queue if w.priority <= priority]
+        oldest = time.monotonic() - min(ahead) if ahead else 0.0
+        ewma = max(wait for p, wait in self.ewma_wait.items() if p <= priority)
+        return max(ewma, oldest) / self.slo
+
+    def _record_admission(self, priority, waited):
+        self.inflight += 1
+        self.peak_inflight = max(self.peak_inflight, self.inflight)
+        self.ewma_wait[priority] += EWMA_ALPHA * (waited - self.ewma_wait[priority])
+        self._waits.append(waited)
+        self.admitted[PRIORITY_NAMES[priority]] += 1
+
+    def _reject(self, priority, reason):
+        self.shed[f'{PRIORITY_NAMES[priority]}:{reason}'] += 1
+        return Overloaded(reason, wait=max(1, round(self.slo)))
+
+    def acquire(self, priority):
+        """Blocks until admitted; raises ``Overloaded`` when the request is shed."""
+        with self._lock:
+            limit = self.max_inflight
+            if self.inflight < limit and not any(w.priority <= priority for w in self._queue):
+                self._record_admission(priority, 0.0)
+                return
+            threshold = SHED_AT[priority]
+            if threshold is not None and self.pressure(priority) >= threshold:
+                raise self._reject(priority, 'pressure')
+            waiter = _Waiter(priority, next(self._seq))
+            if len(self._queue) >= self.max_queue:
+                worst = self._queue[-1]
+                if worst.priority <= priority:
+                    raise self._reject(priority, 'queue_full')
+                # Make room by shedding the newest of the lowest-priority waiters
+                self._queue.pop()
+                worst.outcome = 'evicted'
+                self.shed[f'{PRIORITY_NAMES[worst.priority]}:evicted'] += 1
+                worst.event.set()
+            bisect.insort(self._queue, waiter)
+
+        waiter.event.wait(self.max_wait)
+        with self._lock:
+            if waiter.outcome is None:
+                self._queue.remove(waiter)
+                raise self._reject(priority, 'timeout')
+        if waiter.outcome != 'admitted':
+            raise Overloaded(waiter.outcome, wait=max(1, round(self.slo)))
+
+    def release(self):
+        with self._lock:
+            self.inflight -= 1
+            now = time.monotonic()
+            while self._queue and self.inflight < self.max_inflight:
+                waiter = self._queue.pop(0)
+                waiter.outcome = 'admitted'
+                self._record_admission(waiter.priority, now - waiter.enqueued)
+                waiter.event.set()
+
+    @contextmanager
+    def admit(self, priority):
+        if self.max_inflight <= 0:
+            yield
+            return
+        self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            queued = Counter(PRIORITY_NAMES[w.priority] for w in self._queue)
+            pressure = {PRIORITY_NAMES[p]: round(self.pressure(p), 3) for p in PRIORITY_NAMES}
+            ewma = {PRIORITY_NAMES[p]: round(wait * 1000, 1) for p, wait in self.ewma_wait.items()}
+
+        def pct(p):
+            return round(waits[min(int(p / 100.0 * len(waits)), len(waits) - 1)] * 1000, 1) if waits else None
+
+        return {
+            'inflight': self.inflight,
+            'max_inflight': self.max_inflight,
+            'peak_inflight': self.peak_inflight,
+            'queued': dict(queued),
+            'pressure': pressure,
+            'queue_wait_ms': {'ewma': ewma, 'p50': pct(50), 'p95': pct(95),
+                              'p99': pct(99), 'max': round(waits[-1] * 1000, 1) if waits else None},
+            'admitted': dict(self.admitted),
+            'shed': dict(self.shed),
+        }
+
+
+_controller = None
+_controller_lock = threading.Lock()
+
+
+def get_controller():
+    global _controller
+    if _controller is None:
+        with _controller_lock:
+            if _controller is None:
+                _controller = AdmissionController()
+    return _controller
+
+
+def admit(request, regenerate=False):
+    """Context manager used by the generation views."""
+    return get_controller().admit(priority_for(request, regenerate=regenerate))
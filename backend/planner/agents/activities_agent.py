@@ -1,24 +1,8 @@
-import os
 import json
 import logging
 from typing import Dict, Any, List
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-try:
-    from google import genai
-    from google.genai.errors import APIError
-    client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-    logging.warning("Google GenAI SDK not installed. Activities agent will use a fallback mock.")
-except Exception:
-    GEMINI_AVAILABLE = False
-    logging.warning("GEMINI_API_KEY not set or invalid. Activities agent will use a fallback mock.")
 
+from . import gemini, providers
 
 logger = logging.getLogger(__name__)
 
@@ -30,7 +14,8 @@ def recommend_activities(state: Dict[str, Any]) -> Dict[str, List[str]]:
     days = state.get('preferences', {}).get('Days', 3)
     
     # 1. Fallback if Gemini is unavailable
-    if not GEMINI_AVAILABLE:
+    client = gemini.get_client()
+    if not (client or providers.replaying()):
         logger.warning("Using mock activities recommendation.")
         return _mock_activities_recommendation(destination, days)
 
@@ -46,7 +31,8 @@ def recommend_activities(state: Dict[str, Any]) -> Dict[str, List[str]]:
 
     # 3. Call Gemini API
     try:
-        response = client.models.generate_content(
+        response = providers.gemini_generate(
+            client,
             model='gemini-2.5-flash',
             contents=[system_prompt, user_prompt],
             config={"response_mime_type": "application/json"}
@@ -61,7 +47,7 @@ def recommend_activities(state: Dict[str, Any]) -> Dict[str, List[str]]:
         # The agent should return the list wrapped in the key expected by the LangGraph state
         return {'activities': activity_list}
 
-    except APIError as e:
+    except gemini.api_errors() as e:
         logger.error(f"Gemini Activities API Error: {e}")
         return _mock_activities_recommendation(destination, days)
     except Exception as e:
@@ -0,0 +1,180 @@
+"""
+Process-wide caches for the Amadeus OAuth token and city IATA codes.
+
+The flight and hotel agents both need a bearer token and the IATA code of every
+city they search. Tokens are reused until shortly before ``expires_in`` runs
+out and city codes never change, so both are cached here and shared by every
+agent and thread. Concurrent misses for the same key wait for a single lookup
+instead of each calling Amadeus (a multi-city trip resolves its cities once).
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import requests
+
+from . import providers
+
+logger = logging.getLogger(__name__)
+
+# Refresh tokens this many seconds before Amadeus says they expire
+TOKEN_EXPIRY_MARGIN = 60
+# Amadeus issues 30 minute tokens; used if a response omits expires_in
+DEFAULT_TOKEN_LIFETIME = 1799
+IATA_CACHE_SIZE = 2048
+
+_tokens = {}  # (base_url, client_id) -> (token, expires_at monotonic)
+_token_lock = threading.Lock()
+
+_iata_codes = {}  # (base_url, keyword) -> IATA code; written under _iata_guard
+_iata_locks = {}  # key -> [lock, users]; only for lookups in flight
+_iata_guard = threading.Lock()
+
+
+def get_token(base_url: str, client_id: str, client_secret: str) -> Optional[str]:
+    """Returns a cached bearer token, fetching a new one when missing or about to expire."""
+    key = (base_url, client_id)
+    cached = _tokens.get(key)
+    if cached and cached[1] > time.monotonic():
+        return cached[0]
+
+    # One refresh at a time; threads that waited reuse the fresh token
+    with _token_lock:
+        cached = _tokens.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[0]
+
+        response = providers.http_post(
+            'amadeus', f"{base_url}/v1/security/oauth2/token",
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            data={"grant_type": "client_credentials", "client_id": client_id, "client_secret": client_secret},
+        )
+        response.raise_for_status()
+        payload = response.json()
+        token = payload.get("access_token")
+        if token:
+            try:
+                lifetime = int(payload.get("expires_in") or DEFAULT_TOKEN_LIFETIME)
+            except (TypeError, ValueError):
+                lifetime = DEFAULT_TOKEN_LIFETIME
+            _tokens[key] = (token, time.monotonic() + max(lifetime - TOKEN_EXPIRY_MARGIN, 0))
+            logger.info("Obtained Amadeus access token (valid for %ss)", lifetime)
+        return token
+
+
+def invalidate_token(base_url: str, client_id: str, token: Optional[str] = None):
+    """Drops a cached token, e.g. after Amadeus rejected it with 401.
+
+    With ``token``, only that token is dropped, so a rejection seen by one thread
+    does not throw away a fresh token another thread already fetched.
+    """
+    with _token_lock:
+        cached = _tokens.get((base_url, client_id))
+        if cached and (token is None or cached[0] == token):
+            del _tokens[(base_url, client_id)]
+
+
+def is_unauthorized(exc) -> bool:
+    """True when a ``requests`` error carries a 401 response (revoked or rotated token)."""
+    response = getattr(exc, 'response', None)
+    return response is not None and response.status_code == 401
+
+
+def with_token_retry(base_url: str, client_id: str, client_secret: str, call):
+    """
+    Runs ``call(token)`` with the cached token. When Amadeus answers 401 the token
+    is dropped and the call retried once with a freshly issued one; ``call`` must
+    let 401 errors propagate. Token request errors propagate to the caller.
+    """
+    token = get_token(base_url, client_id, client_secret)
+    try:
+        return call(token)
+    except requests.exceptions.RequestException as e:
+        if not token or not is_unauthorized(e):
+            raise
+        logger.warning("Amadeus rejected the cached access token, fetching a new one")
+        invalidate_token(base_url, client_id, token)
+    return call(get_token(base_url, client_id, client_secret))
+
+
+@contextmanager
+def _lock_for(key):
+    # One lock per lookup in flight; removed again once nobody waits on it, so
+    # arbitrary user-supplied city names do not accumulate locks
+    with _iata_guard:
+        entry = _iata_locks.get(key)
+        if entry is None:
+            entry = _iata_locks[key] = [threading.Lock(), 0]
+        entry[1] += 1
+    try:
+        with entry[0]:
+            yield
+    finally:
+        with _iata_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                _iata_locks.pop(key, None)
+
+
+def get_city_iata(base_url: str, city_name: str, access_token: str) -> Optional[str]:
+    """
+    Returns the IATA city code for ``city_name`` using the Amadeus Cities API.
+
+    Only the part before the first comma is searched ("Paris, France" -> "Paris").
+    Successful lookups are cached; request errors propagate to the caller.
+    """
+    keyword = (city_name or '').split(',')[0].strip()
+    if not keyword:
+        return None
+    key = (base_url, keyword.casefold())
+    # get() rather than a membership test: another thread may evict the key in between
+    cached = _iata_codes.get(key)
+    if cached:
+        return cached
+
+    with _lock_for(key):
+        cached = _iata_codes.get(key)
+        if cached:
+            return cached
+
+        response = providers.http_get(
+            'amadeus', f"{base_url}/v1/reference-data/locations/cities",
+            headers={"Authorization": f"Bearer {access_token}"},
+            params={"keyword": keyword, "max": 10},  # Top 10 results, the first is the best match
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not data.get("data"):
+            logger.warning(f"No city found for '{city_name}'")
+            return None
+
+        city = data["data"][0]
+        iata_code = city.get("iataCode")
+        if not iata_code:
+            logger.warning(f"City '{city_name}' found but has no IATA code: {city.get('name', '')}, "
+                           f"{city.get('address', {}).get('countryCode', '')}")
+            return None
+
+        logger.info(f"Found IATA code for '{city_name}': {iata_code} - {city.get('name', '')}, "
+                    f"{city.get('address', {}).get('countryCode', '')}")
+        # Lookups of other cities insert concurrently, so evict and insert under the shared guard
+        with _iata_guard:
+            while len(_iata_codes) >= IATA_CACHE_SIZE:
+                _iata_codes.pop(next(iter(_iata_codes)), None)
+            _iata_codes[key] = iata_code
+        return iata_code
+
+
+def clear_caches():
+    """Forgets all cached tokens and IATA codes."""
+    with _token_lock:
+        _tokens.clear()
+    with _iata_guard:
+        _iata_codes.clear()
+        _iata_locks.clear()
+
+
+def cache_stats() -> dict:
+    return {'tokens': len(_tokens), 'iata_codes': len(_iata_codes), 'iata_locks': len(_iata_locks)}
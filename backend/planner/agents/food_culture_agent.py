@@ -1,23 +1,8 @@
-import os
 import json
 import logging
 from typing import Dict, Any, List
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Re-use the existing Gemini setup check from activities_agent or packing_agent
-try:
-    from google import genai
-    from google.genai.errors import APIError
-    client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-    GEMINI_AVAILABLE = True
-except ImportError:
-    GEMINI_AVAILABLE = False
-except Exception:
-    GEMINI_AVAILABLE = False
 
+from . import gemini, providers
 
 logger = logging.getLogger(__name__)
 
@@ -28,7 +13,8 @@ def recommend(state: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
     destination = state.get('preferences', {}).get('destination', 'A city')
     
     # 1. Fallback if Gemini is unavailable
-    if not GEMINI_AVAILABLE:
+    client = gemini.get_client()
+    if not (client or providers.replaying()):
         logger.warning("Using mock food/culture recommendation.")
         return _mock_food_culture_recommendation(destination)
 
@@ -43,7 +29,8 @@ def recommend(state: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
 
     # 3. Call Gemini API
     try:
-        response = client.models.generate_content(
+        response = providers.gemini_generate(
+            client,
             model='gemini-2.5-flash',
             contents=[system_prompt, user_prompt],
             config={"response_mime_type": "application/json"}
@@ -58,7 +45,7 @@ def recommend(state: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
         # The agent should return the dict wrapped in the key expected by the LangGraph state
         return {'food_culture': culture_dict}
 
-    except APIError as e:
+    except gemini.api_errors() as e:
         logger.error(f"Gemini Food/Culture API Error: {e}")
         return _mock_food_culture_recommendation(destination)
     except Exception as e:
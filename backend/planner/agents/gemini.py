@@ -0,0 +1,55 @@
+"""
+Shared Gemini client for the LLM-backed agents.
+
+Importing ``google.genai`` takes most of a second, so it is not done when the
+agents are imported (that happens on every worker boot, via the URLconf) but on
+the first agent call that needs the model. ``get_client()`` then builds a single
+client from ``GEMINI_API_KEY`` / ``GEMINI_BASE_URL`` that the activities,
+packing and food & culture agents share. It returns None when the SDK is not
+installed or the key is not configured, and the agents use their fallbacks.
+"""
+import logging
+import threading
+
+from ..conf import get_provider_setting
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_client = None
+_loaded = False
+
+
+def _create_client():
+    try:
+        from google import genai
+    except ImportError:
+        logger.warning("Google GenAI SDK not installed. Gemini agents will use a fallback mock.")
+        return None
+    # GEMINI_BASE_URL lets benchmarks point the SDK at a local stub server
+    base_url = get_provider_setting('GEMINI_BASE_URL')
+    try:
+        return genai.Client(api_key=get_provider_setting('GEMINI_API_KEY'),
+                            http_options={'base_url': base_url} if base_url else None)
+    except Exception:
+        logger.warning("GEMINI_API_KEY not set or invalid. Gemini agents will use a fallback mock.")
+        return None
+
+
+def get_client():
+    """Returns the shared client, creating it on first use; None when Gemini is unavailable."""
+    global _client, _loaded
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                _client = _create_client()
+                _loaded = True
+    return _client
+
+
+def api_errors():
+    """Exception classes the SDK raises for API failures, for ``except`` clauses (empty without the SDK)."""
+    if _client is None:
+        return ()
+    from google.genai.errors import APIError
+    return (APIError,)
@@ -1,43 +1,20 @@
-import os
 import logging
 import requests
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+from . import amadeus_auth, providers
+from .. import processing
+from ..conf import get_provider_setting
 
 logger = logging.getLogger(__name__)
 
 # Amadeus API credentials
-AMADEUS_CLIENT_ID = os.getenv('AMADEUS_CLIENT_ID')
-AMADEUS_CLIENT_SECRET = os.getenv('AMADEUS_CLIENT_SECRET')
+AMADEUS_CLIENT_ID = get_provider_setting('AMADEUS_CLIENT_ID')
+AMADEUS_CLIENT_SECRET = get_provider_setting('AMADEUS_CLIENT_SECRET')
 AMADEUS_AVAILABLE = bool(AMADEUS_CLIENT_ID and AMADEUS_CLIENT_SECRET)
-
-
-def _get_amadeus_token() -> Optional[str]:
-    """Gets an OAuth2 token from Amadeus."""
-    if not AMADEUS_AVAILABLE:
-        return None
-    
-    url = "https://test.api.amadeus.com/v1/security/oauth2/token"
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    data = {
-        "grant_type": "client_credentials",
-        "client_id": AMADEUS_CLIENT_ID,
-        "client_secret": AMADEUS_CLIENT_SECRET
-    }
-    
-    try:
-        response = requests.post(url, headers=headers, data=data)
-        response.raise_for_status()
-        token = response.json().get("access_token")
-        logger.info("Successfully obtained Amadeus access token")
-        return token
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Error getting Amadeus token: {e}")
-        return None
+# Override to point the agent at a local stub (see backend/benchmarks)
+AMADEUS_BASE_URL = get_provider_setting('AMADEUS_BASE_URL', 'https://test.api.amadeus.com').rstrip('/')
 
 
 def _get_city_iata_code(city_name: str, access_token: str) -> Optional[str]:
@@ -48,39 +25,11 @@ def _get_city_iata_code(city_name: str, access_token: str) -> Optional[str]:
     if not city_name:
         return None
     
-    # Extract just the city name if it contains comma (e.g., "Amsterdam, Netherlands" -> "Amsterdam")
-    keyword = city_name.split(',')[0].strip()
-    
-    url = "https://test.api.amadeus.com/v1/reference-data/locations/cities"
-    headers = {"Authorization": f"Bearer {access_token}"}
-    params = {
-        "keyword": keyword,  # Use just city name without country
-        "max": 10  # Get top 10 results to find best match
-    }
-    
     try:
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
-        data = response.json()
-        
-        if data.get("data") and len(data["data"]) > 0:
-            # Get the first result (most relevant match)
-            city = data["data"][0]
-            iata_code = city.get("iataCode", "")
-            name = city.get("name", "")
-            country = city.get("address", {}).get("countryCode", "")
-            
-            if iata_code:
-                logger.info(f"Found IATA code for '{city_name}': {iata_code} - {name}, {country}")
-                return iata_code
-            else:
-                logger.warning(f"City '{city_name}' found but has no IATA code: {name}, {country}")
-                return None
-        else:
-            logger.warning(f"No city found for '{city_name}'")
-            return None
-        
+        return amadeus_auth.get_city_iata(AMADEUS_BASE_URL, city_name, access_token)
     except requests.exceptions.RequestException as e:
+        if amadeus_auth.is_unauthorized(e):
+            raise  # search_hotels replaces the token and retries
         logger.error(f"Error getting IATA code for '{city_name}': {e}")
         if hasattr(e, 'response') and hasattr(e.response, 'text'):
             logger.error(f"Response: {e.response.text}")
@@ -92,7 +41,7 @@ def search_hotels(state: Dict[str, Any]) -> Dict[str, List[Dict]]:
     Searches for hotels by city using the Amadeus Hotels by City API.
     Returns hotels within 2 km radius of the destination city center.
     """
-    if not AMADEUS_AVAILABLE:
+    if not (AMADEUS_AVAILABLE or providers.replaying()):
         logger.warning("Amadeus credentials not available - using mock hotel data")
         return _mock_hotel_search(state)
 
@@ -103,8 +52,19 @@ def search_hotels(state: Dict[str, Any]) -> Dict[str, List[Dict]]:
         logger.warning("Missing destination for hotel search.")
         return {'hotels': []}
 
-    # Get access token
-    access_token = _get_amadeus_token()
+    # Cached token, shared with the flight agent; replaced once if Amadeus rejects it (revoked or rotated)
+    try:
+        return amadeus_auth.with_token_retry(AMADEUS_BASE_URL, AMADEUS_CLIENT_ID, AMADEUS_CLIENT_SECRET,
+                                             lambda access_token: _search_hotels(state, access_token))
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Amadeus token request failed or was rejected twice: {e}")
+        return _mock_hotel_search(state)
+
+
+def _search_hotels(state: Dict[str, Any], access_token: Optional[str]) -> Dict[str, List[Dict]]:
+    """Hotel search with one access token; lets 401 errors propagate so the caller can retry."""
+    destination_city = state.get('preferences', {}).get('destination')
+
     if not access_token:
         logger.warning("Failed to get Amadeus access token - using mock data")
         return _mock_hotel_search(state)
@@ -116,7 +76,7 @@ def search_hotels(state: Dict[str, Any]) -> Dict[str, List[Dict]]:
         return _mock_hotel_search(state)
 
     # Search hotels by city with 2 km radius
-    url = "https://test.api.amadeus.com/v1/reference-data/locations/hotels/by-city"
+    url = f"{AMADEUS_BASE_URL}/v1/reference-data/locations/hotels/by-city"
     headers = {"Authorization": f"Bearer {access_token}"}
     params = {
         "cityCode": city_code,
@@ -126,33 +86,19 @@ def search_hotels(state: Dict[str, Any]) -> Dict[str, List[Dict]]:
     }
     
     try:
-        response = requests.get(url, headers=headers, params=params)
+        response = providers.http_get('amadeus', url, headers=headers, params=params)
         response.raise_for_status()
-        data = response.json()
-        
-        hotel_options = []
-        for hotel in data.get("data", [])[:10]:  # Limit to first 10 hotels
-            hotel_options.append({
-                'id': hotel.get('hotelId', 'N/A'),
-                'name': hotel.get('name', 'Unknown Hotel'),
-                'chain_code': hotel.get('chainCode', 'N/A'),
-                'distance': f"{hotel.get('distance', {}).get('value', 'N/A')} {hotel.get('distance', {}).get('unit', 'KM')}",
-                'address': {
-                    'city': hotel.get('address', {}).get('cityName', 'N/A'),
-                    'country': hotel.get('address', {}).get('countryCode', 'N/A'),
-                    'postal_code': hotel.get('address', {}).get('postalCode', 'N/A'),
-                    'lines': hotel.get('address', {}).get('lines', [])
-                },
-                'geo_code': {
-                    'latitude': hotel.get('geoCode', {}).get('latitude', 0),
-                    'longitude': hotel.get('geoCode', {}).get('longitude', 0)
-                }
-            })
+        # Limit to first 10 hotels
+        hotel_options = processing.run_cpu(
+            processing.parse_hotels, response.content, 10, payload_size=len(response.content)
+        )
         
         logger.info(f"Found {len(hotel_options)} hotels within 2km of {destination_city} ({city_code})")
         return {'hotels': hotel_options}
         
     except requests.exceptions.RequestException as e:
+        if amadeus_auth.is_unauthorized(e):
+            raise
         logger.error(f"Amadeus Hotels by City API Error: {e}")
         if hasattr(e.response, 'text'):
             logger.error(f"Response: {e.response.text}")
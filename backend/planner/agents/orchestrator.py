@@ -1,4 +1,7 @@
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import FIRST_COMPLETED, wait
+from datetime import date, timedelta
+from functools import lru_cache
+import importlib
 from pathlib import Path
 import logging
 from typing import TypedDict, Optional, Dict, Any, List, Annotated
@@ -14,27 +17,28 @@ from . import (
     co2_agent,
     food_culture_agent,
 )
+from ..conf import get_setting
+from ..executor import get_executor
+from .. import processing
 
 logger = logging.getLogger(__name__)
 
 # ------------------------------------------------------------------------------
 # LangGraph Imports and State Definition
 # ------------------------------------------------------------------------------
-try:
-    from langgraph.graph import StateGraph, END, START
-    # Import the run function from the node wrappers
-    from planner.langgraph_nodes.flight_node import run as run_flights
-    from planner.langgraph_nodes.hotel_node import run as run_hotels
-    from planner.langgraph_nodes.weather_node import run as run_weather
-    from planner.langgraph_nodes.activities_node import run as run_activities
-    from planner.langgraph_nodes.packing_node import run as run_packing
-    from planner.langgraph_nodes.co2_node import run as run_co2
-    from planner.langgraph_nodes.food_culture_node import run as run_food_culture
-    LANGGRAPH_AVAILABLE = True
-except ImportError:
-    # If imports fail, the top-level function will automatically fall back
-    LANGGRAPH_AVAILABLE = False
-    logger.warning("LangGraph components not fully available. Orchestration will rely on ThreadPoolExecutor fallback.")
+@lru_cache(maxsize=None)
+def langgraph_available() -> bool:
+    """
+    Imports LangGraph on first use rather than at worker boot (it takes most of a
+    second); False when it is not installed and orchestration falls back to the
+    shared executor.
+    """
+    try:
+        importlib.import_module('langgraph.graph')
+    except ImportError:
+        logger.warning("LangGraph components not fully available. Orchestration will rely on the shared executor fallback.")
+        return False
+    return True
 
 
 # Define the State (MUST be consistent with what nodes read/write)
@@ -60,46 +64,52 @@ class ItineraryState(TypedDict):
 # Fallback Orchestrator (Original Logic - KEPT)
 # ------------------------------------------------------------------------------
 def _local_orchestrate(request_state):
-    """Fallback orchestrator that runs agents in parallel using ThreadPoolExecutor."""
+    """Fallback orchestrator that runs agents in parallel on the shared planner executor."""
     prefs = request_state.get('preferences', {})
     state = {'preferences': prefs}
 
-    with ThreadPoolExecutor() as ex:
-        futures = {
-            'flights': ex.submit(flight_recommender.search_flights, state),
-            'hotels': ex.submit(hotel_recommender.search_hotels, state),
-            'weather': ex.submit(weather_agent.get_forecast, state),
-            'activities': ex.submit(activities_agent.recommend_activities, state),
-            'packing': ex.submit(packing_agent.generate_packing_list, state),
-            'co2': ex.submit(co2_agent.estimate_co2, state),
-            'food_culture': ex.submit(food_culture_agent.recommend, state),
-        }
-        results = {k: f.result() for k, f in futures.items()}
+    # One group per request so the executor can interleave concurrent generations fairly
+    results = get_executor().map_group({
+        'flights': (flight_recommender.search_flights, state),
+        'hotels': (hotel_recommender.search_hotels, state),
+        'weather': (weather_agent.get_forecast, state),
+        'activities': (activities_agent.recommend_activities, state),
+        'packing': (packing_agent.generate_packing_list, state),
+        'co2': (co2_agent.estimate_co2, state),
+        'food_culture': (food_culture_agent.recommend, state),
+    })
+
+    # Each agent returns a dict keyed by its state field; flatten them like the graph state
+    outputs = {}
+    for result in results.values():
+        outputs.update(result or {})
+    return {'ok': True, 'itinerary': consolidate_itinerary(prefs, outputs)}
+
 
+def consolidate_itinerary(preferences: dict, outputs: dict) -> dict:
+    """
+    Builds the final itinerary dict from agent outputs keyed like ItineraryState
+    (flights, hotels, weather_forecast, ...). Shared by both orchestrators so the
+    Django view always receives the same structure.
+    """
     itinerary = {
-        'meta': {'budget': prefs.get('budget'), 'destination': prefs.get('destination'), 'days': prefs.get('Days')},
+        'meta': {'budget': preferences.get('budget'), 'destination': preferences.get('destination'), 'days': preferences.get('Days')},
         # NOTE: Keys here must match the final structure expected by the frontend
-        'flights': results['flights'].get('flights', []),
-        'hotels': results['hotels'].get('hotels', []),
-        'weather': {'forecast': results['weather'].get('weather_forecast', [])},
-        'activities': results['activities'].get('activities', []),
-        'packing_list': results['packing'].get('packing_list', []),
-        'co2_kg': results['co2'].get('co2_kg', 0),
-        'food_culture': results['food_culture'].get('food_culture', {}),
+        'flights': outputs.get('flights') or [],
+        'hotels': outputs.get('hotels') or [],
+        'weather': {'forecast': outputs.get('weather_forecast') or []},
+        'activities': outputs.get('activities') or [],
+        'packing_list': outputs.get('packing_list') or [],
+        'co2_kg': outputs.get('co2_kg') or 0,  # Default to 0, not {}
+        'food_culture': outputs.get('food_culture') or {},
     }
 
-    days = int(prefs.get('Days', 3))
-    acts = itinerary['activities'] or []
-    day_plan = []
-    # Day Plan logic remains the same
-    for d in range(days):
-        day_plan.append({
-            'day': d + 1,
-            'activities': acts[d::days][:3] or ['Explore the local area'],
-        })
+    days = int(preferences.get('Days', 3))
+    acts = itinerary['activities']
+    day_plan = processing.run_cpu(processing.build_day_plan, acts, days, payload_size=len(acts))
     itinerary['day_plan'] = day_plan
 
-    return {'ok': True, 'itinerary': itinerary}
+    return itinerary
 
 
 # ------------------------------------------------------------------------------
@@ -115,57 +125,120 @@ def consolidate_results(state: ItineraryState):
     return state
 
 
+# Agent nodes in the planner graph, the preference fields each one reads and the
+# nodes whose output it consumes. Used to build the graph and to work out which
+# nodes must rerun when only some preferences change.
+NODE_INPUTS = {
+    'flights': ('origin', 'destination', 'Days', 'departure_date', 'one_way'),
+    'hotels': ('destination',),
+    'weather': ('destination',),
+    'activities': ('destination', 'Days'),
+    'co2': ('destination',),
+    'food_culture': ('destination',),
+    'packing': ('destination',),
+}
+NODE_DEPENDENCIES = {
+    'packing': ('weather',),
+}
+# State key each node writes (see ItineraryState)
+NODE_OUTPUTS = {
+    'flights': 'flights',
+    'hotels': 'hotels',
+    'weather': 'weather_forecast',
+    'activities': 'activities',
+    'co2': 'co2_kg',
+    'food_culture': 'food_culture',
+    'packing': 'packing_list',
+}
+ALL_NODES = tuple(NODE_INPUTS)
+# Plain agent function behind each node (used when running without LangGraph)
+AGENT_FUNCTIONS = {
+    'flights': flight_recommender.search_flights,
+    'hotels': hotel_recommender.search_hotels,
+    'weather': weather_agent.get_forecast,
+    'activities': activities_agent.recommend_activities,
+    'co2': co2_agent.estimate_co2,
+    'food_culture': food_culture_agent.recommend,
+    'packing': packing_agent.generate_packing_list,
+}
+
+
 def build_full_planner_graph():
     """Defines and compiles the full LangGraph workflow."""
-    if not LANGGRAPH_AVAILABLE:
-        raise RuntimeError("LangGraph is not available to build the graph.")
-        
+    return build_planner_graph(ALL_NODES)
+
+
+@lru_cache(maxsize=None)
+def _compile_planner_graph(nodes: frozenset):
+    from langgraph.graph import StateGraph, END, START
+    # Import the run function from the node wrappers
+    from planner.langgraph_nodes.flight_node import run as run_flights
+    from planner.langgraph_nodes.hotel_node import run as run_hotels
+    from planner.langgraph_nodes.weather_node import run as run_weather
+    from planner.langgraph_nodes.activities_node import run as run_activities
+    from planner.langgraph_nodes.packing_node import run as run_packing
+    from planner.langgraph_nodes.co2_node import run as run_co2
+    from planner.langgraph_nodes.food_culture_node import run as run_food_culture
+
+    node_runners = {
+        'flights': run_flights,
+        'hotels': run_hotels,
+        'weather': run_weather,
+        'activities': run_activities,
+        'co2': run_co2,
+        'food_culture': run_food_culture,
+        'packing': run_packing,
+    }
     workflow = StateGraph(ItineraryState)
-    
+
     # 1. Define Agent Nodes
-    workflow.add_node("flights", run_flights)
-    workflow.add_node("hotels", run_hotels)
-    workflow.add_node("weather", run_weather)
-    workflow.add_node("activities", run_activities)
-    workflow.add_node("co2", run_co2)
-    workflow.add_node("food_culture", run_food_culture)
-    workflow.add_node("packing", run_packing)
+    for name in ALL_NODES:
+        if name in nodes:
+            workflow.add_node(name, node_runners[name])
     workflow.add_node("consolidator", consolidate_results) # Final Merge
 
     # 2. Define Edges (The flow)
+    for name in ALL_NODES:
+        if name not in nodes:
+            continue
+        upstream = [dep for dep in NODE_DEPENDENCIES.get(name, ()) if dep in nodes]
+        # 2a. Independent agents run in parallel from START; dependent ones
+        #     (packing after weather) wait for their upstream node. When the
+        #     upstream node is skipped its previous output is already in the state.
+        for dep in upstream:
+            workflow.add_edge(dep, name)
+        if not upstream:
+            workflow.add_edge(START, name)
+        # 2b. Merge All Paths: terminal nodes go to the 'consolidator'
+        if not any(name in NODE_DEPENDENCIES.get(other, ()) for other in nodes):
+            workflow.add_edge(name, "consolidator")
 
-    # 2a. Parallel Execution: All independent agents run from START
-    workflow.add_edge(START, "flights")
-    workflow.add_edge(START, "hotels")
-    workflow.add_edge(START, "weather")
-    workflow.add_edge(START, "activities")
-    workflow.add_edge(START, "co2")
-    workflow.add_edge(START, "food_culture")
-    
-    # 2b. Dependent Execution: Packing runs after Weather
-    workflow.add_edge("weather", "packing") 
-    
-    # 2c. Merge All Paths: All terminal nodes in a path go to the 'consolidator'
-    workflow.add_edge("flights", "consolidator")
-    workflow.add_edge("hotels", "consolidator")
-    workflow.add_edge("activities", "consolidator")
-    workflow.add_edge("co2", "consolidator")
-    workflow.add_edge("food_culture", "consolidator")
-    workflow.add_edge("packing", "consolidator") # The end of the dependent path
-    
-    # 2d. Final Edge
+    # 2c. Final Edge
     workflow.add_edge("consolidator", END)
 
     return workflow.compile()
 
 
+def build_planner_graph(nodes):
+    """
+    Compiles a planner graph containing only ``nodes`` (compiled graphs are cached
+    per node set, so repeated generations do not rebuild the graph).
+    """
+    if not langgraph_available():
+        raise RuntimeError("LangGraph is not available to build the graph.")
+    unknown = set(nodes) - set(ALL_NODES)
+    if unknown:
+        raise ValueError(f"Unknown planner nodes: {sorted(unknown)}")
+    return _compile_planner_graph(frozenset(nodes))
+
+
 def run_langgraph(preferences: dict):
     """Runs the full itinerary planning using the compiled LangGraph."""
     
-    if not LANGGRAPH_AVAILABLE:
+    if not langgraph_available():
         raise RuntimeError("LangGraph is not fully initialized.")
 
-    # 1. Build the graph (Build once per run for simplicity, but optimize for production)
+    # 1. Build the graph (compiled once and reused across runs)
     try:
         app = build_full_planner_graph()
     except Exception as e:
@@ -185,32 +258,7 @@ def run_langgraph(preferences: dict):
 
     # 4. Consolidate and Normalize Output to match the _local_orchestrate format
     # This ensures the Django view doesn't break
-    consolidated_itinerary = {
-        'meta': {'budget': preferences.get('budget'), 'destination': preferences.get('destination'), 'days': preferences.get('Days')},
-        # NOTE: Keys here must match the final structure expected by the frontend
-        # The .get('key', {}) is crucial because the agent output is merged onto the state.
-        'flights': final_state.get('flights', []), 
-        'hotels': final_state.get('hotels', []),
-        # Ensure 'weather' key matches what the local orchestrator expects
-        'weather': {'forecast': final_state.get('weather_forecast', [])}, 
-        'activities': final_state.get('activities', []),
-        'packing_list': final_state.get('packing_list', []),
-        'co2_kg': final_state.get('co2_kg', 0),  # Default to 0, not {}
-        'food_culture': final_state.get('food_culture', {}),
-    }
-
-    # Replicate the Day Plan logic from _local_orchestrate
-    days = int(preferences.get('Days', 3))
-    acts = consolidated_itinerary['activities'] or []
-    day_plan = []
-    for d in range(days):
-        day_plan.append({
-            'day': d + 1,
-            'activities': acts[d::days][:3] or ['Explore the local area'],
-        })
-    consolidated_itinerary['day_plan'] = day_plan
-
-    return {'ok': True, 'itinerary': consolidated_itinerary}
+    return {'ok': True, 'itinerary': consolidate_itinerary(preferences, final_state)}
 
 
 def orchestrate_itinerary(request_state):
@@ -218,10 +266,13 @@ def orchestrate_itinerary(request_state):
     High-level orchestrator entrypoint.
 
     Tries to execute the LangGraph-driven planner first. If LangGraph is not available
-    or execution fails, falls back to the original concurrent.futures-based orchestration.
+    or execution fails, falls back to the original executor-based orchestration.
     """
     prefs = request_state.get('preferences', {})
-    if LANGGRAPH_AVAILABLE:
+    if prefs.get('stops'):
+        # Multi-city trips fan out per leg and per stop (raises ValueError on bad stops)
+        return multi_city_orchestrate(prefs)
+    if langgraph_available():
         try:
             result = run_langgraph(prefs)
             # Check for standard output format from run_langgraph
@@ -233,5 +284,386 @@ def orchestrate_itinerary(request_state):
             logger.exception('LangGraph orchestration failed, falling back to local orchestrator')
             return _local_orchestrate(request_state)
     else:
-        # If imports failed at startup, skip the try/except block
-        return _local_orchestrate(request_state)
\ No newline at end of file
+        # LangGraph is not installed, skip the try/except block
+        return _local_orchestrate(request_state)
+
+# ------------------------------------------------------------------------------
+# Incremental Regeneration
+# ------------------------------------------------------------------------------
+
+def itinerary_to_state(itinerary: dict) -> dict:
+    """Maps a consolidated itinerary back onto ItineraryState keys (missing sections -> None)."""
+    itinerary = itinerary or {}
+    weather = itinerary.get('weather')
+    return {
+        'flights': itinerary.get('flights'),
+        'hotels': itinerary.get('hotels'),
+        'weather_forecast': weather.get('forecast') if isinstance(weather, dict) else None,
+        'activities': itinerary.get('activities'),
+        'packing_list': itinerary.get('packing_list'),
+        'co2_kg': itinerary.get('co2_kg'),
+        'food_culture': itinerary.get('food_culture'),
+    }
+
+
+def _normalise_pref(value):
+    if isinstance(value, str):
+        return value.strip().casefold()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def changed_preferences(previous: dict, current: dict) -> set:
+    """Preference keys whose values differ (case/whitespace-insensitive, '5' == 5)."""
+    keys = set(previous or {}) | set(current or {})
+    return {
+        key for key in keys
+        if _normalise_pref((previous or {}).get(key)) != _normalise_pref((current or {}).get(key))
+    }
+
+
+def plan_regeneration(previous_prefs: dict, new_prefs: dict, previous_state: dict) -> set:
+    """
+    Returns the set of graph nodes that must rerun: nodes reading a changed
+    preference, nodes with no previous output, and everything downstream of them.
+    """
+    changed = changed_preferences(previous_prefs, new_prefs)
+    nodes = {
+        name for name, inputs in NODE_INPUTS.items()
+        if changed.intersection(inputs) or previous_state.get(NODE_OUTPUTS[name]) is None
+    }
+    # Close over dependencies (packing consumes the weather forecast)
+    grew = True
+    while grew:
+        grew = False
+        for name, deps in NODE_DEPENDENCIES.items():
+            if name not in nodes and nodes.intersection(deps):
+                nodes.add(name)
+                grew = True
+    return nodes
+
+
+def _local_run_nodes(preferences: dict, nodes: set, state: dict) -> dict:
+    """Runs the selected agents on the shared executor, dependents after their inputs."""
+    outputs = dict(state)
+    agent_state = {'preferences': preferences}
+    first = [n for n in ALL_NODES if n in nodes and n not in NODE_DEPENDENCIES]
+    results = get_executor().map_group({name: (AGENT_FUNCTIONS[name], agent_state) for name in first})
+    for result in results.values():
+        outputs.update(result or {})
+    for name in ALL_NODES:
+        if name in nodes and name in NODE_DEPENDENCIES:
+            outputs.update(AGENT_FUNCTIONS[name]({'preferences': preferences, **outputs}) or {})
+    return outputs
+
+
+def regenerate_itinerary(previous_prefs: dict, previous_itinerary: dict, new_prefs: dict) -> dict:
+    """
+    Reruns only the agents whose inputs changed and merges their output into the
+    previous itinerary. Returns the orchestrator result plus the node split.
+    """
+    if new_prefs.get('stops'):
+        # Multi-city itineraries are not split per node; plan the whole trip again
+        result = multi_city_orchestrate(new_prefs)
+        return {'ok': True, 'itinerary': result['itinerary'], 'regenerated': list(ALL_NODES), 'reused': []}
+    if (previous_prefs or {}).get('stops'):
+        # Multi-city trip turned back into a single city: nothing in the per-stop state is reusable
+        result = orchestrate_itinerary({'preferences': new_prefs})
+        return {'ok': True, 'itinerary': result['itinerary'], 'regenerated': list(ALL_NODES), 'reused': []}
+
+    previous_state = itinerary_to_state(previous_itinerary)
+    nodes = plan_regeneration(previous_prefs, new_prefs, previous_state)
+
+    outputs = None
+    if nodes and langgraph_available():
+        try:
+            app = build_planner_graph(nodes)
+            outputs = app.invoke({'preferences': new_prefs, **previous_state})
+        except Exception:
+            logger.exception('LangGraph regeneration failed, falling back to local orchestrator')
+    if outputs is None:
+        outputs = _local_run_nodes(new_prefs, nodes, previous_state) if nodes else previous_state
+
+    return {
+        'ok': True,
+        'itinerary': consolidate_itinerary(new_prefs, outputs),
+        'regenerated': sorted(nodes),
+        'reused': sorted(set(ALL_NODES) - nodes),
+    }
+
+
+# ------------------------------------------------------------------------------
+# Batch Generation (group and corporate trips)
+# ------------------------------------------------------------------------------
+
+def node_input_key(name: str, preferences: dict) -> tuple:
+    """Normalised values of the preferences ``name`` reads; equal keys give equal output."""
+    return tuple(_normalise_pref((preferences or {}).get(field)) for field in NODE_INPUTS[name])
+
+
+def _run_bounded(calls: dict, limit: int, group) -> dict:
+    """
+    Runs ``{key: (fn, *args)}`` on the shared executor with at most ``limit``
+    calls in flight. Failed calls are logged and yield ``None``.
+    """
+    executor = get_executor()
+    pending = list(calls.items())
+    running, results = {}, {}
+    while pending or running:
+        while pending and len(running) < limit:
+            key, (fn, *args) = pending.pop(0)
+            running[executor.submit(fn, *args, group=group)] = key
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            key = running.pop(future)
+            try:
+                results[key] = future.result()
+            except Exception:
+                logger.exception('Batch agent call %s failed', key)
+                results[key] = None
+    return results
+
+
+def run_node_requests(requests: list, max_concurrency: int = None) -> tuple:
+    """
+    Runs agents for many ``(preferences, nodes)`` requests with shared results.
+
+    Each agent runs once per distinct value of the preferences it reads
+    (``NODE_INPUTS``), dependents after their inputs. All calls share one
+    executor group with at most ``max_concurrency`` (``PLANNER_BATCH_CONCURRENCY``)
+    in flight. Returns ``(per-request (outputs, failed nodes), agent calls made)``.
+    """
+    if max_concurrency is None:
+        max_concurrency = int(get_setting('PLANNER_BATCH_CONCURRENCY', 8))
+    max_concurrency = max(1, max_concurrency)
+    group = object()
+
+    # Dependencies are always run too (packing needs the weather forecast)
+    requests = [
+        (prefs, set(nodes) | {dep for name in nodes for dep in NODE_DEPENDENCIES.get(name, ())})
+        for prefs, nodes in requests
+    ]
+
+    # One representative preference set per (node, input key)
+    representatives = {}
+    for prefs, nodes in requests:
+        for name in nodes:
+            representatives.setdefault((name, node_input_key(name, prefs)), prefs)
+
+    # Independent agents first, then agents consuming their output
+    outputs = {}
+    first = {call: (AGENT_FUNCTIONS[call[0]], {'preferences': prefs})
+             for call, prefs in representatives.items() if call[0] not in NODE_DEPENDENCIES}
+    outputs.update(_run_bounded(first, max_concurrency, group))
+
+    second = {}
+    for (name, key), prefs in representatives.items():
+        if name not in NODE_DEPENDENCIES:
+            continue
+        state = {'preferences': prefs}
+        for dep in NODE_DEPENDENCIES[name]:
+            state.update(outputs.get((dep, node_input_key(dep, prefs))) or {})
+        second[(name, key)] = (AGENT_FUNCTIONS[name], state)
+    outputs.update(_run_bounded(second, max_concurrency, group))
+
+    results = []
+    for prefs, nodes in requests:
+        agent_outputs, failed = {}, []
+        for name in ALL_NODES:
+            if name not in nodes:
+                continue
+            result = outputs.get((name, node_input_key(name, prefs)))
+            if result is None:
+                failed.append(name)
+            agent_outputs.update(result or {})
+        results.append((agent_outputs, failed))
+    return results, len(representatives)
+
+
+def batch_orchestrate(preference_list: list, max_concurrency: int = None) -> dict:
+    """
+    Generates itineraries for many travellers at once.
+
+    Destination-level agents (hotels, weather, activities, food & culture,
+    packing, CO2) run once per distinct destination and only the flight search
+    runs per distinct origin (see ``run_node_requests``). Runs on the shared
+    executor rather than LangGraph, since a graph per traveller could not share
+    agent results.
+    """
+    results, calls = run_node_requests([(prefs, ALL_NODES) for prefs in preference_list], max_concurrency)
+    itineraries = [
+        {'preferences': prefs, 'itinerary': consolidate_itinerary(prefs, outputs), 'failed_agents': failed}
+        for prefs, (outputs, failed) in zip(preference_list, results)
+    ]
+    return {
+        'ok': True,
+        'itineraries': itineraries,
+        'agent_calls': calls,
+        'agent_calls_saved': len(preference_list) * len(ALL_NODES) - calls,
+    }
+
+
+# ------------------------------------------------------------------------------
+# Multi-City Trips
+# ------------------------------------------------------------------------------
+
+# Agents run once per leg (travel between stops) and once per stop (city stay)
+LEG_NODES = ('flights', 'co2')
+STOP_NODES = ('hotels', 'weather', 'activities', 'food_culture', 'packing')
+MAX_STOPS = 10
+MAX_TRIP_NIGHTS = 90
+# Preference keys that describe the trip shape rather than a single city
+MULTI_CITY_KEYS = ('stops', 'start_date', 'return_to_origin')
+
+
+def parse_stops(preferences: dict) -> list:
+    """Validates ``preferences['stops']`` into ``[{'city': str, 'nights': int}, ...]``."""
+    stops = preferences.get('stops')
+    if not isinstance(stops, list) or not stops:
+        raise ValueError("'stops' must be a non-empty list of {'city', 'nights'} objects.")
+    if len(stops) > MAX_STOPS:
+        raise ValueError(f"A trip can have at most {MAX_STOPS} stops.")
+    parsed = []
+    for stop in stops:
+        city = stop.get('city') or stop.get('destination') if isinstance(stop, dict) else None
+        if not isinstance(city, str) or not city.strip():
+            raise ValueError("Every stop needs a 'city'.")
+        try:
+            nights = int(stop.get('nights', 1))
+        except (TypeError, ValueError):
+            raise ValueError(f"Nights for {city} must be a whole number.")
+        if nights < 1:
+            raise ValueError(f"Nights for {city} must be at least 1.")
+        if parsed and _normalise_pref(parsed[-1]['city']) == _normalise_pref(city):
+            raise ValueError(f"Consecutive stops must be different cities ({city}); add the nights together instead.")
+        parsed.append({'city': city.strip(), 'nights': nights})
+    if sum(s['nights'] for s in parsed) > MAX_TRIP_NIGHTS:
+        raise ValueError(f"A trip can last at most {MAX_TRIP_NIGHTS} nights.")
+    return parsed
+
+
+def _trip_start(preferences: dict) -> date:
+    value = preferences.get('start_date')
+    if value:
+        try:
+            return date.fromisoformat(str(value))
+        except ValueError:
+            raise ValueError("start_date must be a YYYY-MM-DD date.")
+    return date.today() + timedelta(days=7)  # Same default as single-city flight searches
+
+
+def plan_legs(preferences: dict, stops: list) -> list:
+    """Ordered flight legs: origin -> each stop in turn (-> origin unless return_to_origin is false)."""
+    origin = preferences.get('origin')
+    day = _trip_start(preferences)
+    cities = [origin] + [s['city'] for s in stops]
+    legs = []
+    for i, stop in enumerate(stops):
+        legs.append({'from': cities[i], 'to': stop['city'], 'date': day.isoformat(), 'stop': i})
+        day += timedelta(days=stop['nights'])
+    if preferences.get('return_to_origin', True) and origin:
+        legs.append({'from': stops[-1]['city'], 'to': origin, 'date': day.isoformat(), 'stop': None})
+    # Without an origin there is nothing to fly from before the first stop
+    return [leg for leg in legs if leg['from']]
+
+
+def multi_city_orchestrate(preferences: dict, max_concurrency: int = None) -> dict:
+    """
+    Plans a trip over ``preferences['stops']`` (ordered, with nights per stop).
+
+    Flight searches (one-way, dated) run per leg and hotels/weather/activities/
+    food & culture/packing per stop, all in parallel and deduplicated through
+    ``run_node_requests``, so a city visited twice is only looked up once. The
+    Amadeus token and IATA codes are shared by every leg (``amadeus_auth``).
+    """
+    stops = parse_stops(preferences)
+    legs = plan_legs(preferences, stops)
+    base = {k: v for k, v in preferences.items() if k not in MULTI_CITY_KEYS}
+
+    leg_prefs = [
+        {**base, 'origin': leg['from'], 'destination': leg['to'], 'departure_date': leg['date'], 'one_way': True}
+        for leg in legs
+    ]
+    stop_prefs = [{**base, 'destination': stop['city'], 'Days': stop['nights']} for stop in stops]
+    requests = [(p, LEG_NODES) for p in leg_prefs] + [(p, STOP_NODES) for p in stop_prefs]
+    results, calls = run_node_requests(requests, max_concurrency)
+    leg_results, stop_results = results[:len(legs)], results[len(legs):]
+
+    return {
+        'ok': True,
+        'itinerary': consolidate_multi_city(preferences, stops, legs, leg_results, stop_results),
+        'agent_calls': calls,
+    }
+
+
+def consolidate_multi_city(preferences: dict, stops: list, legs: list, leg_results: list, stop_results: list) -> dict:
+    """
+    Builds a multi-city itinerary. Top-level sections keep the single-city shape
+    (entries tagged with their leg or city) and ``legs``/``cities`` hold the
+    per-leg and per-city breakdown.
+    """
+    leg_sections = []
+    for i, (leg, (outputs, failed)) in enumerate(zip(legs, leg_results), start=1):
+        leg_sections.append({
+            'leg': i, 'from': leg['from'], 'to': leg['to'], 'date': leg['date'],
+            'flights': [dict(f, leg=i) for f in outputs.get('flights') or []],
+            'co2_kg': outputs.get('co2_kg') or 0,
+            'failed_agents': failed,
+        })
+
+    city_sections = []
+    arrival = _trip_start(preferences)
+    for stop, (outputs, failed) in zip(stops, stop_results):
+        city = stop['city']
+        city_sections.append({
+            'city': city, 'nights': stop['nights'], 'arrival_date': arrival.isoformat(),
+            'hotels': [dict(h, city=city) for h in outputs.get('hotels') or []],
+            'weather': {'forecast': [dict(f, city=city) for f in outputs.get('weather_forecast') or []]},
+            'activities': outputs.get('activities') or [],
+            'packing_list': outputs.get('packing_list') or [],
+            'food_culture': outputs.get('food_culture') or {},
+            'failed_agents': failed,
+        })
+        arrival += timedelta(days=stop['nights'])
+
+    packing_list = []
+    for section in city_sections:
+        packing_list.extend(item for item in section['packing_list'] if item not in packing_list)
+
+    cheapest = [min((f.get('price') for f in leg['flights'] if isinstance(f.get('price'), (int, float))), default=None)
+                for leg in leg_sections]
+    total_nights = sum(s['nights'] for s in stops)
+    itinerary = {
+        'meta': {
+            'mode': 'multi_city',
+            'budget': preferences.get('budget'),
+            'origin': preferences.get('origin'),
+            'destination': ' → '.join(s['city'] for s in stops),
+            'days': total_nights,
+            'start_date': _trip_start(preferences).isoformat(),
+            'end_date': arrival.isoformat(),
+            'stops': stops,
+            'total_flight_price': round(sum(cheapest), 2) if cheapest and None not in cheapest else None,
+        },
+        'flights': [f for leg in leg_sections for f in leg['flights']],
+        'hotels': [h for c in city_sections for h in c['hotels']],
+        'weather': {'forecast': [f for c in city_sections for f in c['weather']['forecast']]},
+        'activities': [a for c in city_sections for a in c['activities']],
+        'packing_list': packing_list,
+        'co2_kg': round(sum(leg['co2_kg'] for leg in leg_sections), 2),
+        'food_culture': {c['city']: c['food_culture'] for c in city_sections},
+        'legs': leg_sections,
+        'cities': city_sections,
+    }
+
+    travel = {leg['stop']: f"{leg['from']} → {leg['to']}" for leg in legs}
+    segments = [{
+        'city': c['city'], 'activities': c['activities'], 'nights': c['nights'], 'travel': travel.get(i),
+    } for i, c in enumerate(city_sections)]
+    if None in travel:
+        segments[-1]['departure'] = travel[None]
+    itinerary['day_plan'] = processing.run_cpu(
+        processing.build_multi_city_day_plan, segments, payload_size=len(itinerary['activities'])
+    )
+    return itinerary
@@ -1,27 +1,11 @@
-import os
 import json
 import logging
 from typing import Dict, Any, List
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+from . import gemini, providers
 
 logger = logging.getLogger(__name__)
 
-# Try to import Gemini SDK
-try:
-    from google import genai
-    from google.genai.errors import APIError
-    client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-    GEMINI_AVAILABLE = True
-except ImportError:
-    logger.warning("Google GenAI SDK not installed. Packing agent will use a fallback mock.")
-    GEMINI_AVAILABLE = False
-except Exception:
-    logger.warning("GEMINI_API_KEY not set or invalid. Packing agent will use a fallback mock.")
-    GEMINI_AVAILABLE = False
-
 
 def generate_packing_list(state: Dict[str, Any]) -> Dict[str, List[str]]:
     """
@@ -33,7 +17,10 @@ def generate_packing_list(state: Dict[str, Any]) -> Dict[str, List[str]]:
     forecast_list = state.get('weather_forecast', [])
     
     # Check if the weather agent provided data (it returns [] on failure)
-    if not forecast_list or not GEMINI_AVAILABLE:
+    if not forecast_list:
+        return _deterministic_packing_fallback(destination, forecast_list)
+    client = gemini.get_client()
+    if not (client or providers.replaying()):
         return _deterministic_packing_fallback(destination, forecast_list)
 
     # 2. Build the LLM Prompt
@@ -60,7 +47,8 @@ def generate_packing_list(state: Dict[str, Any]) -> Dict[str, List[str]]:
 
     # 3. Call Gemini API
     try:
-        response = client.models.generate_content(
+        response = providers.gemini_generate(
+            client,
             model='gemini-2.5-flash',
             contents=[system_prompt, user_prompt],
             config={"response_mime_type": "application/json"}
@@ -74,7 +62,7 @@ def generate_packing_list(state: Dict[str, Any]) -> Dict[str, List[str]]:
             
         return {'packing_list': packing_list}
 
-    except APIError as e:
+    except gemini.api_errors() as e:
         logger.error(f"Gemini API Error: {e}")
         return _deterministic_packing_fallback(destination, forecast_list)
     except Exception as e:
@@ -0,0 +1,262 @@
+"""Shared provider layer for outbound calls made by the planner agents.
+
+Every Amadeus, OpenWeatherMap and Gemini call goes through the helpers in this
+module so cross-cutting behaviour lives in one place. The main feature today is
+record/replay: with a cassette active, responses are either captured from the
+live provider (``record``) or served byte-for-byte from disk (``replay``), which
+makes benchmark and test runs of the orchestrator deterministic and offline.
+
+Enable it with ``PROVIDER_CASSETTE=<path>`` and ``PROVIDER_CASSETTE_MODE=record|replay``
+in the environment, or programmatically with ``use_cassette()``.
+
+Cassette file layout (all integers big-endian)::
+
+    b'TPC1' | uint32 index length | zlib(JSON index) | zlib(body) | zlib(body) ...
+
+The index maps a request fingerprint to the status, headers and byte range of
+its compressed body, so opening a cassette only decodes the index and bodies
+are inflated lazily on first use.
+"""
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+MODE_OFF = 'off'
+MODE_RECORD = 'record'
+MODE_REPLAY = 'replay'
+
+_MAGIC = b'TPC1'
+
+# Credentials never end up in a fingerprint or on disk
+_SECRET_FIELDS = {'appid', 'client_id', 'client_secret', 'api_key', 'key'}
+# Parameters derived from "now" would make every run miss the cassette
+VOLATILE_PARAMS = {'departureDate', 'returnDate', 'checkInDate', 'checkOutDate'}
+# Response headers worth keeping (the rest is transport noise)
+_KEPT_HEADERS = ('Content-Type', 'Content-Encoding')
+
+
+class CassetteMiss(requests.exceptions.ConnectionError):
+    """Raised in replay mode when no recorded response matches a request.
+
+    Subclasses ``ConnectionError`` so agents treat a miss exactly like an
+    unreachable provider and take their normal fallback path.
+    """
+
+
+def fingerprint(kind: str, method: str, url: str, params: Optional[Dict] = None, body: Any = None) -> str:
+    """Stable identifier for a provider request, ignoring secrets and volatile dates."""
+    split = urlsplit(url)
+    clean_params = sorted(
+        (str(k), str(v)) for k, v in (params or {}).items()
+        if k not in _SECRET_FIELDS and k not in VOLATILE_PARAMS
+    )
+    if isinstance(body, dict):
+        body = {k: v for k, v in body.items() if k not in _SECRET_FIELDS}
+    # Host is excluded so recordings replay against stub servers and real APIs alike
+    key = json.dumps([kind, method.upper(), split.path, clean_params, body], sort_keys=True, default=str)
+    return hashlib.sha256(key.encode('utf-8')).hexdigest()[:32]
+
+
+class Cassette:
+    """An indexed, compressed store of recorded provider responses."""
+
+    def __init__(self, path, mode=MODE_REPLAY):
+        if mode not in (MODE_RECORD, MODE_REPLAY):
+            raise ValueError(f"Unknown cassette mode '{mode}'")
+        self.path = Path(path)
+        self.mode = mode
+        self.hits = 0
+        self.misses = 0
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._blob = b''
+        self._bodies: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self._load()
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
+
+    def _load(self):
+        raw = self.path.read_bytes()
+        if raw[:4] != _MAGIC:
+            raise ValueError(f'{self.path} is not a provider cassette')
+        (index_len,) = struct.unpack('>I', raw[4:8])
+        self._index = json.loads(zlib.decompress(raw[8:8 + index_len]))
+        self._blob = raw[8 + index_len:]
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Returns ``{'status', 'headers', 'body'}`` for a fingerprint, or None."""
+        entry = self._index.get(key)
+        if entry is None:
+            with self._lock:
+                self.misses += 1
+            return None
+        body = self._bodies.get(key)
+        if body is None:
+            start = entry['offset']
+            body = zlib.decompress(self._blob[start:start + entry['length']])
+            self._bodies[key] = body
+        with self._lock:
+            self.hits += 1
+        return {'status': entry['status'], 'headers': entry['headers'], 'body': body}
+
+    def put(self, key: str, status: int, headers: Dict[str, str], body: bytes, label: str = ''):
+        with self._lock:
+            self._bodies[key] = body
+            self._index[key] = {'status': status, 'headers': headers, 'label': label}
+
+    def save(self):
+        """Writes the cassette atomically to ``self.path``."""
+        with self._lock:
+            index, chunks, offset = {}, [], 0
+            for key in sorted(self._index):
+                body = self._bodies.get(key)
+                if body is None:
+                    start = self._index[key]['offset']
+                    body = zlib.decompress(self._blob[start:start + self._index[key]['length']])
+                chunk = zlib.compress(body, 9)
+                index[key] = dict(self._index[key], offset=offset, length=len(chunk))
+                chunks.append(chunk)
+                offset += len(chunk)
+            packed_index = zlib.compress(json.dumps(index, sort_keys=True, separators=(',', ':')).encode('utf-8'), 9)
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(self.path.suffix + '.tmp')
+            with open(tmp, 'wb') as fh:
+                fh.write(_MAGIC)
+                fh.write(struct.pack('>I', len(packed_index)))
+                fh.write(packed_index)
+                for chunk in chunks:
+                    fh.write(chunk)
+            os.replace(tmp, self.path)
+            self._index = index
+            self._blob = b''.join(chunks)
+
+    def labels(self):
+        """``'<provider> <method> <path>'`` of every recorded response."""
+        return [entry.get('label', '') for entry in self._index.values()]
+
+    def stats(self):
+        return {'path': str(self.path), 'mode': self.mode, 'entries': len(self._index), 'hits': self.hits, 'misses': self.misses}
+
+
+_active: Optional[Cassette] = None
+
+
+def active_cassette() -> Optional[Cassette]:
+    return _active
+
+
+def replaying() -> bool:
+    """True when responses are served from a cassette (no credentials needed)."""
+    return _active is not None and _active.mode == MODE_REPLAY
+
+
+@contextmanager
+def use_cassette(path, mode=MODE_REPLAY):
+    """Activates a cassette for the duration of the block (saved on exit when recording)."""
+    global _active
+    previous = _active
+    cassette = Cassette(path, mode)
+    _active = cassette
+    try:
+        yield cassette
+    finally:
+        _active = previous
+        if mode == MODE_RECORD:
+            cassette.save()
+
+
+def _response_from_entry(entry: Dict[str, Any], url: str) -> requests.Response:
+    response = requests.Response()
+    response.status_code = entry['status']
+    response.headers.update(entry['headers'])
+    response._content = entry['body']
+    response.url = url
+    response.encoding = 'utf-8'
+    return response
+
+
+def _request(kind: str, method: str, url: str, params=None, data=None, **kwargs) -> requests.Response:
+    cassette = _active
+    if cassette is None:
+        return requests.request(method, url, params=params, data=data, **kwargs)
+
+    key = fingerprint(kind, method, url, params, data)
+    if cassette.mode == MODE_REPLAY:
+        entry = cassette.get(key)
+        if entry is None:
+            raise CassetteMiss(f'No recorded {kind} response for {method} {urlsplit(url).path}')
+        return _response_from_entry(entry, url)
+
+    response = requests.request(method, url, params=params, data=data, **kwargs)
+    headers = {h: response.headers[h] for h in _KEPT_HEADERS if h in response.headers}
+    headers.pop('Content-Encoding', None)  # requests has already decoded the body
+    cassette.put(key, response.status_code, headers, response.content, label=f'{kind} {method} {urlsplit(url).path}')
+    return response
+
+
+def http_get(kind: str, url: str, params=None, **kwargs) -> requests.Response:
+    """GET through the provider layer. ``kind`` names the provider (e.g. 'amadeus')."""
+    return _request(kind, 'GET', url, params=params, **kwargs)
+
+
+def http_post(kind: str, url: str, data=None, **kwargs) -> requests.Response:
+    """POST through the provider layer."""
+    return _request(kind, 'POST', url, data=data, **kwargs)
+
+
+class GeminiReply:
+    """Minimal stand-in for the SDK response; agents only read ``.text``."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def gemini_generate(client, model: str, contents, config=None):
+    """Calls ``client.models.generate_content`` through the provider layer."""
+    cassette = _active
+    if cassette is None:
+        return client.models.generate_content(model=model, contents=contents, config=config)
+
+    key = fingerprint('gemini', 'POST', f'/models/{model}:generateContent', None, {'contents': contents, 'config': config})
+    if cassette.mode == MODE_REPLAY:
+        entry = cassette.get(key)
+        if entry is None:
+            raise CassetteMiss(f'No recorded gemini response for {model}')
+        return GeminiReply(entry['body'].decode('utf-8'))
+
+    response = client.models.generate_content(model=model, contents=contents, config=config)
+    cassette.put(key, 200, {'Content-Type': 'text/plain; charset=utf-8'}, (response.text or '').encode('utf-8'), label=f'gemini {model}')
+    return response
+
+
+def _activate_from_env():
+    path = os.getenv('PROVIDER_CASSETTE')
+    mode = os.getenv('PROVIDER_CASSETTE_MODE', MODE_OFF).lower()
+    if not path or mode == MODE_OFF:
+        return
+    global _active
+    _active = Cassette(path, mode)
+    logger.warning("Provider cassette %s active in %s mode", path, mode)
+    if mode == MODE_RECORD:
+        import atexit
+        atexit.register(_active.save)
+
+
+_activate_from_env()
@@ -1,16 +1,15 @@
 import requests
-import os
 import logging
-from datetime import datetime
 from typing import Dict, Any, List
-from dotenv import load_dotenv
 
-# Load environment variables from .env file
-load_dotenv()
+from . import providers
+from .. import processing
+from ..conf import get_provider_setting
 
 logger = logging.getLogger(__name__)
 
-OPENWEATHER_API_KEY = os.getenv('OPENWEATHER_API_KEY')
+OPENWEATHER_API_KEY = get_provider_setting('OPENWEATHER_API_KEY')
+OPENWEATHER_BASE_URL = get_provider_setting('OPENWEATHER_BASE_URL', 'https://api.openweathermap.org').rstrip('/')
 
 def get_forecast(state: Dict[str, Any]) -> Dict[str, List[Dict]]:
     """
@@ -24,7 +23,7 @@ def get_forecast(state: Dict[str, Any]) -> Dict[str, List[Dict]]:
         logger.warning("Destination is missing for weather forecast.")
         return {'weather_forecast': []}
     
-    if not OPENWEATHER_API_KEY:
+    if not OPENWEATHER_API_KEY and not providers.replaying():
         logger.warning("OPENWEATHER_API_KEY is not configured. Skipping weather forecast.")
         return {'weather_forecast': []}
 
@@ -32,7 +31,7 @@ def get_forecast(state: Dict[str, Any]) -> Dict[str, List[Dict]]:
     city_name = destination.split(',')[0].strip()
     
     # OpenWeatherMap 5-day / 3-hour Forecast API endpoint
-    weather_url = 'https://api.openweathermap.org/data/2.5/forecast'
+    weather_url = f'{OPENWEATHER_BASE_URL}/data/2.5/forecast'
     params = {
         'q': city_name,
         'appid': OPENWEATHER_API_KEY,
@@ -41,56 +40,14 @@ def get_forecast(state: Dict[str, Any]) -> Dict[str, List[Dict]]:
 
     try:
         logger.info(f"Fetching weather forecast for: {city_name}")
-        response = requests.get(weather_url, params=params, timeout=10)
+        response = providers.http_get('openweather', weather_url, params=params, timeout=10)
         response.raise_for_status()
-        data = response.json()
-        
         logger.info(f"Successfully fetched weather data for {city_name}")
         
         # --- Process the 3-hour data into a simplified daily summary ---
-        
-        # Group by day to get min/max/summary
-        daily_summaries = {}
-        
-        for forecast in data.get('list', []):
-            # Extract date (YYYY-MM-DD) from the timestamp
-            date_str = datetime.fromtimestamp(forecast['dt']).strftime('%Y-%m-%d')
-            temp = forecast['main']['temp']
-            weather_desc = forecast['weather'][0]['description'].lower()
-
-            if date_str not in daily_summaries:
-                daily_summaries[date_str] = {
-                    'min_temp_c': temp,
-                    'max_temp_c': temp,
-                    'rainy_periods': 0,
-                    'summary_words': set()
-                }
-
-            # Update min/max temps
-            daily_summaries[date_str]['min_temp_c'] = min(daily_summaries[date_str]['min_temp_c'], temp)
-            daily_summaries[date_str]['max_temp_c'] = max(daily_summaries[date_str]['max_temp_c'], temp)
-            
-            # Count rain occurrences
-            if 'rain' in weather_desc or 'shower' in weather_desc:
-                daily_summaries[date_str]['rainy_periods'] += 1
-
-            # Add general description words
-            daily_summaries[date_str]['summary_words'].add(weather_desc)
-        
-        
-        # Format for final output list (same as the previous structure)
-        forecast_list = []
-        for date_str, summary in daily_summaries.items():
-            
-            # Simple aggregation for 'summary'
-            final_summary = 'Rainy' if summary['rainy_periods'] >= 2 else ', '.join(list(summary['summary_words'])[:2])
-            
-            forecast_list.append({
-                'date': date_str,
-                'max_temp_c': round(summary['max_temp_c']),
-                'min_temp_c': round(summary['min_temp_c']),
-                'summary': final_summary.title(),
-            })
+        forecast_list = processing.run_cpu(
+            processing.summarize_forecast, response.content, payload_size=len(response.content)
+        )
 
         logger.info(f"Processed {len(forecast_list)} days of weather forecast for {city_name}")
         
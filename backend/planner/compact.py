@@ -0,0 +1,203 @@
+"""
+Compact wire format for itineraries (``?format=compact``).
+
+The regular itinerary repeats a lot: every flight carries the same origin,
+destination and currency, every hotel the same city and country inside a
+nested address object, placeholder values ('N/A', empty lists) are sent in
+full and the forecast sits in an extra ``{'forecast': [...]}`` wrapper. The
+compact form:
+
+- moves fields that are identical in every entry of a list into ``common``
+  (``{'common': {...}, 'rows': [...]}``),
+- replaces low-cardinality strings (airlines, durations...) with indexes into
+  a shared ``tables`` list; a block lists those columns in ``tabled``, and a
+  column is only tabled when all its values are strings, so other integers
+  are never mistaken for indexes,
+- flattens hotel ``address``/``geo_code`` and omits empty or 'N/A' values,
+- unwraps ``weather`` and, for multi-city trips, drops the top-level sections
+  that only aggregate ``legs``/``cities``.
+
+``expand_itinerary`` reverses the transformation; omitted placeholders come
+back as missing keys, which clients already treat as "unknown".
+"""
+
+COMPACT_VERSION = 2
+
+# Values treated as "not set" and omitted from compact rows
+_EMPTY = (None, '', 'N/A', [], {})
+# Row fields stored as indexes into the itinerary-wide string table
+_TABLE_FIELDS = ('airline', 'duration', 'return_duration', 'chain_code', 'currency', 'summary', 'city',
+                 'address_city', 'address_country')
+_ADDRESS_FIELDS = {'city': 'address_city', 'country': 'address_country', 'postal_code': 'postal_code', 'lines': 'address_lines'}
+# Top-level multi-city sections rebuilt from legs/cities on expansion
+_MULTI_CITY_AGGREGATES = ('flights', 'hotels', 'weather', 'activities', 'packing_list', 'food_culture')
+
+
+def is_itinerary(value) -> bool:
+    return isinstance(value, dict) and 'meta' in value and ('flights' in value or 'day_plan' in value)
+
+
+class _Table:
+    def __init__(self):
+        self.values = []
+        self._index = {}
+
+    def ref(self, value):
+        if value not in self._index:
+            self._index[value] = len(self.values)
+            self.values.append(value)
+        return self._index[value]
+
+
+def _flatten_hotel(hotel: dict) -> dict:
+    row = {k: v for k, v in hotel.items() if k not in ('address', 'geo_code')}
+    address = hotel.get('address')
+    if isinstance(address, dict):
+        row.update({flat: address.get(key) for key, flat in _ADDRESS_FIELDS.items()})
+    elif address is not None:
+        row['address'] = address
+    geo = hotel.get('geo_code')
+    if isinstance(geo, dict) and (geo.get('latitude') or geo.get('longitude')):
+        row['geo'] = [geo.get('latitude', 0), geo.get('longitude', 0)]
+    return row
+
+
+def _unflatten_hotel(row: dict) -> dict:
+    flat_keys = set(_ADDRESS_FIELDS.values())
+    hotel = {k: v for k, v in row.items() if k not in flat_keys and k != 'geo'}
+    if flat_keys.intersection(row):
+        hotel['address'] = {key: row.get(flat, [] if key == 'lines' else 'N/A') for key, flat in _ADDRESS_FIELDS.items()}
+    if 'geo' in row:
+        hotel['geo_code'] = {'latitude': row['geo'][0], 'longitude': row['geo'][1]}
+    return hotel
+
+
+def _factor(rows, table: _Table) -> dict:
+    """Splits a list of dicts into shared ``common`` fields and slimmed ``rows``."""
+    dict_rows = [r for r in rows if isinstance(r, dict)]
+    if len(dict_rows) != len(rows) or not rows:
+        return rows
+    common = {}
+    if len(rows) > 1:
+        first = rows[0]
+        for key, value in first.items():
+            if value not in _EMPTY and all(key in r and r[key] == value for r in rows[1:]):
+                common[key] = value
+    tabled = []
+    for key in _TABLE_FIELDS:
+        values = [r[key] for r in rows if key in r and key not in common and r[key] not in _EMPTY]
+        if values and all(isinstance(v, str) for v in values):
+            tabled.append(key)
+    slim = []
+    for row in rows:
+        out = {}
+        for key, value in row.items():
+            if key in common or value in _EMPTY:
+                continue
+            out[key] = table.ref(value) if key in tabled else value
+        slim.append(out)
+    block = {'common': common, 'rows': slim}
+    if tabled:
+        block['tabled'] = tabled
+    return block
+
+
+def _unfactor(block, table: list) -> list:
+    if not isinstance(block, dict) or 'rows' not in block:
+        return block
+    tabled = set(block.get('tabled') or ())
+    rows = []
+    for row in block['rows']:
+        out = dict(block.get('common') or {})
+        for key, value in row.items():
+            out[key] = table[value] if key in tabled else value
+        rows.append(out)
+    return rows
+
+
+def _compact_sections(section: dict, table: _Table) -> dict:
+    out = {}
+    for key, value in section.items():
+        if key == 'hotels' and isinstance(value, list):
+            out[key] = _factor([_flatten_hotel(h) if isinstance(h, dict) else h for h in value], table)
+        elif key == 'weather' and isinstance(value, dict) and set(value) == {'forecast'}:
+            out[key] = _factor(value['forecast'], table)
+        elif key in ('flights', 'day_plan') and isinstance(value, list):
+            out[key] = _factor(value, table)
+        elif value in _EMPTY and key not in ('meta',):
+            continue
+        else:
+            out[key] = value
+    return out
+
+
+def _expand_sections(section: dict, table: list) -> dict:
+    out = dict(section)
+    if 'hotels' in out:
+        out['hotels'] = [_unflatten_hotel(h) if isinstance(h, dict) else h for h in _unfactor(out['hotels'], table)]
+    if 'weather' in out:
+        out['weather'] = {'forecast': _unfactor(out['weather'], table)}
+    for key in ('flights', 'day_plan'):
+        if key in out:
+            out[key] = _unfactor(out[key], table)
+    return out
+
+
+def compact_itinerary(itinerary: dict) -> dict:
+    """Returns the compact form of a consolidated itinerary."""
+    table = _Table()
+    source = dict(itinerary)
+    multi_city = isinstance(source.get('meta'), dict) and source['meta'].get('mode') == 'multi_city'
+    if multi_city and 'legs' in source and 'cities' in source:
+        for key in _MULTI_CITY_AGGREGATES:
+            source.pop(key, None)
+    out = _compact_sections(source, table)
+    if multi_city:
+        out['legs'] = [_compact_sections(leg, table) for leg in source.get('legs') or []]
+        out['cities'] = [_compact_sections(city, table) for city in source.get('cities') or []]
+    out['tables'] = table.values
+    out['compact'] = COMPACT_VERSION
+    return out
+
+
+def expand_itinerary(compact: dict) -> dict:
+    """Rebuilds the regular itinerary structure from ``compact_itinerary`` output."""
+    table = compact.get('tables') or []
+    source = {k: v for k, v in compact.items() if k not in ('tables', 'compact')}
+    itinerary = _expand_sections(source, table)
+    meta = itinerary.get('meta') or {}
+    if meta.get('mode') == 'multi_city':
+        legs = [_expand_sections(leg, table) for leg in itinerary.get('legs') or []]
+        cities = [_expand_sections(city, table) for city in itinerary.get('cities') or []]
+        for city in cities:
+            city.setdefault('weather', {'forecast': []})
+            for key in ('hotels', 'activities', 'packing_list'):
+                city.setdefault(key, [])
+            city.setdefault('food_culture', {})
+        for leg in legs:
+            leg.setdefault('flights', [])
+        packing = []
+        for city in cities:
+            packing.extend(item for item in city['packing_list'] if item not in packing)
+        itinerary.update({
+            'legs': legs,
+            'cities': cities,
+            'flights': [f for leg in legs for f in leg['flights']],
+            'hotels': [h for city in cities for h in city['hotels']],
+            'weather': {'forecast': [f for city in cities for f in city['weather']['forecast']]},
+            'activities': [a for city in cities for a in city['activities']],
+            'packing_list': packing,
+            'food_culture': {city['city']: city['food_culture'] for city in cities},
+        })
+    return itinerary
+
+
+def compact_response(data):
+    """Compacts every itinerary found in an API response body (any nesting)."""
+    if is_itinerary(data):
+        return compact_itinerary(data)
+    if isinstance(data, dict):
+        return {key: compact_response(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [compact_response(value) for value in data]
+    return data
@@ -0,0 +1,44 @@
+"""
+Conditional GET helpers for the history and itinerary detail endpoints.
+
+ETags are derived from version counters (``HistoryVersion`` per user,
+``Itinerary.version`` per row) plus everything else that shapes the body (the
+query string and the negotiated renderer), so they can be checked before any
+itinerary JSON is read. ``If-None-Match`` is compared weakly, as RFC 9110
+requires for GET, which also accepts the ``W/`` form the compression
+middleware produces.
+"""
+import hashlib
+
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode('utf-8')).hexdigest()[:32]
+    return f'"{digest}"'
+
+
+def etag_matches(request, etag: str) -> bool:
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    etags = parse_etags(header)
+    if etags == ['*']:
+        return True
+    target = etag.removeprefix('W/')
+    return any(candidate.removeprefix('W/') == target for candidate in etags)
+
+
+def with_validators(response, etag: str):
+    """Adds the ETag and makes clients revalidate instead of reusing the body blindly."""
+    response['ETag'] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    patch_vary_headers(response, ('Authorization',))
+    return response
+
+
+def not_modified(etag: str):
+    return with_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
@@ -0,0 +1,34 @@
+"""Settings access for planner modules that must also work without Django.
+
+The agents and their helpers are imported by the offline benchmarks, which do
+not always configure Django, so they read settings through ``get_setting``
+instead of touching ``django.conf.settings`` directly.
+
+API keys and provider URLs are defined once in ``backend/settings.py`` (which
+reads the environment and ``.env``); ``get_provider_setting`` falls back to the
+environment variable of the same name when Django is not configured.
+"""
+import os
+
+
+def get_setting(name, default=None):
+    """Returns ``settings.<name>`` when Django is configured, else ``default``."""
+    try:
+        from django.conf import settings
+        if settings.configured:
+            return getattr(settings, name, default)
+    except ImportError:
+        pass
+    return default
+
+
+def get_provider_setting(name, default=None):
+    """Returns ``settings.<name>`` when Django is configured, else the ``<name>`` environment variable."""
+    try:
+        from django.conf import settings
+        if settings.configured:
+            value = getattr(settings, name, None)
+            return default if value is None else value
+    except ImportError:
+        pass
+    return os.environ.get(name, default)
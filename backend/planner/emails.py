@@ -0,0 +1,101 @@
+"""
+Approval email rendering.
+
+The HTML and plaintext bodies come from ``planner/itinerary_email.html`` and
+``.txt``, compiled once per process and rendered from the same context in one
+pass. Rendered bodies are cached under a hash of what the email shows - the
+preferences, the inline itinerary and the section hashes - so re-sends and
+previews of unchanged content skip rendering entirely, saves that only touch
+other fields (approving changes ``status``) keep the entry, and any change to
+the content naturally misses it.
+"""
+import functools
+import hashlib
+import re
+
+from django.core.cache import cache
+from django.template.loader import get_template
+
+from .conf import get_setting
+from .processing import run_cpu
+from .sections import canonical_json
+
+SUBJECT = '✅ Your Trip Itinerary is Ready to Book!'
+CACHE_PREFIX = 'planner:email'
+
+DURATION_RE = re.compile(r'PT(?:(\d+)H)?(?:(\d+)M)?')
+
+
+def format_duration(duration_str):
+    """Convert ISO 8601 duration (PT25H45M) to readable format."""
+    if not duration_str or not duration_str.startswith('PT'):
+        return duration_str
+    match = DURATION_RE.match(duration_str)
+    if not match:
+        return duration_str
+    return f"{match.group(1) or '0'}h {match.group(2) or '0'}m"
+
+
+@functools.lru_cache(maxsize=None)
+def _templates():
+    return get_template('planner/itinerary_email.html'), get_template('planner/itinerary_email.txt')
+
+
+def _hotel_location(hotel):
+    # The address can be either a dict or a string
+    address = hotel.get('address', {})
+    if isinstance(address, dict):
+        return f"{address.get('city', 'N/A')}, {address.get('country', 'N/A')}"
+    return str(address) if address else 'N/A'
+
+
+def email_context(prefs: dict, itinerary: dict) -> dict:
+    meta = itinerary.get('meta', {})
+    return {
+        'destination': meta.get('destination', prefs.get('destination', 'Your Destination')),
+        'days': meta.get('days', prefs.get('Days', 'N/A')),
+        'budget': meta.get('budget', prefs.get('budget', 'N/A')),
+        'flights': [{
+            'airline': flight.get('airline', 'N/A'),
+            'price': flight.get('price', 'N/A'),
+            'origin': flight.get('origin', ''),
+            'destination': flight.get('destination', ''),
+            'duration': format_duration(flight.get('duration', 'N/A')),
+            'stops': flight.get('stops', 'N/A'),
+            'departure_time': flight.get('departure_time', 'N/A'),
+        } for flight in itinerary.get('flights', [])[:3]],  # Show top 3 flights
+        'hotels': [{
+            'name': hotel.get('name', 'N/A'),
+            'location': _hotel_location(hotel),
+            'distance': hotel.get('distance', 'N/A'),
+        } for hotel in itinerary.get('hotels', [])[:5]],  # Show top 5 hotels
+        'day_plan': [{
+            'day': day.get('day', 'N/A'),
+            'activities': day.get('activities', []),
+        } for day in itinerary.get('day_plan', [])],
+        'packing_list': itinerary.get('packing_list', []),
+        'cuisine_summary': (itinerary.get('food_culture') or {}).get('cuisine_summary', 'Enjoy the local cuisine!'),
+    }
+
+
+def render_itinerary_email(prefs: dict, itinerary: dict) -> tuple:
+    """Returns ``(html, text)`` bodies of the approval email."""
+    context = email_context(prefs, itinerary)
+    html, text = _templates()
+    return html.render(context), text.render(context)
+
+
+def cache_key(itinerary):
+    # Large sections are represented by their content hashes, so hashing stays cheap
+    content = canonical_json([itinerary.preferences, itinerary.itinerary, itinerary.section_refs or {}])
+    return f'{CACHE_PREFIX}:{hashlib.sha256(content).hexdigest()}'
+
+
+def itinerary_email(itinerary) -> tuple:
+    """``(html, text)`` for a saved ``Itinerary``, rendered at most once per content."""
+    key = cache_key(itinerary)
+    bodies = cache.get(key)
+    if bodies is None:
+        bodies = run_cpu(render_itinerary_email, itinerary.preferences, itinerary.full_itinerary)
+        cache.set(key, bodies, get_setting('PLANNER_EMAIL_CACHE_SECONDS', 24 * 3600))
+    return bodies
@@ -0,0 +1,164 @@
+"""Process-wide bounded executor for planner background work.
+
+Agent calls and approval e-mails used to spin up their own threads per request
+(a fresh ``ThreadPoolExecutor`` per generation, a raw ``threading.Thread`` per
+e-mail), so thread count grew with traffic. This module provides one shared,
+named pool with a fixed number of workers and a bounded queue.
+
+Work is submitted with a ``group`` key (one per request). Workers serve groups
+round-robin, so a request that queued seven agent tasks cannot starve a request
+that arrived a moment later: each group gets one task dispatched per turn.
+
+Size and queue depth come from ``PLANNER_EXECUTOR_WORKERS`` and
+``PLANNER_EXECUTOR_MAX_QUEUE`` in Django settings.
+"""
+import itertools
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+
+from .conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 32
+DEFAULT_MAX_QUEUE = 1000
+
+
+class ExecutorFull(RuntimeError):
+    """Raised when the queue is at capacity and a task cannot be accepted."""
+
+
+class FairExecutor:
+    """A fixed-size thread pool that schedules queued tasks round-robin across groups."""
+
+    def __init__(self, max_workers=DEFAULT_WORKERS, max_queue=DEFAULT_MAX_QUEUE, name='planner-agent'):
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.name = name
+        self._groups = OrderedDict()  # group key -> deque of (future, fn, args, kwargs)
+        self._cond = threading.Condition()
+        self._threads = []
+        self._idle = 0
+        self._shutdown = False
+        self._counter = itertools.count(1)
+        self._queued = 0
+        self._active = 0
+        self._submitted = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._peak_queued = 0
+
+    def submit(self, fn, *args, group=None, **kwargs):
+        """Queues ``fn(*args, **kwargs)`` and returns a ``concurrent.futures.Future``."""
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError('cannot schedule new tasks after shutdown')
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise ExecutorFull(f'{self.name} queue is full ({self.max_queue} tasks)')
+            key = group if group is not None else next(self._counter)
+            self._groups.setdefault(key, deque()).append((future, fn, args, kwargs))
+            self._queued += 1
+            self._submitted += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+            if self._queued > self._idle and len(self._threads) < self.max_workers:
+                self._start_worker()
+            self._cond.notify()
+        return future
+
+    def map_group(self, calls, group=None):
+        """Submits ``{key: (fn, *args)}`` as one group and returns ``{key: result}``."""
+        group = group if group is not None else object()
+        futures = {key: self.submit(fn, *args, group=group) for key, (fn, *args) in calls.items()}
+        return {key: future.result() for key, future in futures.items()}
+
+    def _start_worker(self):
+        thread = threading.Thread(
+            target=self._worker, name=f'{self.name}-{len(self._threads) + 1}', daemon=True
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def _next_task(self):
+        # Caller holds the lock. Take one task from the oldest group, then rotate
+        # that group to the back so every waiting request gets a turn.
+        key, tasks = next(iter(self._groups.items()))
+        task = tasks.popleft()
+        del self._groups[key]
+        if tasks:
+            self._groups[key] = tasks
+        self._queued -= 1
+        return task
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                self._idle += 1
+                while not self._groups and not self._shutdown:
+                    self._cond.wait()
+                self._idle -= 1
+                if not self._groups:
+                    return
+                future, fn, args, kwargs = self._next_task()
+                self._active += 1
+            failed = False
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as exc:
+                    failed = True
+                    future.set_exception(exc)
+            with self._cond:
+                self._active -= 1
+                self._completed += 1
+                self._failed += failed
+
+    def stats(self):
+        """Snapshot of pool utilisation and queue depth."""
+        with self._cond:
+            return {
+                'name': self.name,
+                'max_workers': self.max_workers,
+                'threads': len(self._threads),
+                'active': self._active,
+                'queued': self._queued,
+                'queued_groups': len(self._groups),
+                'peak_queued': self._peak_queued,
+                'max_queue': self.max_queue,
+                'submitted': self._submitted,
+                'completed': self._completed,
+                'failed': self._failed,
+                'rejected': self._rejected,
+            }
+
+    def shutdown(self, wait=True):
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        if wait:
+            for thread in list(self._threads):
+                thread.join()
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns the shared executor, creating it from settings on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = FairExecutor(
+                    max_workers=int(get_setting('PLANNER_EXECUTOR_WORKERS', DEFAULT_WORKERS)),
+                    max_queue=int(get_setting('PLANNER_EXECUTOR_MAX_QUEUE', DEFAULT_MAX_QUEUE)),
+                )
+                logger.info("Started shared planner executor with %d workers", _executor.max_workers)
+    return _executor
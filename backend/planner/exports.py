@@ -0,0 +1,296 @@
+"""
+Offline exports of a saved itinerary: an iCalendar file and a PDF.
+
+Both are produced locally and incrementally: ``iter_ics`` yields one event at a
+time and ``iter_pdf`` one page at a time, so a multi-week trip is streamed to
+the client instead of being built in memory first. ``cached_stream`` tees the
+chunks into the cache once a stream completes; artifacts are keyed by
+``(itinerary id, version)`` like the approval email.
+
+The PDF is written by hand with the standard Helvetica fonts (no external
+library). Those fonts only cover Windows-1252, so other characters are printed
+as '?'.
+"""
+import textwrap
+import zlib
+from datetime import date, datetime, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+from .conf import get_setting
+from .emails import DURATION_RE, email_context, format_duration
+
+CACHE_PREFIX = 'planner:export'
+CONTENT_TYPES = {
+    'ics': 'text/calendar; charset=utf-8',
+    'pdf': 'application/pdf',
+}
+
+
+def cache_key(kind, itinerary_id, version):
+    return f'{CACHE_PREFIX}:{kind}:{itinerary_id}:{version}'
+
+
+def cached_stream(key, chunks):
+    """Yields ``chunks`` and caches their concatenation if the stream completes within PLANNER_EXPORT_CACHE_MAX_BYTES."""
+    max_bytes = get_setting('PLANNER_EXPORT_CACHE_MAX_BYTES', 2 * 1024 * 1024)
+    buffer, size = [], 0
+    for chunk in chunks:
+        if buffer is not None:
+            size += len(chunk)
+            if size > max_bytes:
+                buffer = None
+            else:
+                buffer.append(chunk)
+        yield chunk
+    if buffer is not None:
+        cache.set(key, b''.join(buffer), get_setting('PLANNER_EXPORT_CACHE_SECONDS', 24 * 3600))
+
+
+def stream(kind, itinerary):
+    """Streams the ``kind`` export of a saved ``Itinerary`` through the cache."""
+    chunks = iter_ics(itinerary) if kind == 'ics' else iter_pdf(itinerary)
+    return cached_stream(cache_key(kind, itinerary.pk, itinerary.version), chunks)
+
+
+def _price(flight):
+    # Saved itineraries are user JSON: prices may be strings, missing or null
+    price = flight.get('price')
+    return price if isinstance(price, (int, float)) else float('inf')
+
+
+def _cheapest(flights):
+    priced = [f for f in flights if isinstance(f, dict)] if isinstance(flights, list) else []
+    return min(priced, key=_price) if priced else None
+
+
+def booked_flights(itinerary: dict) -> list:
+    """The flight shown for each leg: the cheapest offer of every multi-city leg, or of the trip."""
+    if (itinerary.get('meta') or {}).get('mode') == 'multi_city':
+        legs = [leg for leg in itinerary.get('legs') or [] if isinstance(leg, dict)]
+        return [f for f in (_cheapest(leg.get('flights')) for leg in legs) if f]
+    flight = _cheapest(itinerary.get('flights'))
+    return [flight] if flight else []
+
+
+def _trip_start(itinerary_obj):
+    """First day of the trip; itineraries without flight dates start on the day they were saved."""
+    if itinerary_obj.start_date:
+        return itinerary_obj.start_date
+    return timezone.localdate(itinerary_obj.created_at) if itinerary_obj.created_at else date.today()
+
+
+# ------------------------------------------------------------------------------
+# iCalendar (RFC 5545)
+# ------------------------------------------------------------------------------
+
+def _ics_text(value) -> str:
+    return str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line: str) -> str:
+    """Folds a content line at 75 octets as RFC 5545 requires."""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, current = [], b''
+    for char in line:
+        b = char.encode('utf-8')
+        if len(current) + len(b) > (75 if not parts else 74):
+            parts.append(current)
+            current = b''
+        current += b
+    parts.append(current)
+    return '\r\n '.join(p.decode('utf-8') for p in parts) + '\r\n'
+
+
+def _ics_datetime(value):
+    """Provider times are local to the airport, so they become floating times."""
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _plus_duration(start, duration):
+    match = DURATION_RE.match(duration or '')
+    if not start or not match or not any(match.groups()):
+        return None
+    return start + timedelta(hours=int(match.group(1) or 0), minutes=int(match.group(2) or 0))
+
+
+def _event(uid, stamp, summary, description, start, end, all_day=False):
+    fmt = (lambda d: d.strftime('%Y%m%d')) if all_day else (lambda d: d.strftime('%Y%m%dT%H%M%S'))
+    kind = ';VALUE=DATE' if all_day else ''
+    lines = ['BEGIN:VEVENT', f'UID:{uid}', f'DTSTAMP:{stamp}', f'DTSTART{kind}:{fmt(start)}',
+             f'DTEND{kind}:{fmt(end)}', f'SUMMARY:{_ics_text(summary)}']
+    if description:
+        lines.append(f'DESCRIPTION:{_ics_text(description)}')
+    lines.append('END:VEVENT')
+    return ''.join(_fold(line) for line in lines).encode('utf-8')
+
+
+def iter_ics(itinerary_obj):
+    data = itinerary_obj.full_itinerary
+    context = email_context(itinerary_obj.preferences, data)
+    stamp = timezone.now().strftime('%Y%m%dT%H%M%SZ')
+    uid = f'trippick-{itinerary_obj.pk}-v{itinerary_obj.version}'
+
+    yield ''.join(_fold(line) for line in (
+        'BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Trip Pick//Itinerary Export//EN', 'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH', f"X-WR-CALNAME:{_ics_text('Trip to ' + str(context['destination']))}",
+    )).encode('utf-8')
+
+    for n, flight in enumerate(booked_flights(data)):
+        route = f"{flight.get('origin', '')} → {flight.get('destination', '')}"
+        details = f"{flight.get('airline', '')} · {flight.get('price', '')} {flight.get('currency', '')} · stops: {flight.get('stops', 0)}"
+        start = _ics_datetime(flight.get('departure_time'))
+        end = _ics_datetime(flight.get('arrival_time')) or _plus_duration(start, flight.get('duration'))
+        if start:
+            yield _event(f'{uid}-flight-{n}@trippick', stamp, f'Flight {route}', details, start, end or start)
+        back = _ics_datetime(flight.get('return_departure'))
+        if back:
+            back_end = _plus_duration(back, flight.get('return_duration')) or back
+            route_back = f"{flight.get('destination', '')} → {flight.get('origin', '')}"
+            yield _event(f'{uid}-return-{n}@trippick', stamp, f'Flight {route_back}', details, back, back_end)
+
+    first_day = _trip_start(itinerary_obj)
+    for offset, day in enumerate(data.get('day_plan') or []):
+        if not isinstance(day, dict):
+            continue
+        day_date = first_day + timedelta(days=offset)
+        where = day.get('city') or context['destination']
+        activities = '\n'.join(f'- {activity}' for activity in day.get('activities') or [])
+        yield _event(f'{uid}-day-{offset + 1}@trippick', stamp, f"Day {day.get('day', offset + 1)}: {where}",
+                     activities, day_date, day_date + timedelta(days=1), all_day=True)
+
+    yield _fold('END:VCALENDAR').encode('utf-8')
+
+
+# ------------------------------------------------------------------------------
+# PDF (1.4, one content stream per page)
+# ------------------------------------------------------------------------------
+
+PAGE_WIDTH, PAGE_HEIGHT = 612, 792  # US Letter, points
+MARGIN = 54
+# (font resource, size) per line style
+STYLES = {'title': ('F2', 20), 'heading': ('F2', 14), 'text': ('F1', 10.5), 'small': ('F1', 9)}
+
+
+# Characters used in generated text that Windows-1252 lacks
+_PDF_REPLACEMENTS = str.maketrans({'→': '->', '✓': 'v', '✈': ''})
+
+
+def _pdf_text(value: str) -> bytes:
+    raw = value.translate(_PDF_REPLACEMENTS).encode('cp1252', errors='replace')
+    return raw.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def pdf_lines(itinerary_obj):
+    """Yields ``(style, text)`` for every line of the PDF, in order."""
+    data = itinerary_obj.full_itinerary
+    context = email_context(itinerary_obj.preferences, data)
+    yield 'title', f"Trip to {context['destination']}"
+    start, end = itinerary_obj.start_date, itinerary_obj.end_date
+    dates = f"{start:%d %b %Y} - {end:%d %b %Y}" if start and end else ''
+    yield 'text', ' | '.join(str(p) for p in (f"{context['days']} days", context['budget'], dates) if p)
+    yield 'text', ''
+
+    yield 'heading', 'Flights'
+    flights = booked_flights(data)
+    for flight in flights:
+        yield 'text', (f"{flight.get('airline', 'N/A')}  {flight.get('origin', '')} -> {flight.get('destination', '')}  "
+                       f"{flight.get('price', 'N/A')} {flight.get('currency', '')}")
+        yield 'small', (f"Departs {flight.get('departure_time', 'N/A')}, {format_duration(flight.get('duration', 'N/A'))}, "
+                        f"stops: {flight.get('stops', 'N/A')}"
+                        + (f"; return {flight['return_departure']}" if flight.get('return_departure') else ''))
+    if not flights:
+        yield 'text', 'No flights found.'
+    yield 'text', ''
+
+    yield 'heading', 'Hotels'
+    for hotel in context['hotels']:
+        yield 'text', f"{hotel['name']} - {hotel['location']} ({hotel['distance']})"
+    if not context['hotels']:
+        yield 'text', 'No hotels found.'
+    yield 'text', ''
+
+    yield 'heading', 'Daily itinerary'
+    for day in data.get('day_plan') or []:
+        if not isinstance(day, dict):
+            continue
+        where = f" - {day['city']}" if day.get('city') else ''
+        yield 'text', f"Day {day.get('day', '')}{where}"
+        for activity in day.get('activities') or []:
+            yield 'small', f"    - {activity}"
+    yield 'text', ''
+
+    if context['packing_list']:
+        yield 'heading', 'Packing list'
+        for item in context['packing_list']:
+            yield 'small', f"[ ] {item}"
+        yield 'text', ''
+
+    yield 'heading', 'Food & culture'
+    yield 'text', str(context['cuisine_summary'])
+
+
+def _wrapped(lines):
+    for style, text in lines:
+        font, size = STYLES[style]
+        width = int((PAGE_WIDTH - 2 * MARGIN) / (size * 0.5))
+        for part in textwrap.wrap(text, width=width, subsequent_indent='      ') or ['']:
+            yield font, size, part
+
+
+def _pages(lines):
+    """Groups wrapped lines into pages and returns each page's content stream."""
+    ops, y = [], PAGE_HEIGHT - MARGIN
+    for font, size, text in _wrapped(lines):
+        leading = size * 1.45
+        if y - leading < MARGIN:
+            yield b'\n'.join(ops)
+            ops, y = [], PAGE_HEIGHT - MARGIN
+        y -= leading
+        if text:
+            ops.append(b'BT /%s %g Tf %g %g Td (%s) Tj ET' % (font.encode(), size, MARGIN, y, _pdf_text(text)))
+    yield b'\n'.join(ops)
+
+
+def iter_pdf(itinerary_obj):
+    offsets = {}
+    position = 0
+
+    def obj(number, body: bytes):
+        nonlocal position
+        offsets[number] = position
+        chunk = b'%d 0 obj\n' % number + body + b'\nendobj\n'
+        position += len(chunk)
+        return chunk
+
+    header = b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n'
+    position = len(header)
+    # 1 catalog, 2 page tree (written last, once every page is known), 3-4 fonts, then content + page pairs
+    yield header + obj(1, b'<< /Type /Catalog /Pages 2 0 R >>') + \
+        obj(3, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>') + \
+        obj(4, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>')
+
+    kids = []
+    number = 5
+    for content in _pages(pdf_lines(itinerary_obj)):
+        compressed = zlib.compress(content)
+        chunk = obj(number, b'<< /Length %d /Filter /FlateDecode >>\nstream\n' % len(compressed) + compressed
+                    + b'\nendstream')
+        chunk += obj(number + 1, b'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Contents %d 0 R '
+                                 b'/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> >>' % (PAGE_WIDTH, PAGE_HEIGHT, number))
+        kids.append(number + 1)
+        number += 2
+        yield chunk
+
+    tail = obj(2, b'<< /Type /Pages /Kids [%s] /Count %d >>' % (b' '.join(b'%d 0 R' % k for k in kids), len(kids)))
+    xref_at = position
+    tail += b'xref\n0 %d\n0000000000 65535 f \n' % number
+    tail += b''.join(b'%010d 00000 n \n' % offsets[n] for n in range(1, number))
+    tail += b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (number, xref_at)
+    yield tail
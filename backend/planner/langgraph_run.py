@@ -1,28 +1,17 @@
+import importlib.util
 import os
 import sys
 import django
 from pprint import pprint
 from typing import TypedDict, Optional, Dict, Any
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
-django.setup()
 
-try:
-    from langgraph.graph import StateGraph, END
-except ImportError:
-    print("ERROR: LangGraph not installed. Please run: pip install langgraph langchain-core")
-    sys.exit(1)
+def setup_django():
+    """Configures Django when run as a script (not at import, so importing this module stays cheap)."""
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    django.setup()
 
-# ------------------------------------------------------------------------------
-# 3. Import Node Wrappers
-# NOTE: Adjust these imports if your actual function names in *_node.py differ.
-# We assume each module has a 'run' function that accepts state and returns a dict.
-# ------------------------------------------------------------------------------
-from planner.langgraph_nodes.weather_node import run as run_weather
-from planner.langgraph_nodes.packing_node import run as run_packing
-from planner.langgraph_nodes.flight_node import run as run_flights
-from planner.langgraph_nodes.hotel_node import run as run_hotels
 
 # ------------------------------------------------------------------------------
 # 4. Define State
@@ -45,6 +34,13 @@ def build_smoke_test_graph():
     Builds a simple sequential graph: Start -> Weather -> Packing -> End
     This proves data flows correctly between nodes.
     """
+    from langgraph.graph import StateGraph, END
+    # Node wrappers: each module has a 'run' function that accepts state and returns a dict
+    from planner.langgraph_nodes.weather_node import run as run_weather
+    from planner.langgraph_nodes.packing_node import run as run_packing
+    from planner.langgraph_nodes.flight_node import run as run_flights
+    from planner.langgraph_nodes.hotel_node import run as run_hotels
+
     # Initialize graph with our state structure
     workflow = StateGraph(PlannerState)
 
@@ -111,4 +107,8 @@ def test_graph_execution():
         traceback.print_exc()
 
 if __name__ == "__main__":
+    setup_django()
+    if importlib.util.find_spec('langgraph.graph') is None:
+        print("ERROR: LangGraph not installed. Please run: pip install langgraph langchain-core")
+        sys.exit(1)
     test_graph_execution()
\ No newline at end of file
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from planner.models import Itinerary
+
+
+class Command(BaseCommand):
+    help = "Recomputes Itinerary.summary and the extracted summary columns for existing rows, in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--missing-only', action='store_true',
+                            help="Only rows whose extracted destination is still empty.")
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        queryset = Itinerary.objects.order_by('pk').only('pk', 'user', 'preferences', 'itinerary', 'section_refs')
+        if options['missing_only']:
+            queryset = queryset.filter(destination='')
+
+        fields = None
+        last_pk = 0
+        total = 0
+        while True:
+            # Walk the primary key instead of OFFSET so each batch is an index range scan
+            batch = list(queryset.filter(pk__gt=last_pk)[:batch_size])
+            if not batch:
+                break
+            Itinerary.prefetch_sections(batch)
+            for it in batch:
+                fields = it.refresh_summary()
+            # Bumps the owners' HistoryVersion (ItineraryQuerySet.update), so cached history pages revalidate
+            Itinerary.objects.bulk_update(batch, sorted(fields))
+            last_pk = batch[-1].pk
+            total += len(batch)
+            self.stdout.write(f"Backfilled {total} itineraries (last id {last_pk})")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {total} itineraries updated."))
@@ -0,0 +1,73 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Boots Django the way a worker does and reports how long it took and what got imported
+PROBE = """
+import json, os, sys, time
+start = time.perf_counter()
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+print(json.dumps({'ms': elapsed * 1000, 'modules': sorted(sys.modules)}))
+"""
+
+# Slow to import and only needed once a generation runs, so they must stay out of worker boot
+LAZY_MODULES = ('google.genai', 'langgraph')
+
+
+class Command(BaseCommand):
+    help = ("Measures cold start (django.setup() plus URL loading) in fresh interpreters with "
+            "python -X importtime and fails when it exceeds the budget or imports a lazy-loaded SDK.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--budget-ms', type=float, default=1000.0,
+                            help="Maximum median cold start in milliseconds.")
+        parser.add_argument('--runs', type=int, default=3)
+        parser.add_argument('--top', type=int, default=10, help="Slowest top-level imports to list.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'backend.settings'))
+        timings, imports = [], {}
+        for _ in range(max(options['runs'], 1)):
+            proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE], cwd=settings.BASE_DIR,
+                                  env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                raise CommandError(f"Probe interpreter failed:\n{proc.stderr[-2000:]}")
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            timings.append(result['ms'])
+            imports, modules = _top_level_imports(proc.stderr), result['modules']
+
+        median = statistics.median(timings)
+        self.stdout.write(f"Cold start: median {median:.0f} ms over {len(timings)} runs "
+                          f"({', '.join(f'{t:.0f}' for t in timings)}), budget {options['budget_ms']:.0f} ms")
+        self.stdout.write("Slowest top-level imports (cumulative, last run):")
+        for name, us in sorted(imports.items(), key=lambda item: -item[1])[:options['top']]:
+            self.stdout.write(f"  {us / 1000:8.1f} ms  {name}")
+
+        eager = [name for name in LAZY_MODULES if any(m == name or m.startswith(name + '.') for m in modules)]
+        if eager:
+            raise CommandError(f"Imported at startup but meant to load on first use: {', '.join(eager)}")
+        if median > options['budget_ms']:
+            raise CommandError(f"Cold start of {median:.0f} ms exceeds the {options['budget_ms']:.0f} ms budget")
+        self.stdout.write(self.style.SUCCESS("Cold start within budget"))
+
+
+def _top_level_imports(importtime_output):
+    """Cumulative microseconds per top-level import from ``-X importtime`` output."""
+    imports = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        _, cumulative, name = line.split('|', 2)
+        # Nested imports are indented under the module that triggered them
+        if cumulative.strip().isdigit() and not name[1:].startswith(' '):
+            imports[name.strip()] = int(cumulative)
+    return imports
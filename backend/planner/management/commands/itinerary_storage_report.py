@@ -0,0 +1,65 @@
+import json
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db.models.functions import Length
+
+from planner.models import Itinerary, ItinerarySection
+
+
+class Command(BaseCommand):
+    help = "Reports how much space section deduplication saves; optionally deletes unreferenced sections."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--prune', action='store_true', help="Delete sections no itinerary references.")
+        parser.add_argument('--json', action='store_true', help="Print the report as JSON.")
+
+    def handle(self, *args, **options):
+        refs = Counter()
+        itineraries = inline_bytes = 0
+        rows = Itinerary.objects.order_by('pk').values_list('itinerary', 'section_refs')
+        for inline, section_refs in rows.iterator(chunk_size=options['batch_size']):
+            itineraries += 1
+            inline_bytes += len(json.dumps(inline, separators=(',', ':')).encode('utf-8'))
+            refs.update((section_refs or {}).values())
+
+        sizes = {}
+        orphans = []
+        sections = ItinerarySection.objects.annotate(stored=Length('data')).values_list('hash', 'size', 'stored')
+        for digest, size, stored in sections.iterator(chunk_size=options['batch_size']):
+            sizes[digest] = (size, stored or 0)
+            if digest not in refs:
+                orphans.append(digest)
+
+        logical = inline_bytes + sum(sizes.get(h, (0, 0))[0] * n for h, n in refs.items())
+        physical = inline_bytes + sum(stored for _, stored in sizes.values())
+        report = {
+            'itineraries': itineraries,
+            'sections': len(sizes),
+            'section_references': sum(refs.values()),
+            'missing_sections': sum(1 for h in refs if h not in sizes),
+            'orphaned_sections': len(orphans),
+            'inline_bytes': inline_bytes,
+            'sections_raw_bytes': sum(size for size, _ in sizes.values()),
+            'sections_stored_bytes': sum(stored for _, stored in sizes.values()),
+            'logical_bytes': logical,
+            'physical_bytes': physical,
+            'saved_bytes': logical - physical,
+            'saved_ratio': round(1 - physical / logical, 4) if logical else 0.0,
+        }
+
+        if options['prune'] and orphans:
+            for start in range(0, len(orphans), options['batch_size']):
+                ItinerarySection.objects.filter(hash__in=orphans[start:start + options['batch_size']]).delete()
+            report['pruned_sections'] = len(orphans)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        for key, value in report.items():
+            self.stdout.write(f"{key:<24} {value}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Deduplication saves {report['saved_bytes']} bytes ({report['saved_ratio']:.1%}) "
+            f"across {itineraries} itineraries."
+        ))
@@ -0,0 +1,50 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from planner.models import Itinerary, ItinerarySection
+
+
+class Command(BaseCommand):
+    help = ("Deletes itinerary sections no itinerary references any more (left behind by deleted or "
+            "edited itineraries) in batches; run it periodically (e.g. daily from cron).")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Seconds to sleep between batches, to leave room for other writers.")
+        # Sections are stored before the itinerary row that references them is committed
+        parser.add_argument('--min-age-hours', type=float, default=24.0,
+                            help="Only delete sections created at least this long ago.")
+        parser.add_argument('--dry-run', action='store_true', help="Count orphaned sections without deleting them.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        referenced = set()
+        rows = Itinerary.objects.order_by('pk').values_list('section_refs', flat=True)
+        for section_refs in rows.iterator(chunk_size=batch_size):
+            referenced.update((section_refs or {}).values())
+
+        cutoff = timezone.now() - timedelta(hours=options['min_age_hours'])
+        candidates = ItinerarySection.objects.filter(created_at__lte=cutoff).order_by('hash')
+        deleted, last = 0, None
+        while True:
+            page = candidates.filter(hash__gt=last) if last else candidates
+            hashes = list(page.values_list('hash', flat=True)[:batch_size])
+            if not hashes:
+                break
+            last = hashes[-1]
+            orphans = [h for h in hashes if h not in referenced]
+            if not orphans:
+                continue
+            if options['dry_run']:
+                deleted += len(orphans)
+                continue
+            # Short transactions: SQLite holds the write lock for the whole DELETE
+            deleted += ItinerarySection.objects.filter(hash__in=orphans).delete()[0]
+            if options['pause']:
+                time.sleep(options['pause'])
+        action = "Found" if options['dry_run'] else "Purged"
+        self.stdout.write(self.style.SUCCESS(f"{action} {deleted} orphaned itinerary sections"))
@@ -0,0 +1,78 @@
+"""
+Response compression for the planner API.
+
+Itinerary responses are large, repetitive JSON, so responses under
+``PLANNER_COMPRESSION_PATHS`` larger than ``PLANNER_COMPRESSION_MIN_BYTES`` are
+compressed with brotli when the client accepts it and the optional ``brotli``
+package is installed, otherwise with gzip. Smaller responses are sent as-is:
+below about a kilobyte the framing overhead outweighs the savings.
+"""
+import gzip
+import re
+
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    brotli = None
+    BROTLI_AVAILABLE = False
+
+from .conf import get_setting
+
+_ACCEPTS = re.compile(r'(?:^|,)\s*(br|gzip)\s*(?:;\s*q=([0-9.]+))?', re.IGNORECASE)
+
+
+def _accepted_encodings(header: str) -> set:
+    accepted = set()
+    for name, q in _ACCEPTS.findall(header or ''):
+        if not q or float(q) > 0:
+            accepted.add(name.lower())
+    return accepted
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(content, quality=int(get_setting('PLANNER_BROTLI_QUALITY', 5)))
+    return gzip.compress(content, compresslevel=int(get_setting('PLANNER_GZIP_LEVEL', 6)), mtime=0)
+
+
+class PlannerCompressionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        paths = get_setting('PLANNER_COMPRESSION_PATHS', ('/api/planner/',))
+        if not any(request.path.startswith(prefix) for prefix in paths):
+            return response
+        # Vary on the request header even when this response is not compressed
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < int(get_setting('PLANNER_COMPRESSION_MIN_BYTES', 1024)):
+            return response
+
+        accepted = _accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if 'br' in accepted and BROTLI_AVAILABLE:
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            encoding = 'gzip'
+        else:
+            return response
+
+        compressed = compress(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+        # The body is no longer byte-identical to what a strong ETag promised
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:06
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+# Copy of planner.summaries as of this migration, so later changes to it do not alter the backfill
+def _trip_dates(flights):
+    """Departure/return dates (YYYY-MM-DD) of the first flight option, if known."""
+    if not flights or not isinstance(flights[0], dict):
+        return None, None
+    first = flights[0]
+    departure = str(first.get('departure_time') or '')[:10] or None
+    returning = str(first.get('return_departure') or '')[:10] or None
+    # Mock flights only carry a clock time ('08:00'), which is not a date
+    if departure and len(departure) != 10:
+        departure = None
+    if returning and len(returning) != 10:
+        returning = None
+    return departure, returning
+
+
+def build_itinerary_summary(preferences, itinerary):
+    # Saved JSON is not validated, so any of these may be a list, string or number
+    preferences = preferences if isinstance(preferences, dict) else {}
+    itinerary = itinerary if isinstance(itinerary, dict) else {}
+    meta = itinerary.get('meta') if isinstance(itinerary.get('meta'), dict) else {}
+    flights = itinerary.get('flights') if isinstance(itinerary.get('flights'), list) else []
+    hotels = itinerary.get('hotels') if isinstance(itinerary.get('hotels'), list) else []
+    prices = [f.get('price') for f in flights if isinstance(f, dict) and isinstance(f.get('price'), (int, float))]
+    departure, returning = _trip_dates(flights)
+    return {
+        'destination': meta.get('destination') or preferences.get('destination'),
+        'origin': preferences.get('origin'),
+        'days': meta.get('days') or preferences.get('Days'),
+        'budget': meta.get('budget') or preferences.get('budget'),
+        'start_date': departure,
+        'end_date': returning,
+        'flight_count': len(flights),
+        'hotel_count': len(hotels),
+        'lowest_price': min(prices) if prices else None,
+        'currency': next((f.get('currency') for f in flights if isinstance(f, dict) and f.get('currency')), None),
+    }
+
+
+def backfill_summaries(apps, schema_editor):
+    Itinerary = apps.get_model('planner', 'Itinerary')
+    batch = []
+    for it in Itinerary.objects.order_by('pk').only('pk', 'preferences', 'itinerary').iterator(chunk_size=BATCH_SIZE):
+        it.summary = build_itinerary_summary(it.preferences, it.itinerary)
+        batch.append(it)
+        if len(batch) >= BATCH_SIZE:
+            Itinerary.objects.bulk_update(batch, ['summary'])
+            batch = []
+    if batch:
+        Itinerary.objects.bulk_update(batch, ['summary'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0002_itinerary_status_alter_itinerary_created_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itinerary',
+            name='summary',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0003_itinerary_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itinerary',
+            name='budget',
+            field=models.CharField(blank=True, default='', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='days',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='destination',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='end_date',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='origin',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='start_date',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='total_flight_price',
+            field=models.FloatField(blank=True, help_text='Total price of the cheapest flight offer.', null=True),
+        ),
+        migrations.AlterField(
+            model_name='itinerary',
+            name='status',
+            field=models.CharField(choices=[('GENERATED', 'Generated'), ('APPROVED', 'Approved by User (Ready to Book)'), ('CANCELLED', 'Cancelled')], db_index=True, default='GENERATED', help_text='The current status of the itinerary in the approval lifecycle.', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='itinerary',
+            index=models.Index(fields=['user', 'created_at'], name='planner_itin_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.7 on 2026-10-19 17:12
+
+import hashlib
+import json
+import zlib
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+# Copy of planner.sections as of this migration, so later changes to it do not alter the data
+# migration. Blobs are written with zlib (no optional dependency); every encoding is readable.
+SECTION_KEYS = ('flights', 'hotels', 'weather', 'activities', 'day_plan', 'packing_list', 'food_culture')
+MIN_BYTES = 256
+
+
+def canonical_json(value):
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def decode(data, encoding):
+    data = bytes(data)
+    if encoding == 'zstd':
+        import zstandard
+        return zstandard.ZstdDecompressor().decompress(data)
+    if encoding == 'zlib':
+        return zlib.decompress(data)
+    return data
+
+
+def split_itinerary(itinerary):
+    if not isinstance(itinerary, dict):
+        return itinerary if itinerary is not None else {}, {}, {}
+    inline, refs, blobs = {}, {}, {}
+    for key, value in (itinerary or {}).items():
+        if key in SECTION_KEYS:
+            raw = canonical_json(value)
+            if len(raw) >= MIN_BYTES:
+                digest = hashlib.sha256(raw).hexdigest()
+                refs[key] = digest
+                blobs[digest] = raw
+                continue
+        inline[key] = value
+    return inline, refs, blobs
+
+
+def store_blobs(section_model, blobs):
+    existing = set(section_model.objects.filter(hash__in=list(blobs)).values_list('hash', flat=True))
+    section_model.objects.bulk_create([
+        section_model(hash=h, data=zlib.compress(raw, 6), encoding='zlib', size=len(raw))
+        for h, raw in blobs.items() if h not in existing
+    ], ignore_conflicts=True)
+
+
+def load_sections(section_model, hashes):
+    rows = section_model.objects.filter(hash__in=hashes).values_list('hash', 'data', 'encoding')
+    return {h: json.loads(decode(data, encoding)) for h, data, encoding in rows}
+
+
+def assemble(inline, refs, sections):
+    itinerary = {key: sections[digest] for key, digest in refs.items() if key not in inline}
+    itinerary.update(inline)
+    return itinerary
+
+
+def _batches(queryset):
+    last_pk = 0
+    while True:
+        batch = list(queryset.filter(pk__gt=last_pk).order_by('pk').only('pk', 'itinerary', 'section_refs')[:BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def move_sections_out_of_line(apps, schema_editor):
+    Itinerary = apps.get_model('planner', 'Itinerary')
+    ItinerarySection = apps.get_model('planner', 'ItinerarySection')
+    for batch in _batches(Itinerary.objects.filter(section_refs={})):
+        blobs = {}
+        for it in batch:
+            it.itinerary, it.section_refs, found = split_itinerary(it.itinerary)
+            blobs.update(found)
+        store_blobs(ItinerarySection, blobs)
+        Itinerary.objects.bulk_update(batch, ['itinerary', 'section_refs'])
+
+
+def inline_sections(apps, schema_editor):
+    Itinerary = apps.get_model('planner', 'Itinerary')
+    ItinerarySection = apps.get_model('planner', 'ItinerarySection')
+    for batch in _batches(Itinerary.objects.exclude(section_refs={})):
+        loaded = load_sections(ItinerarySection, {h for it in batch for h in it.section_refs.values()})
+        for it in batch:
+            it.itinerary = assemble(it.itinerary, it.section_refs, loaded)
+            it.section_refs = {}
+        Itinerary.objects.bulk_update(batch, ['itinerary', 'section_refs'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0004_itinerary_summary_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItinerarySection',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('data', models.BinaryField()),
+                ('encoding', models.CharField(default='raw', max_length=8)),
+                ('size', models.PositiveIntegerField(help_text='Uncompressed size in bytes.')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='section_refs',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.RunPython(move_sections_out_of_line, inline_sections),
+    ]
@@ -1,8 +1,13 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.conf import settings
 from django.utils import timezone
 
+from .summaries import build_itinerary_summary, summary_columns
+from . import sections
+
 # User model for foreign key relationship
 User = get_user_model()
 
@@ -14,20 +19,200 @@ STATUS_CHOICES = (
 )
 
 
+class ItinerarySection(models.Model):
+    """One deduplicated itinerary section, addressed by the SHA-256 of its canonical JSON."""
+    hash = models.CharField(max_length=64, primary_key=True)
+    data = models.BinaryField()
+    encoding = models.CharField(max_length=8, default=sections.ENCODING_RAW)
+    size = models.PositiveIntegerField(help_text="Uncompressed size in bytes.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Section {self.hash[:12]} ({self.size} bytes, {self.encoding})"
+
+
+class HistoryVersion(models.Model):
+    """
+    Per-user counter bumped whenever one of the user's itineraries is created,
+    changed or deleted. The history endpoint derives its ETag from it, so a
+    conditional GET is answered without reading the itineraries themselves.
+    """
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='+')
+    version = models.PositiveBigIntegerField(default=0)
+
+    @classmethod
+    def current(cls, user_id):
+        return cls.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, user_ids):
+        """Increments the history version of every user in ``user_ids`` (creating missing rows)."""
+        user_ids = {pk for pk in user_ids if pk is not None}
+        if not user_ids:
+            return
+        updated = cls.objects.filter(user_id__in=user_ids).update(version=models.F('version') + 1)
+        if updated < len(user_ids):
+            existing = set(cls.objects.filter(user_id__in=user_ids).values_list('user_id', flat=True))
+            cls.objects.bulk_create([cls(user_id=pk, version=1) for pk in user_ids - existing], ignore_conflicts=True)
+
+
+class ItineraryQuerySet(models.QuerySet):
+    """
+    Queryset ``update()``/``delete()`` (bulk views, admin actions, ``bulk_update``,
+    shell scripts) bypass ``Itinerary.save()``, so they bump the owners'
+    ``HistoryVersion`` themselves, once per call.
+    """
+
+    def _owner_ids(self):
+        return set(self.order_by().values_list('user_id', flat=True).distinct())
+
+    def update(self, **kwargs):
+        with transaction.atomic(using=self.db, savepoint=False):
+            owners = self._owner_ids()
+            rows = super().update(**kwargs)
+            if rows:
+                HistoryVersion.bump(owners)
+        return rows
+
+    def delete(self):
+        with transaction.atomic(using=self.db, savepoint=False):
+            owners = self._owner_ids()
+            deleted = super().delete()
+            if deleted[0]:
+                HistoryVersion.bump(owners)
+        return deleted
+
+
 class Itinerary(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
     preferences = models.JSONField(default=dict)
+    # Inline part of the itinerary; large sections live in ItinerarySection (see section_refs).
+    # Read the whole thing through ``full_itinerary``.
     itinerary = models.JSONField(default=dict)
+    section_refs = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     status = models.CharField(
         max_length=20, 
         choices=STATUS_CHOICES, 
         default='GENERATED',
+        db_index=True,
         help_text="The current status of the itinerary in the approval lifecycle."
     )
 
 
+    # Small precomputed view of preferences/itinerary for history list views
+    summary = models.JSONField(default=dict, blank=True)
+
+    # Columns extracted from the summary so history can be filtered without decoding JSON
+    destination = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    origin = models.CharField(max_length=255, blank=True, default='', db_index=True)
+    start_date = models.DateField(null=True, blank=True, db_index=True)
+    end_date = models.DateField(null=True, blank=True, db_index=True)
+    days = models.PositiveSmallIntegerField(null=True, blank=True)
+    budget = models.CharField(max_length=50, blank=True, default='')
+    total_flight_price = models.FloatField(null=True, blank=True, help_text="Total price of the cheapest flight offer.")
+
+    # Incremented on every save; used for the detail ETag and version-keyed caches
+    version = models.PositiveIntegerField(default=1)
+
+    objects = ItineraryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='planner_itin_user_created_idx'),
+        ]
+
+    @property
+    def full_itinerary(self):
+        """The complete itinerary dict, with referenced sections loaded and cached."""
+        if not self.section_refs:
+            return self.itinerary
+        cached = getattr(self, '_full_itinerary_cache', None)
+        if cached and cached[0] is self.itinerary and cached[1] == self.section_refs:
+            return cached[2]
+        loaded = sections.load_sections(ItinerarySection, self.section_refs.values())
+        full = sections.assemble(self.itinerary, self.section_refs, loaded)
+        self._full_itinerary_cache = (self.itinerary, dict(self.section_refs), full)
+        return full
+
+    @full_itinerary.setter
+    def full_itinerary(self, value):
+        self.itinerary = value or {}
+        self.section_refs = {}
+
+    @classmethod
+    def prefetch_sections(cls, itineraries):
+        """Loads the sections of many itineraries with one query (avoids N+1 in list views)."""
+        itineraries = list(itineraries)
+        hashes = {h for it in itineraries for h in (it.section_refs or {}).values()}
+        loaded = sections.load_sections(ItinerarySection, hashes)
+        for it in itineraries:
+            if it.section_refs:
+                full = sections.assemble(it.itinerary, it.section_refs, loaded)
+                it._full_itinerary_cache = (it.itinerary, dict(it.section_refs), full)
+        return itineraries
+
+    def _split_sections(self):
+        full = self.full_itinerary
+        self.itinerary, self.section_refs, blobs = sections.split_itinerary(full)
+        self._full_itinerary_cache = (self.itinerary, dict(self.section_refs), full)
+        return blobs
+
+    def store_sections(self):
+        """Moves large sections out of line; returns the fields touched."""
+        sections.store_blobs(ItinerarySection, self._split_sections())
+        return {'itinerary', 'section_refs'}
+
+    @classmethod
+    def bulk_create_prepared(cls, itineraries, batch_size=500):
+        """
+        ``bulk_create`` for new itineraries with the work ``save()`` would do:
+        summaries and extracted columns are filled in and the sections of all
+        rows are stored with a single insert.
+        """
+        itineraries = list(itineraries)
+        blobs = {}
+        for it in itineraries:
+            it.refresh_summary()
+            blobs.update(it._split_sections())
+        sections.store_blobs(ItinerarySection, blobs)
+        created = cls.objects.bulk_create(itineraries, batch_size=batch_size)
+        HistoryVersion.bump({it.user_id for it in itineraries})
+        return created
+
+    def refresh_summary(self):
+        """Recomputes ``summary`` and the extracted columns; returns the fields touched."""
+        self.summary = build_itinerary_summary(self.preferences, self.full_itinerary)
+        columns = summary_columns(self.summary)
+        for name, value in columns.items():
+            setattr(self, name, value)
+        return {'summary', *columns}
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'preferences', 'itinerary'}.intersection(update_fields):
+            touched = self.refresh_summary()
+            if update_fields is None or 'itinerary' in update_fields:
+                touched |= self.store_sections()
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | touched
+        if not self._state.adding:
+            self.version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = set(kwargs['update_fields']) | {'version'}
+        super().save(*args, **kwargs)
+        HistoryVersion.bump([self.user_id])
+
     def __str__(self):
         return f"Itinerary {self.id} for {self.user.username if self.user else 'Guest'}"
 
+
+@receiver(post_delete, sender=Itinerary)
+def bump_history_on_delete(sender, instance, origin=None, **kwargs):
+    """Bumps the owner's history version for instance deletes and cascades."""
+    if isinstance(origin, ItineraryQuerySet):
+        return  # bumped once by ItineraryQuerySet.delete()
+    if isinstance(origin, User) or getattr(origin, 'model', None) is User:
+        return  # the user's HistoryVersion is deleted along with them
+    HistoryVersion.bump([instance.user_id])
@@ -0,0 +1,231 @@
+"""Optional process-pool stage for the CPU-heavy parts of a generation.
+
+Network I/O stays on threads in the main process; parsing of large provider
+payloads and day-plan construction can be shipped to a pool of worker
+processes so they do not contend for the main process's GIL.
+
+The pool is off by default (``PLANNER_PROCESS_WORKERS = 0``) and every helper
+then runs inline, so behaviour is identical with or without it. Inputs are kept
+compact: provider responses cross the process boundary as the raw response
+bytes (pickled as a single buffer, decoded only in the worker) and results are
+the small, already-trimmed lists the agents return.
+
+Functions submitted here must be importable at module level so they can be
+pickled by reference.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from .conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _init_worker():
+    """Makes Django usable in spawned workers (fork inherits it already)."""
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+    try:
+        import django
+        from django.apps import apps
+        if not apps.ready:
+            django.setup()
+    except ImportError:
+        pass
+
+
+def _get_pool():
+    global _pool
+    workers = int(get_setting('PLANNER_PROCESS_WORKERS', 0) or 0)
+    if workers <= 0:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                method = get_setting('PLANNER_PROCESS_START_METHOD', None)
+                context = multiprocessing.get_context(method) if method else None
+                _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker)
+                logger.info("Started planner process pool with %d workers", workers)
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=True)
+            _pool = None
+
+
+def run_cpu(fn, *args, payload_size=None):
+    """
+    Runs ``fn(*args)`` in the process pool when enabled, otherwise inline.
+
+    ``payload_size`` (bytes or item count) lets callers skip the pool for inputs
+    smaller than ``PLANNER_PROCESS_MIN_PAYLOAD``, where pickling would cost more
+    than the work itself.
+    """
+    pool = _get_pool()
+    if pool is None:
+        return fn(*args)
+    threshold = int(get_setting('PLANNER_PROCESS_MIN_PAYLOAD', 0) or 0)
+    if payload_size is not None and payload_size < threshold:
+        return fn(*args)
+    try:
+        return pool.submit(fn, *args).result()
+    except BrokenProcessPool:
+        logger.exception("Planner process pool broke; running %s inline and restarting the pool", fn.__name__)
+        shutdown_pool()
+        return fn(*args)
+
+
+# ------------------------------------------------------------------------------
+# CPU-bound stages (run in worker processes when the pool is enabled)
+# ------------------------------------------------------------------------------
+
+def parse_flight_offers(payload: bytes, origin_iata: str, destination_iata: str) -> list:
+    """Decodes an Amadeus flight-offers response and extracts the fields the UI needs."""
+    data = json.loads(payload)
+
+    flight_options = []
+    for offer in data.get("data", []):
+        # Extract relevant details from the Amadeus response
+        outbound = offer['itineraries'][0]  # Outbound flight
+        inbound = offer['itineraries'][1] if len(offer['itineraries']) > 1 else None  # Return flight
+
+        first_segment = outbound['segments'][0]
+        last_segment = outbound['segments'][-1]
+
+        flight_info = {
+            'id': offer['id'],
+            'airline': first_segment['carrierCode'],
+            'price': float(offer['price']['total']),
+            'currency': offer['price']['currency'],
+            'stops': len(outbound['segments']) - 1,
+            'duration': outbound['duration'],
+            'origin': origin_iata,
+            'destination': destination_iata,
+            'departure_time': first_segment['departure']['at'],
+            'arrival_time': last_segment['arrival']['at'],
+            'co2_estimate': offer.get('travelerPricings', [{}])[0].get('fareDetailsBySegment', [{}])[0].get('co2Emissions', {}).get('weight', 0),
+        }
+
+        # Add return flight info if available
+        if inbound:
+            flight_info['return_duration'] = inbound['duration']
+            flight_info['return_departure'] = inbound['segments'][0]['departure']['at']
+
+        flight_options.append(flight_info)
+    return flight_options
+
+
+def parse_hotels(payload: bytes, limit: int = 10) -> list:
+    """Decodes an Amadeus hotels-by-city response into the planner's hotel dicts."""
+    data = json.loads(payload)
+
+    hotel_options = []
+    for hotel in data.get("data", [])[:limit]:
+        hotel_options.append({
+            'id': hotel.get('hotelId', 'N/A'),
+            'name': hotel.get('name', 'Unknown Hotel'),
+            'chain_code': hotel.get('chainCode', 'N/A'),
+            'distance': f"{hotel.get('distance', {}).get('value', 'N/A')} {hotel.get('distance', {}).get('unit', 'KM')}",
+            'address': {
+                'city': hotel.get('address', {}).get('cityName', 'N/A'),
+                'country': hotel.get('address', {}).get('countryCode', 'N/A'),
+                'postal_code': hotel.get('address', {}).get('postalCode', 'N/A'),
+                'lines': hotel.get('address', {}).get('lines', [])
+            },
+            'geo_code': {
+                'latitude': hotel.get('geoCode', {}).get('latitude', 0),
+                'longitude': hotel.get('geoCode', {}).get('longitude', 0)
+            }
+        })
+    return hotel_options
+
+
+def summarize_forecast(payload: bytes) -> list:
+    """Reduces an OpenWeatherMap 3-hour forecast response to one summary per day."""
+    data = json.loads(payload)
+
+    # Group by day to get min/max/summary
+    daily_summaries = {}
+
+    for forecast in data.get('list', []):
+        # Extract date (YYYY-MM-DD) from the timestamp
+        date_str = datetime.fromtimestamp(forecast['dt']).strftime('%Y-%m-%d')
+        temp = forecast['main']['temp']
+        weather_desc = forecast['weather'][0]['description'].lower()
+
+        if date_str not in daily_summaries:
+            daily_summaries[date_str] = {
+                'min_temp_c': temp,
+                'max_temp_c': temp,
+                'rainy_periods': 0,
+                'summary_words': set()
+            }
+
+        # Update min/max temps
+        daily_summaries[date_str]['min_temp_c'] = min(daily_summaries[date_str]['min_temp_c'], temp)
+        daily_summaries[date_str]['max_temp_c'] = max(daily_summaries[date_str]['max_temp_c'], temp)
+
+        # Count rain occurrences
+        if 'rain' in weather_desc or 'shower' in weather_desc:
+            daily_summaries[date_str]['rainy_periods'] += 1
+
+        # Add general description words
+        daily_summaries[date_str]['summary_words'].add(weather_desc)
+
+    # Format for final output list (same as the previous structure)
+    forecast_list = []
+    for date_str, summary in daily_summaries.items():
+
+        # Simple aggregation for 'summary'
+        final_summary = 'Rainy' if summary['rainy_periods'] >= 2 else ', '.join(list(summary['summary_words'])[:2])
+
+        forecast_list.append({
+            'date': date_str,
+            'max_temp_c': round(summary['max_temp_c']),
+            'min_temp_c': round(summary['min_temp_c']),
+            'summary': final_summary.title(),
+        })
+    return forecast_list
+
+
+def build_day_plan(activities: list, days: int) -> list:
+    """Spreads activities over the trip, at most three per day."""
+    acts = activities or []
+    day_plan = []
+    for d in range(days):
+        day_plan.append({
+            'day': d + 1,
+            'activities': acts[d::days][:3] or ['Explore the local area'],
+        })
+    return day_plan
+
+
+def build_multi_city_day_plan(segments: list) -> list:
+    """
+    Joins per-city day plans into one numbered plan. Each segment is
+    ``{'city', 'activities', 'nights', 'travel'}`` (plus ``'departure'`` on the
+    last one when the trip flies home).
+    """
+    day_plan = []
+    for segment in segments:
+        city_days = build_day_plan(segment.get('activities'), segment['nights'])
+        for n, day in enumerate(city_days):
+            day.update({'day': len(day_plan) + 1, 'city': segment['city']})
+            if n == 0 and segment.get('travel'):
+                day['travel'] = segment['travel']
+            day_plan.append(day)
+    if segments and segments[-1].get('departure') and day_plan:
+        day_plan[-1]['departure'] = segments[-1]['departure']
+    return day_plan
@@ -0,0 +1,48 @@
+"""
+Renderers for the planner API.
+
+``ORJSONRenderer`` replaces DRF's ``JSONRenderer`` on the planner views: itinerary
+responses are large nested dicts and ``orjson`` encodes them several times
+faster than the standard library. When ``orjson`` is not installed, or the
+client asks for indented output, it behaves exactly like ``JSONRenderer``.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # optional dependency, fall back to the stdlib encoder
+    orjson = None
+
+from .compact import compact_response
+
+ORJSON_AVAILABLE = orjson is not None
+
+# Datetimes go through DRF's encoder so they keep the 'Z' suffix JSONRenderer emits
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME) if orjson else 0
+
+
+class ORJSONRenderer(JSONRenderer):
+    """``JSONRenderer`` backed by ``orjson``, with the DRF encoder as ``default`` for other types."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        ret = orjson.dumps(data, default=JSONEncoder().default, option=_ORJSON_OPTIONS)
+        # Same escaping as JSONRenderer, keeps the output safe to embed in <script>
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class CompactItineraryRenderer(ORJSONRenderer):
+    """
+    JSON renderer selected with ``?format=compact``: itineraries anywhere in the
+    response are rewritten with ``planner.compact.compact_itinerary``.
+    """
+    format = 'compact'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return super().render(compact_response(data), accepted_media_type, renderer_context)
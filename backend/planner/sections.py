@@ -0,0 +1,139 @@
+"""Content-addressed storage for the large sections of saved itineraries.
+
+Saved itineraries repeat the same sections verbatim (the hotels, weather and
+food & culture guide for a city rarely change between saves), so each large
+section is serialised canonically, hashed with SHA-256 and stored once in the
+``ItinerarySection`` table. ``Itinerary.itinerary`` then keeps only the small
+inline remainder (``meta``, ``co2_kg``, ...) and ``Itinerary.section_refs`` maps
+section names to hashes.
+
+Blobs are compressed with zstd when the optional ``zstandard`` package is
+installed, otherwise with zlib. The encoding is stored per blob, so a table may
+mix both and switching libraries never requires a rewrite.
+
+The helpers take the section model as an argument so they also work with
+historical models (migration 0005 keeps its own copy).
+"""
+import hashlib
+import json
+import zlib
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    zstandard = None
+    ZSTD_AVAILABLE = False
+
+from .conf import get_setting
+
+# Itinerary keys eligible for deduplication; anything else always stays inline
+SECTION_KEYS = ('flights', 'hotels', 'weather', 'activities', 'day_plan', 'packing_list', 'food_culture')
+
+ENCODING_RAW = 'raw'
+ENCODING_ZLIB = 'zlib'
+ENCODING_ZSTD = 'zstd'
+
+# Sections smaller than this (serialised bytes) are cheaper to keep inline
+DEFAULT_MIN_BYTES = 256
+
+
+def canonical_json(value) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def default_encoding() -> str:
+    configured = get_setting('PLANNER_SECTION_COMPRESSION', None)
+    if configured == ENCODING_ZSTD and not ZSTD_AVAILABLE:
+        configured = None
+    if configured in (ENCODING_RAW, ENCODING_ZLIB, ENCODING_ZSTD):
+        return configured
+    return ENCODING_ZSTD if ZSTD_AVAILABLE else ENCODING_ZLIB
+
+
+def encode(raw: bytes, encoding: str) -> bytes:
+    if encoding == ENCODING_ZSTD:
+        return zstandard.ZstdCompressor(level=10).compress(raw)
+    if encoding == ENCODING_ZLIB:
+        return zlib.compress(raw, 6)
+    return raw
+
+
+def decode(data: bytes, encoding: str) -> bytes:
+    data = bytes(data)
+    if encoding == ENCODING_ZSTD:
+        if not ZSTD_AVAILABLE:
+            raise RuntimeError("Itinerary section is zstd-compressed but the 'zstandard' package is not installed.")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if encoding == ENCODING_ZLIB:
+        return zlib.decompress(data)
+    return data
+
+
+def split_itinerary(itinerary, min_bytes=None):
+    """
+    Splits an itinerary into ``(inline, refs, blobs)``.
+
+    ``refs`` maps section name to hash and ``blobs`` maps hash to the canonical
+    JSON bytes of every section that should be stored out of line.
+    """
+    if min_bytes is None:
+        min_bytes = int(get_setting('PLANNER_SECTION_MIN_BYTES', DEFAULT_MIN_BYTES))
+    if not isinstance(itinerary, dict):
+        # Saved JSON is not validated; anything but an object stays inline as-is
+        return itinerary if itinerary is not None else {}, {}, {}
+    inline, refs, blobs = {}, {}, {}
+    for key, value in (itinerary or {}).items():
+        if key in SECTION_KEYS:
+            raw = canonical_json(value)
+            if len(raw) >= min_bytes:
+                digest = hashlib.sha256(raw).hexdigest()
+                refs[key] = digest
+                blobs[digest] = raw
+                continue
+        inline[key] = value
+    return inline, refs, blobs
+
+
+def store_blobs(section_model, blobs, encoding=None):
+    """Inserts the blobs that are not stored yet; returns the number of new rows."""
+    if not blobs:
+        return 0
+    existing = set(section_model.objects.filter(hash__in=list(blobs)).values_list('hash', flat=True))
+    missing = [h for h in blobs if h not in existing]
+    if not missing:
+        return 0
+    encoding = encoding or default_encoding()
+    section_model.objects.bulk_create([
+        section_model(hash=h, data=encode(blobs[h], encoding), encoding=encoding, size=len(blobs[h]))
+        for h in missing
+    ], ignore_conflicts=True)  # a concurrent save may have stored the same content
+    return len(missing)
+
+
+def load_sections(section_model, hashes):
+    """Returns ``{hash: decoded section}`` for the given hashes in one query."""
+    hashes = set(hashes)
+    if not hashes:
+        return {}
+    rows = section_model.objects.filter(hash__in=hashes).values_list('hash', 'data', 'encoding')
+    return {h: json.loads(decode(data, encoding)) for h, data, encoding in rows}
+
+
+def assemble(inline, refs, sections):
+    """
+    Rebuilds the full itinerary from its inline part and loaded sections.
+
+    Inline keys win over references, so an itinerary whose ``itinerary`` field
+    was replaced wholesale (but not saved yet) still reads back correctly.
+    """
+    inline = inline or {}
+    itinerary = {}
+    for key, digest in (refs or {}).items():
+        if key in inline:
+            continue
+        if digest not in sections:
+            raise LookupError(f"Itinerary section {key} ({digest}) is missing from storage")
+        itinerary[key] = sections[digest]
+    itinerary.update(inline)
+    return itinerary
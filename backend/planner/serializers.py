@@ -3,7 +3,40 @@ from .models import Itinerary
 
 
 class ItinerarySerializer(serializers.ModelSerializer):
+    # Reassembled from the deduplicated section storage
+    itinerary = serializers.JSONField(source='full_itinerary')
+
+    class Meta:
+        model = Itinerary
+        fields = ['id', 'user', 'preferences', 'itinerary', 'status', 'summary', 'created_at']
+        read_only_fields = ['id', 'summary', 'created_at']
+
+
+class ItinerarySummarySerializer(serializers.ModelSerializer):
+    """History list entry built only from the precomputed summary columns."""
+
     class Meta:
         model = Itinerary
-        fields = ['id', 'user', 'preferences', 'itinerary', 'status', 'created_at']
-        read_only_fields = ['id', 'created_at']
+        fields = ['id', 'destination', 'start_date', 'end_date', 'status', 'summary', 'created_at']
+        read_only_fields = fields
+
+
+class ItineraryReadSerializer(serializers.BaseSerializer):
+    """
+    Read-only equivalent of ``ItinerarySerializer`` for list responses.
+
+    Produces the same output, but copies the JSON columns through as they are
+    instead of running every row through the ModelSerializer field machinery.
+    """
+    _created_at = serializers.DateTimeField()
+
+    def to_representation(self, instance):
+        return {
+            'id': instance.pk,
+            'user': instance.user_id,
+            'preferences': instance.preferences,
+            'itinerary': instance.full_itinerary,
+            'status': instance.status,
+            'summary': instance.summary,
+            'created_at': self._created_at.to_representation(instance.created_at),
+        }
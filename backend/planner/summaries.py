@@ -0,0 +1,91 @@
+"""Small, precomputed summaries of saved itineraries.
+
+History list views render from these instead of decoding the full
+``preferences``/``itinerary`` JSON blobs. The helpers are plain functions so
+management commands can use them on historical models (migrations keep their
+own copies).
+"""
+from datetime import date
+
+
+def _trip_dates(flights):
+    """Departure/return dates (YYYY-MM-DD) of the first flight option, if known."""
+    if not flights or not isinstance(flights[0], dict):
+        return None, None
+    first = flights[0]
+    departure = str(first.get('departure_time') or '')[:10] or None
+    returning = str(first.get('return_departure') or '')[:10] or None
+    # Mock flights only carry a clock time ('08:00'), which is not a date
+    if departure and len(departure) != 10:
+        departure = None
+    if returning and len(returning) != 10:
+        returning = None
+    return departure, returning
+
+
+def build_itinerary_summary(preferences, itinerary):
+    """Returns the compact summary stored on ``Itinerary.summary``."""
+    # Saved JSON is not validated, so any of these may be a list, string or number
+    preferences = preferences if isinstance(preferences, dict) else {}
+    itinerary = itinerary if isinstance(itinerary, dict) else {}
+    meta = itinerary.get('meta') if isinstance(itinerary.get('meta'), dict) else {}
+    flights = itinerary.get('flights') if isinstance(itinerary.get('flights'), list) else []
+    hotels = itinerary.get('hotels') if isinstance(itinerary.get('hotels'), list) else []
+    prices = [f.get('price') for f in flights if isinstance(f, dict) and isinstance(f.get('price'), (int, float))]
+    departure, returning = _trip_dates(flights)
+    lowest_price = min(prices) if prices else None
+    if meta.get('mode') == 'multi_city':
+        # Flights cover several legs; the trip dates and price are in meta
+        departure, returning = meta.get('start_date'), meta.get('end_date')
+        lowest_price = meta.get('total_flight_price')
+    return {
+        'destination': meta.get('destination') or preferences.get('destination'),
+        'origin': preferences.get('origin'),
+        'days': meta.get('days') or preferences.get('Days'),
+        'budget': meta.get('budget') or preferences.get('budget'),
+        'start_date': departure,
+        'end_date': returning,
+        'flight_count': len(flights),
+        'hotel_count': len(hotels),
+        'lowest_price': lowest_price,
+        'currency': next((f.get('currency') for f in flights if isinstance(f, dict) and f.get('currency')), None),
+    }
+
+
+def _parse_date(value):
+    try:
+        return date.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Largest value the PositiveSmallIntegerField ``days`` column accepts
+MAX_DAYS = 32767
+
+
+def _parse_int(value):
+    try:
+        number = int(value) if value not in (None, '') else None
+    except (TypeError, ValueError, OverflowError):
+        return None
+    return number if number is not None and 0 <= number <= MAX_DAYS else None
+
+
+def _text(value, max_length):
+    # Summaries copy user JSON, which may hold numbers where text is expected
+    return '' if value is None else str(value)[:max_length]
+
+
+def summary_columns(summary):
+    """Maps a summary dict onto the indexed ``Itinerary`` columns."""
+    summary = summary or {}
+    price = summary.get('lowest_price')
+    return {
+        'destination': _text(summary.get('destination'), 255),
+        'origin': _text(summary.get('origin'), 255),
+        'start_date': _parse_date(summary.get('start_date')),
+        'end_date': _parse_date(summary.get('end_date')),
+        'days': _parse_int(summary.get('days')),
+        'budget': _text(summary.get('budget'), 50),
+        'total_flight_price': float(price) if isinstance(price, (int, float)) else None,
+    }
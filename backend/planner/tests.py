@@ -0,0 +1,524 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser, Group
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from rest_framework.exceptions import Throttled
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import User
+
+from . import admission, exports, throttling, writebatch
+from .admission import ANONYMOUS, AUTHENTICATED, PRIORITY, REGENERATE, AdmissionController, Overloaded
+from .executor import ExecutorFull
+from .models import HistoryVersion, Itinerary
+
+
+def api_request(user=None, data=None, ip='10.0.0.1'):
+    request = Request(APIRequestFactory().post('/', data or {}, format='json', REMOTE_ADDR=ip), parsers=[JSONParser()])
+    request.user = user or AnonymousUser()
+    return request
+
+
+@override_settings(
+    PLANNER_GENERATE_RATE_PER_MINUTE=60,
+    PLANNER_GENERATE_BURST=2,
+    PLANNER_BATCH_RATE_PER_MINUTE=60,
+    PLANNER_BATCH_BURST=10,
+    PLANNER_GENERATE_MAX_CONCURRENT=2,
+    PLANNER_GENERATE_SLOT_LEASE_SECONDS=300,
+    PLANNER_GENERATE_RETRY_AFTER=7,
+    PLANNER_ADMISSION_MAX_INFLIGHT=0,
+)
+class GenerationLimitTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('limits@example.com', 'Li', 'Mit', 'limits-secret')
+
+    def allow(self, throttle, request, now=1000.0):
+        with mock.patch.object(throttling.time, 'time', return_value=now):
+            return throttle.allow_request(request, None)
+
+    def test_bucket_allows_the_burst_then_throttles(self):
+        throttle = throttling.GenerationRateThrottle()
+        request = api_request(self.user)
+        self.assertTrue(self.allow(throttle, request))
+        self.assertTrue(self.allow(throttle, request))
+        self.assertFalse(self.allow(throttle, request))
+        self.assertAlmostEqual(throttle.wait(), 1.0)
+
+    def test_bucket_refills_at_the_configured_rate(self):
+        throttle = throttling.GenerationRateThrottle()
+        request = api_request(self.user)
+        for _ in range(2):
+            self.allow(throttle, request, now=1000.0)
+        self.assertFalse(self.allow(throttle, request, now=1000.5))
+        self.assertTrue(self.allow(throttle, request, now=1001.0))
+        self.assertFalse(self.allow(throttle, request, now=1001.0))
+
+    def test_buckets_are_kept_per_user_and_per_client_ip(self):
+        throttle = throttling.GenerationRateThrottle()
+        for request in (api_request(self.user), api_request(ip='10.0.0.1')):
+            for _ in range(2):
+                self.assertTrue(self.allow(throttle, request))
+            self.assertFalse(self.allow(throttle, request))
+        self.assertTrue(self.allow(throttle, api_request(ip='10.0.0.2')))
+
+    def test_anonymous_bucket_ignores_forwarded_for_without_proxies(self):
+        throttle = throttling.GenerationRateThrottle()
+        request = api_request(ip='10.0.0.1')
+        request._request.META['HTTP_X_FORWARDED_FOR'] = '203.0.113.9'
+        self.assertTrue(throttle.bucket_key(request).endswith(':ip:10.0.0.1'))
+
+    def test_zero_rate_disables_the_bucket(self):
+        throttle = throttling.GenerationRateThrottle()
+        with self.settings(PLANNER_GENERATE_RATE_PER_MINUTE=0):
+            for _ in range(5):
+                self.assertTrue(self.allow(throttle, api_request(self.user)))
+
+    def test_batch_bucket_charges_one_token_per_traveller(self):
+        throttle = throttling.BatchGenerationRateThrottle()
+        six = api_request(self.user, {'preferences': [{'destination': 'Rome'}] * 6})
+        self.assertTrue(self.allow(throttle, six))
+        self.assertFalse(self.allow(throttle, six))
+        self.assertAlmostEqual(throttle.wait(), 2.0)
+        # Separate from the single-generation bucket
+        self.assertTrue(self.allow(throttling.GenerationRateThrottle(), api_request(self.user)))
+
+    def test_batch_larger_than_the_burst_drains_a_full_bucket(self):
+        throttle = throttling.BatchGenerationRateThrottle()
+        huge = api_request(self.user, {'preferences': [{'destination': 'Rome'}] * 50})
+        self.assertTrue(self.allow(throttle, huge))
+        self.assertFalse(self.allow(throttle, api_request(self.user, {'preferences': [{}]})))
+
+    def test_generation_slots_are_capped_and_released(self):
+        with throttling.generation_slot(), throttling.generation_slot():
+            self.assertEqual(throttling.utilisation()['active'], 2)
+            with self.assertRaises(Throttled) as raised, throttling.generation_slot():
+                pass
+            self.assertEqual(raised.exception.wait, 7)
+        self.assertEqual(throttling.utilisation()['active'], 0)
+
+    def test_multi_slot_acquisition_is_all_or_nothing(self):
+        with throttling.generation_slot():
+            with self.assertRaises(Throttled), throttling.generation_slot(2):
+                pass
+            self.assertEqual(throttling.utilisation()['active'], 1)
+        with throttling.generation_slot(5):
+            self.assertEqual(throttling.utilisation()['active'], 2)
+
+    def test_expired_slot_taken_over_is_not_freed_by_its_old_holder(self):
+        key = throttling._slot_keys(2)[0]
+        with throttling.generation_slot():
+            # The lease ran out and another worker took the slot
+            cache.set(key, 'other-worker', 300)
+        self.assertEqual(cache.get(key), 'other-worker')
+
+    def test_generate_endpoint_returns_429_with_retry_after(self):
+        with mock.patch('planner.views.orchestrate_itinerary', return_value={'ok': True, 'itinerary': {}}):
+            statuses = [self.client.post('/api/planner/generate/', {'preferences': {}},
+                                         content_type='application/json', REMOTE_ADDR='10.0.0.9')
+                        for _ in range(3)]
+        self.assertEqual([r.status_code for r in statuses], [200, 200, 429])
+        self.assertEqual(statuses[-1]['Retry-After'], '1')
+
+    def test_full_executor_returns_503_with_retry_after(self):
+        full = ExecutorFull('planner-agent queue is full (256 tasks)')
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {self.user.tokens()['access']}"}
+        requests = [
+            ('planner.views.orchestrate_itinerary', '/api/planner/generate/', {'preferences': {}}),
+            ('planner.views.regenerate_itinerary', '/api/planner/regenerate/',
+             {'preferences': {}, 'previous': {'preferences': {}, 'itinerary': {'meta': {}}}}),
+            ('planner.views.batch_orchestrate', '/api/planner/generate/batch/', {'preferences': [{}]}),
+        ]
+        for target, url, body in requests:
+            with mock.patch(target, side_effect=full), self.assertLogs('planner.views', 'ERROR'):
+                response = self.client.post(url, body, content_type='application/json', **auth)
+            self.assertEqual(response.status_code, 503, url)
+            self.assertEqual(response['Retry-After'], '7')
+
+
+class AdmissionTests(TestCase):
+
+    def saturated(self, **options):
+        controller = AdmissionController(**{'max_inflight': 1, 'max_queue': 8, 'slo_ms': 0, 'max_wait': 5, **options})
+        controller.acquire(AUTHENTICATED)
+        return controller
+
+    def enqueue(self, controller, priority, outcomes):
+        """Starts a request of ``priority`` in a thread and waits until the controller has seen it."""
+        def progress():
+            return len(controller._queue) + sum(controller.shed.values()) + sum(controller.admitted.values())
+
+        def run():
+            try:
+                controller.acquire(priority)
+                outcomes.append((priority, 'admitted'))
+            except Overloaded as e:
+                outcomes.append((priority, e.reason))
+
+        before = progress()
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while progress() == before and time.monotonic() < deadline:
+            time.sleep(0.001)
+        return thread
+
+    def wait_for(self, outcomes, count):
+        deadline = time.monotonic() + 5
+        while len(outcomes) < count and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.assertEqual(len(outcomes), count)
+
+    def test_free_capacity_is_admitted_immediately(self):
+        controller = AdmissionController(max_inflight=2, max_queue=8, slo_ms=1000, max_wait=5)
+        controller.ewma_wait[AUTHENTICATED] = 10.0
+        controller.acquire(ANONYMOUS)
+        controller.acquire(ANONYMOUS)
+        self.assertEqual(controller.inflight, 2)
+        controller.release()
+        controller.release()
+        self.assertEqual(controller.inflight, 0)
+
+    def test_release_admits_waiters_in_priority_order(self):
+        controller = self.saturated()
+        outcomes = []
+        threads = [self.enqueue(controller, priority, outcomes)
+                   for priority in (ANONYMOUS, REGENERATE, AUTHENTICATED, PRIORITY, AUTHENTICATED)]
+        self.assertEqual([w.priority for w in controller._queue],
+                         [PRIORITY, AUTHENTICATED, AUTHENTICATED, REGENERATE, ANONYMOUS])
+
+        for count in range(1, len(threads) + 1):
+            controller.release()
+            self.wait_for(outcomes, count)
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual([priority for priority, _ in outcomes],
+                         [PRIORITY, AUTHENTICATED, AUTHENTICATED, REGENERATE, ANONYMOUS])
+        self.assertEqual(controller.admitted['authenticated'], 3)
+
+    def test_full_queue_evicts_the_newest_lowest_priority_waiter(self):
+        controller = self.saturated(max_queue=2)
+        outcomes = []
+        first = self.enqueue(controller, ANONYMOUS, outcomes)
+        newest = self.enqueue(controller, ANONYMOUS, outcomes)
+
+        self.enqueue(controller, AUTHENTICATED, outcomes)
+        newest.join(5)
+
+        self.assertEqual(outcomes, [(ANONYMOUS, 'evicted')])
+        self.assertEqual([w.priority for w in controller._queue], [AUTHENTICATED, ANONYMOUS])
+        self.assertEqual(controller.shed['anonymous:evicted'], 1)
+
+        # Nothing worse left to evict: an equal or lower priority request is turned away
+        with self.assertRaises(Overloaded) as raised:
+            controller.acquire(ANONYMOUS)
+        self.assertEqual(raised.exception.reason, 'queue_full')
+        self.assertEqual(raised.exception.status_code, 503)
+
+        controller.release()
+        controller.release()
+        first.join(5)
+        self.assertEqual(controller.inflight, 1)
+
+    def test_waiters_time_out_after_max_wait(self):
+        controller = self.saturated(max_wait=0.05)
+        with self.assertRaises(Overloaded) as raised:
+            controller.acquire(AUTHENTICATED)
+        self.assertEqual(raised.exception.reason, 'timeout')
+        self.assertEqual(controller._queue, [])
+        self.assertEqual(controller.shed['authenticated:timeout'], 1)
+
+    def test_pressure_sheds_lower_classes_first(self):
+        controller = self.saturated(slo_ms=1000, max_wait=0.05)
+        # Recent authenticated requests waited 80% of the SLO
+        controller.ewma_wait[AUTHENTICATED] = 0.8
+
+        for priority in (ANONYMOUS, REGENERATE):
+            with self.assertRaises(Overloaded) as raised:
+                controller.acquire(priority)
+            self.assertEqual(raised.exception.reason, 'pressure')
+            self.assertEqual(raised.exception.wait, 1)
+        # Still under its own threshold, so it queues (and times out here)
+        with self.assertRaises(Overloaded) as raised:
+            controller.acquire(AUTHENTICATED)
+        self.assertEqual(raised.exception.reason, 'timeout')
+        # Slower lower-priority traffic does not count against better classes
+        controller.ewma_wait[AUTHENTICATED] = 0.0
+        controller.ewma_wait[ANONYMOUS] = 5.0
+        self.assertEqual(controller.pressure(AUTHENTICATED), 0.0)
+
+        self.assertEqual(controller.shed, {'anonymous:pressure': 1, 'regenerate:pressure': 1,
+                                           'authenticated:timeout': 1})
+
+    def test_priority_is_never_shed_for_pressure(self):
+        controller = self.saturated(slo_ms=1000, max_wait=0.05)
+        controller.ewma_wait[PRIORITY] = 10.0
+        with self.assertRaises(Overloaded) as raised:
+            controller.acquire(PRIORITY)
+        self.assertEqual(raised.exception.reason, 'timeout')
+
+    def test_zero_max_inflight_disables_admission(self):
+        controller = AdmissionController(max_inflight=0)
+        with controller.admit(ANONYMOUS), controller.admit(ANONYMOUS):
+            self.assertEqual(controller.inflight, 0)
+
+    def test_priority_for_request(self):
+        user = User.objects.create_user('admission@example.com', 'Ad', 'Mission', 'admission-secret')
+        self.assertEqual(admission.priority_for(api_request()), ANONYMOUS)
+        self.assertEqual(admission.priority_for(api_request(user)), AUTHENTICATED)
+        self.assertEqual(admission.priority_for(api_request(user), regenerate=True), REGENERATE)
+        with self.settings(PLANNER_ADMISSION_PRIORITY_GROUP='paying'):
+            user.groups.add(Group.objects.create(name='paying'))
+            self.assertEqual(admission.priority_for(api_request(user)), PRIORITY)
+
+    @override_settings(PLANNER_GENERATE_RATE_PER_MINUTE=0)
+    def test_shed_request_returns_503_with_retry_after(self):
+        controller = self.saturated(slo_ms=3000)
+        controller.ewma_wait[AUTHENTICATED] = 3.0
+        with mock.patch.object(admission, 'get_controller', return_value=controller):
+            response = self.client.post('/api/planner/generate/', {'preferences': {}}, content_type='application/json')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '3')
+
+
+@override_settings(PLANNER_SAVE_COALESCING=True, PLANNER_SAVE_BATCH_WINDOW_MS=0, PLANNER_SAVE_BATCH_MAX=64)
+class SaveCoalescerTests(TransactionTestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('saves@example.com', 'Sa', 'Ves', 'saves-secret')
+        self.coalescer = writebatch.SaveCoalescer()
+
+    def itinerary(self, destination):
+        return Itinerary(user=self.user, preferences={'destination': destination}, itinerary={'meta': {}})
+
+    def save_concurrently(self, first, others):
+        """
+        Saves ``first``, holds its batch open until ``others`` are all queued
+        behind it, then lets everything commit. Returns the size of every
+        batch and each itinerary's outcome (the itinerary or the exception).
+        """
+        started, release = threading.Event(), threading.Event()
+        original = Itinerary.bulk_create_prepared
+        batches, outcomes = [], {}
+
+        def gated(itineraries, **kwargs):
+            batches.append(len(itineraries))
+            if len(batches) == 1:
+                started.set()
+                release.wait(5)
+            return original(itineraries, **kwargs)
+
+        def run(itinerary):
+            try:
+                outcomes[id(itinerary)] = self.coalescer.save(itinerary)
+            except Exception as e:
+                outcomes[id(itinerary)] = e
+            finally:
+                connection.close()
+
+        with mock.patch.object(Itinerary, 'bulk_create_prepared', side_effect=gated):
+            threads = [threading.Thread(target=run, args=(first,))]
+            threads[0].start()
+            started.wait(5)
+            for itinerary in others:
+                threads.append(threading.Thread(target=run, args=(itinerary,)))
+                threads[-1].start()
+            deadline = time.monotonic() + 5
+            while len(self.coalescer._pending) < len(others) and time.monotonic() < deadline:
+                time.sleep(0.001)
+            release.set()
+            for thread in threads:
+                thread.join(5)
+        return batches, [outcomes[id(itinerary)] for itinerary in (first, *others)]
+
+    def test_save_inserts_the_row(self):
+        it = writebatch.save_itinerary(self.itinerary('Rome'))
+        self.assertIsNotNone(it.pk)
+        saved = Itinerary.objects.get(pk=it.pk)
+        self.assertEqual(saved.destination, 'Rome')
+        self.assertEqual(saved.user, self.user)
+
+    def test_concurrent_saves_are_committed_together(self):
+        batches, outcomes = self.save_concurrently(self.itinerary('Rome'),
+                                                   [self.itinerary(city) for city in ('Oslo', 'Lima', 'Pune')])
+
+        self.assertEqual(batches, [1, 3])
+        self.assertTrue(all(isinstance(outcome, Itinerary) and outcome.pk for outcome in outcomes))
+        self.assertEqual(set(Itinerary.objects.values_list('destination', flat=True)), {'Rome', 'Oslo', 'Lima', 'Pune'})
+        self.assertEqual(self.coalescer.stats(), {'batches': 2, 'rows': 4, 'largest_batch': 3, 'rows_per_batch': 2.0})
+
+    def test_batches_are_capped_at_batch_max(self):
+        with self.settings(PLANNER_SAVE_BATCH_MAX=2):
+            batches, _ = self.save_concurrently(self.itinerary('Rome'),
+                                                [self.itinerary(city) for city in ('Oslo', 'Lima', 'Pune')])
+        self.assertEqual(batches, [1, 2, 1])
+        self.assertEqual(Itinerary.objects.count(), 4)
+
+    def test_failed_batch_falls_back_to_saving_rows_one_at_a_time(self):
+        bad = self.itinerary('Nowhere')
+        # Not JSON serializable: fails the whole batch insert, and then its own save
+        bad.itinerary = {'meta': {}, 'flights': object()}
+
+        with self.assertLogs('planner.writebatch', 'WARNING') as logs:
+            batches, outcomes = self.save_concurrently(self.itinerary('Rome'),
+                                                       [self.itinerary('Oslo'), bad, self.itinerary('Lima')])
+
+        self.assertEqual(batches, [1, 3])
+        self.assertIn('saving one at a time', logs.output[0])
+        self.assertIsInstance(outcomes[2], TypeError)
+        for outcome in (outcomes[0], outcomes[1], outcomes[3]):
+            self.assertIsInstance(outcome, Itinerary)
+        self.assertEqual(set(Itinerary.objects.values_list('destination', flat=True)), {'Rome', 'Oslo', 'Lima'})
+
+    def test_coalescing_can_be_turned_off(self):
+        with self.settings(PLANNER_SAVE_COALESCING=False), \
+                mock.patch.object(writebatch._coalescer, 'save') as coalesced:
+            it = writebatch.save_itinerary(self.itinerary('Rome'))
+        coalesced.assert_not_called()
+        self.assertTrue(Itinerary.objects.filter(pk=it.pk).exists())
+
+    def test_saves_inside_a_transaction_are_not_coalesced(self):
+        with transaction.atomic(), mock.patch.object(writebatch._coalescer, 'save') as coalesced:
+            it = writebatch.save_itinerary(self.itinerary('Rome'))
+        coalesced.assert_not_called()
+        self.assertTrue(Itinerary.objects.filter(pk=it.pk).exists())
+
+    @override_settings(PLANNER_SAVE_WAIT_SECONDS=0.1)
+    def test_waiting_for_a_stalled_batch_fails_the_request(self):
+        started, release = threading.Event(), threading.Event()
+        original = Itinerary.bulk_create_prepared
+
+        def stalled(itineraries, **kwargs):
+            started.set()
+            release.wait(5)
+            return original(itineraries, **kwargs)
+
+        def lead():
+            try:
+                self.coalescer.save(self.itinerary('Rome'))
+            finally:
+                connection.close()
+
+        with mock.patch.object(Itinerary, 'bulk_create_prepared', side_effect=stalled):
+            leader = threading.Thread(target=lead)
+            leader.start()
+            started.wait(5)
+            with self.assertRaises(writebatch.SaveTimeout) as raised, self.assertLogs('planner.writebatch', 'WARNING'):
+                self.coalescer.save(self.itinerary('Oslo'))
+            release.set()
+            leader.join(5)
+
+        self.assertEqual(raised.exception.status_code, 503)
+        self.assertEqual(self.coalescer._pending, [])
+        self.assertEqual(list(Itinerary.objects.values_list('destination', flat=True)), ['Rome'])
+
+
+class ItinerarySaveTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('saver@example.com', 'Sa', 'Ver', 'saver-secret')
+        self.auth = {'HTTP_AUTHORIZATION': f"Bearer {self.user.tokens()['access']}"}
+
+    def post(self, url, body):
+        return self.client.post(url, body, content_type='application/json', **self.auth)
+
+    def test_numeric_text_fields_are_stored_as_text(self):
+        response = self.post('/api/planner/save/', {
+            'preferences': {'budget': 1500, 'destination': 42, 'origin': 7.5, 'Days': '4'}, 'itinerary': {},
+        })
+        self.assertEqual(response.status_code, 201)
+        it = Itinerary.objects.get(pk=response.data['id'])
+        self.assertEqual((it.budget, it.destination, it.origin, it.days), ('1500', '42', '7.5', 4))
+
+    def test_out_of_range_days_are_dropped(self):
+        for days in (-3, 40000):
+            response = self.post('/api/planner/save/', {'preferences': {'Days': days}, 'itinerary': {}})
+            self.assertEqual(response.status_code, 201)
+            self.assertIsNone(Itinerary.objects.get(pk=response.data['id']).days)
+
+    def test_bulk_save_accepts_numeric_budget_and_negative_days(self):
+        response = self.post('/api/planner/bulk/save/', {'itineraries': [
+            {'preferences': {'budget': 1500}, 'itinerary': {}},
+            {'preferences': {'Days': -3}, 'itinerary': {}},
+        ]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual(sorted(Itinerary.objects.values_list('budget', 'days')), [('', None), ('1500', None)])
+
+    def test_non_object_preferences_and_meta_are_saved(self):
+        for body in ({'preferences': {'destination': 'Rome'}, 'itinerary': {'meta': 'Rome trip'}},
+                     {'preferences': {'destination': 'Rome'}, 'itinerary': {'meta': ['Rome'], 'flights': {'0': {}}}},
+                     {'preferences': ['Rome'], 'itinerary': {}}):
+            response = self.post('/api/planner/save/', body)
+            self.assertEqual(response.status_code, 201, body)
+        self.assertEqual(list(Itinerary.objects.order_by('pk').values_list('destination', flat=True)), ['Rome', 'Rome', ''])
+
+    def test_non_object_itinerary_is_stored_inline(self):
+        response = self.post('/api/planner/save/', {'preferences': {}, 'itinerary': ['Rome', 'Oslo']})
+        self.assertEqual(response.status_code, 201)
+        it = Itinerary.objects.get(pk=response.data['id'])
+        self.assertEqual((it.itinerary, it.section_refs), (['Rome', 'Oslo'], {}))
+
+    def test_exports_handle_mixed_flight_prices(self):
+        flights = [{'airline': 'A', 'price': '120 EUR'}, {'airline': 'B', 'price': 95}, {'airline': 'C'}]
+        response = self.post('/api/planner/save/', {'preferences': {}, 'itinerary': {'flights': flights}})
+        self.assertEqual(exports.booked_flights({'flights': flights}), [flights[1]])
+
+        for kind, end in (('ics', b'END:VCALENDAR\r\n'), ('pdf', b'%%EOF\n')):
+            export = self.client.get(f"/api/planner/itineraries/{response.data['id']}/export.{kind}", **self.auth)
+            self.assertEqual(export.status_code, 200)
+            self.assertTrue(b''.join(export.streaming_content).endswith(end), kind)
+
+
+class HistoryVersionTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user('history@example.com', 'Hi', 'Story', 'history-secret')
+        self.trips = [Itinerary.objects.create(user=self.user, preferences={'destination': city}, itinerary={})
+                      for city in ('Rome', 'Oslo')]
+
+    def version(self):
+        return HistoryVersion.current(self.user.pk)
+
+    def test_instance_delete_bumps(self):
+        before = self.version()
+        self.trips[0].delete()
+        self.assertEqual(self.version(), before + 1)
+
+    def test_queryset_writes_bump_once(self):
+        before = self.version()
+        Itinerary.objects.filter(user=self.user).update(status='APPROVED')
+        self.assertEqual(self.version(), before + 1)
+        Itinerary.objects.bulk_update(self.trips, ['status'])
+        self.assertEqual(self.version(), before + 2)
+        Itinerary.objects.filter(user=self.user).delete()
+        self.assertEqual(self.version(), before + 3)
+
+    def test_writes_that_match_nothing_do_not_bump(self):
+        before = self.version()
+        Itinerary.objects.filter(pk=0).update(status='APPROVED')
+        Itinerary.objects.filter(pk=0).delete()
+        self.assertEqual(self.version(), before)
+
+    def test_deleting_the_user_cascades_cleanly(self):
+        self.user.delete()
+        self.assertFalse(Itinerary.objects.exists())
+        self.assertFalse(HistoryVersion.objects.exists())
+
+    def test_history_etag_changes_after_a_queryset_delete(self):
+        auth = {'HTTP_AUTHORIZATION': f"Bearer {self.user.tokens()['access']}"}
+        etag = self.client.get('/api/planner/history/', **auth)['ETag']
+        self.assertEqual(self.client.get('/api/planner/history/', HTTP_IF_NONE_MATCH=etag, **auth).status_code, 304)
+
+        Itinerary.objects.filter(pk=self.trips[0].pk).delete()
+
+        self.assertEqual(self.client.get('/api/planner/history/', HTTP_IF_NONE_MATCH=etag, **auth).status_code, 200)
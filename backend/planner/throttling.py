@@ -0,0 +1,175 @@
+"""
+Rate and concurrency limits for itinerary generation.
+
+A single ``/generate/`` call can fan out into three Gemini and up to six
+Amadeus requests, so generation endpoints are limited twice, with all state in
+the Django cache so every worker sharing that cache sees the same limits:
+
+* ``GenerationRateThrottle`` (a DRF throttle) gives each user, or each client
+  IP when anonymous, a token bucket of ``PLANNER_GENERATE_BURST`` requests
+  refilled at ``PLANNER_GENERATE_RATE_PER_MINUTE``. Bucket updates are
+  read-modify-write, so concurrent requests from one client can occasionally
+  get one extra token; that is acceptable for quota protection.
+  ``BatchGenerationRateThrottle`` keeps a separate bucket for batch generation
+  that is charged one token per traveller (``PLANNER_BATCH_BURST`` travellers,
+  refilled at ``PLANNER_BATCH_RATE_PER_MINUTE``).
+* ``generation_slot()`` caps generations running at once across all workers at
+  ``PLANNER_GENERATE_MAX_CONCURRENT``. Each slot is a cache key taken with the
+  atomic ``cache.add`` and given a lease of ``PLANNER_GENERATE_SLOT_LEASE_SECONDS``,
+  so a worker that dies mid-generation cannot hold its slot forever. A batch
+  holds several slots, one per traveller it plans at once.
+
+Both reject with 429 and ``Retry-After``. ``utilisation()`` reports the
+current state (served at ``GET /api/planner/generate/status/``).
+
+With the default per-process local-memory cache the limits apply per process;
+set ``CACHE_URL`` to a shared cache to enforce them across workers.
+"""
+import math
+import time
+import uuid
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+from rest_framework.throttling import BaseThrottle
+
+from .conf import get_setting
+
+BUCKET_PREFIX = 'planner:generate:bucket'
+BATCH_BUCKET_PREFIX = 'planner:batch:bucket'
+SLOT_PREFIX = 'planner:generate:slot'
+
+
+def _rate_per_second():
+    return get_setting('PLANNER_GENERATE_RATE_PER_MINUTE', 6) / 60.0
+
+
+def _burst():
+    return get_setting('PLANNER_GENERATE_BURST', 5)
+
+
+def _max_concurrent():
+    return get_setting('PLANNER_GENERATE_MAX_CONCURRENT', 8)
+
+
+class GenerationRateThrottle(BaseThrottle):
+    """
+    Token bucket per user (or per client IP for anonymous requests: ``REMOTE_ADDR``,
+    or ``X-Forwarded-For`` when ``NUM_PROXIES`` is above 0).
+    """
+    prefix = BUCKET_PREFIX
+
+    def __init__(self):
+        self._wait = None
+
+    def limits(self):
+        """``(tokens per second, burst)``; either at 0 disables the throttle."""
+        return _rate_per_second(), _burst()
+
+    def cost(self, request):
+        return 1
+
+    def bucket_key(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'{self.prefix}:user:{request.user.pk}'
+        return f'{self.prefix}:ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        rate, burst = self.limits()
+        if rate <= 0 or burst <= 0:
+            return True
+        # A request costing more than the burst could never pass; it drains a full bucket instead
+        cost = min(self.cost(request), burst)
+        key = self.bucket_key(request)
+        now = time.time()
+        tokens = _refill(cache.get(key), now, rate, burst)
+        # An untouched bucket is full again after this long, so the entry can expire then
+        timeout = math.ceil(burst / rate) + 1
+        if tokens >= cost:
+            cache.set(key, (tokens - cost, now), timeout)
+            return True
+        cache.set(key, (tokens, now), timeout)
+        self._wait = (cost - tokens) / rate
+        return False
+
+    def wait(self):
+        return self._wait
+
+
+class BatchGenerationRateThrottle(GenerationRateThrottle):
+    """Separate bucket for batch generation, charged one token per traveller."""
+    prefix = BATCH_BUCKET_PREFIX
+
+    def limits(self):
+        return get_setting('PLANNER_BATCH_RATE_PER_MINUTE', 60) / 60.0, get_setting('PLANNER_BATCH_BURST', 100)
+
+    def cost(self, request):
+        preference_list = request.data.get('preferences')
+        # Malformed bodies are rejected by the view; they still cost one token
+        return max(len(preference_list), 1) if isinstance(preference_list, list) else 1
+
+
+def _refill(state, now, rate, burst):
+    if state is None:
+        return float(burst)
+    tokens, stamp = state
+    return min(float(burst), tokens + max(now - stamp, 0) * rate)
+
+
+def bucket_state(request, throttle_class=GenerationRateThrottle):
+    """Tokens currently left in the caller's bucket."""
+    throttle = throttle_class()
+    rate, burst = throttle.limits()
+    tokens = _refill(cache.get(throttle.bucket_key(request)), time.time(), rate, burst)
+    return {'tokens': round(tokens, 2), 'burst': burst, 'per_minute': round(rate * 60, 2)}
+
+
+def _slot_keys(limit):
+    return [f'{SLOT_PREFIX}:{n}' for n in range(limit)]
+
+
+@contextmanager
+def generation_slot(slots=1):
+    """
+    Holds ``slots`` of the global generation slots (at most all of them), or
+    raises ``Throttled`` (429) without holding any.
+    """
+    limit = _max_concurrent()
+    if limit <= 0:
+        yield
+        return
+    wanted = min(max(slots, 1), limit)
+    token = uuid.uuid4().hex
+    lease = get_setting('PLANNER_GENERATE_SLOT_LEASE_SECONDS', 300)
+    held = []
+    for key in _slot_keys(limit):
+        if cache.add(key, token, lease):
+            held.append(key)
+            if len(held) == wanted:
+                break
+    else:
+        _release(held, token)
+        raise Throttled(wait=get_setting('PLANNER_GENERATE_RETRY_AFTER', 5),
+                        detail='Planner is busy, please retry shortly.')
+    try:
+        yield
+    finally:
+        _release(held, token)
+
+
+def _release(keys, token):
+    # Only free slots whose lease did not expire and get taken over meanwhile
+    for key in keys:
+        if cache.get(key) == token:
+            cache.delete(key)
+
+
+def utilisation():
+    limit = _max_concurrent()
+    active = len(cache.get_many(_slot_keys(limit))) if limit > 0 else 0
+    return {
+        'active': active,
+        'limit': limit,
+        'utilisation': round(active / limit, 3) if limit > 0 else None,
+    }
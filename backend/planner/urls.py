@@ -1,12 +1,27 @@
 from django.urls import path
-from .views import GenerateItineraryView, SaveItineraryView, UserItinerariesView, ApproveItineraryView, DeleteItineraryView
+from .views import (
+    GenerateItineraryView, BatchGenerateItineraryView, GenerationStatusView, RegenerateItineraryView, SaveItineraryView, UserItinerariesView, ItineraryDetailView,
+    ItineraryEmailPreviewView, ItineraryExportView,
+    ApproveItineraryView, DeleteItineraryView, BulkSaveItinerariesView, BulkDeleteItinerariesView, BulkStatusItinerariesView,
+)
 
 urlpatterns = [
     path('generate/', GenerateItineraryView.as_view(), name='planner-generate'),
+    path('generate/batch/', BatchGenerateItineraryView.as_view(), name='planner-generate-batch'),
+    path('generate/status/', GenerationStatusView.as_view(), name='planner-generate-status'),
+    path('regenerate/', RegenerateItineraryView.as_view(), name='planner-regenerate'),
     path('save/', SaveItineraryView.as_view(), name='planner-save'),
     path('history/', UserItinerariesView.as_view(), name='planner-history'),
+    path('itineraries/<int:itinerary_id>/', ItineraryDetailView.as_view(), name='planner-itinerary-detail'),
+    path('itineraries/<int:itinerary_id>/email/', ItineraryEmailPreviewView.as_view(), name='planner-itinerary-email'),
+    path('itineraries/<int:itinerary_id>/export.<slug:kind>', ItineraryExportView.as_view(), name='planner-itinerary-export'),
     
     # NEW HiTL Route:
     path('approve/', ApproveItineraryView.as_view(), name='approve-itinerary'),
     path('delete/<int:itinerary_id>/', DeleteItineraryView.as_view(), name='delete-itinerary'),
+
+    # Bulk operations
+    path('bulk/save/', BulkSaveItinerariesView.as_view(), name='planner-bulk-save'),
+    path('bulk/delete/', BulkDeleteItinerariesView.as_view(), name='planner-bulk-delete'),
+    path('bulk/status/', BulkStatusItinerariesView.as_view(), name='planner-bulk-status'),
 ]
\ No newline at end of file
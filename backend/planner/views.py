@@ -1,204 +1,82 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.renderers import BrowsableAPIRenderer
 from rest_framework.permissions import IsAuthenticated  # <--- NEW IMPORT
 from django.shortcuts import get_object_or_404
-from django.core.mail import EmailMessage
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.cache import cache
 from django.conf import settings
+from django.db import transaction
+from django.db.models import F
 
-from .agents.orchestrator import orchestrate_itinerary
-from .serializers import ItinerarySerializer
-from .models import Itinerary, STATUS_CHOICES
+from accounts import mailqueue
+
+from .agents.orchestrator import orchestrate_itinerary, regenerate_itinerary, batch_orchestrate
+from .serializers import ItinerarySerializer, ItineraryReadSerializer, ItinerarySummarySerializer
+from .models import Itinerary, HistoryVersion, STATUS_CHOICES
+from .executor import ExecutorFull
+from . import emails, exports
+from . import admission, pagination, throttling, writebatch
+from .conditional import make_etag, etag_matches, not_modified, with_validators
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer, CompactItineraryRenderer
 
-import json
 import logging
-import threading  # <--- NEW IMPORT for Async
+from datetime import date
 
 logger = logging.getLogger(__name__)
 
-# ------------------------------------------------------------------------------
-# Email Sending Helpers (Synchronous & Asynchronous)
-# ------------------------------------------------------------------------------
 
-def _format_duration(duration_str):
-    """Convert ISO 8601 duration (PT25H45M) to readable format."""
-    if not duration_str or not duration_str.startswith('PT'):
-        return duration_str
-    import re
-    match = re.match(r'PT(?:(\d+)H)?(?:(\d+)M)?', duration_str)
-    if not match:
-        return duration_str
-    hours = match.group(1) or '0'
-    minutes = match.group(2) or '0'
-    return f"{hours}h {minutes}m"
-
-
-def _generate_itinerary_html(prefs: dict, itinerary: dict) -> str:
-    """Generate a beautiful HTML email for the itinerary."""
-    meta = itinerary.get('meta', {})
-    destination = meta.get('destination', prefs.get('destination', 'Your Destination'))
-    days = meta.get('days', prefs.get('Days', 'N/A'))
-    budget = meta.get('budget', prefs.get('budget', 'N/A'))
-    
-    flights = itinerary.get('flights', [])
-    hotels = itinerary.get('hotels', [])
-    activities = itinerary.get('activities', [])
-    day_plan = itinerary.get('day_plan', [])
-    packing_list = itinerary.get('packing_list', [])
-    food_culture = itinerary.get('food_culture', {})
-    
-    # Build flights HTML
-    flights_html = ""
-    for flight in flights[:3]:  # Show top 3 flights
-        flights_html += f"""
-        <div style="border: 1px solid #e5e7eb; border-radius: 8px; padding: 16px; margin-bottom: 12px; background: #f9fafb;">
-            <div style="display: flex; justify-content: space-between; margin-bottom: 8px;">
-                <strong>Airline: {flight.get('airline', 'N/A')}</strong>
-                <strong style="color: #2563eb; font-size: 20px;">${flight.get('price', 'N/A')}</strong>
-            </div>
-            <div style="color: #6b7280; font-size: 14px;">
-                <div>✈️ {flight.get('origin', '')} → {flight.get('destination', '')}</div>
-                <div>⏱️ Duration: {_format_duration(flight.get('duration', 'N/A'))}</div>
-                <div>🔄 Stops: {flight.get('stops', 'N/A')}</div>
-                <div>📅 Departure: {flight.get('departure_time', 'N/A')}</div>
-            </div>
-        </div>
-        """
-    
-    # Build hotels HTML
-    hotels_html = ""
-    for hotel in hotels[:5]:  # Show top 5 hotels
-        # Handle address - it can be either a dict or a string
-        address = hotel.get('address', {})
-        if isinstance(address, dict):
-            city = address.get('city', 'N/A')
-            country = address.get('country', 'N/A')
-            location = f"{city}, {country}"
-        else:
-            # address is a string
-            location = str(address) if address else 'N/A'
-        
-        hotels_html += f"""
-        <div style="border: 1px solid #e5e7eb; border-radius: 8px; padding: 16px; margin-bottom: 12px; background: #f9fafb;">
-            <strong style="font-size: 16px;">{hotel.get('name', 'N/A')}</strong>
-            <div style="color: #6b7280; font-size: 14px; margin-top: 8px;">
-                <div>📍 {location}</div>
-                <div>📏 Distance: {hotel.get('distance', 'N/A')}</div>
-            </div>
-        </div>
-        """
-    
-    # Build day plan HTML
-    day_plan_html = ""
-    for day in day_plan:
-        activities_list = "".join([f"<li style='margin-bottom: 8px;'>{act}</li>" for act in day.get('activities', [])])
-        day_plan_html += f"""
-        <div style="margin-bottom: 24px;">
-            <h3 style="color: #2563eb; margin-bottom: 12px;">📅 Day {day.get('day', 'N/A')}</h3>
-            <ul style="color: #4b5563; line-height: 1.8;">
-                {activities_list}
-            </ul>
-        </div>
-        """
-    
-    # Build packing list HTML
-    packing_html = "".join([f"<li style='margin-bottom: 4px;'>✓ {item}</li>" for item in packing_list])
-    
-    # Complete HTML email
-    html = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    </head>
-    <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333; max-width: 800px; margin: 0 auto; padding: 20px;">
-        <div style="background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); color: white; padding: 40px 20px; text-align: center; border-radius: 12px; margin-bottom: 30px;">
-            <h1 style="margin: 0; font-size: 32px;">✈️ Your Trip is Ready to Book!</h1>
-            <p style="margin: 10px 0 0 0; font-size: 18px; opacity: 0.9;">Trip to {destination}</p>
-        </div>
-        
-        <div style="background: #f0f9ff; border-left: 4px solid #2563eb; padding: 16px; border-radius: 8px; margin-bottom: 30px;">
-            <h2 style="margin: 0 0 8px 0; color: #1e40af;">📋 Trip Summary</h2>
-            <div style="color: #1e40af;">
-                <div><strong>Destination:</strong> {destination}</div>
-                <div><strong>Duration:</strong> {days} days</div>
-                <div><strong>Budget:</strong> {budget}</div>
-            </div>
-        </div>
-        
-        <h2 style="color: #1f2937; border-bottom: 2px solid #e5e7eb; padding-bottom: 8px;">✈️ Flight Options</h2>
-        {flights_html}
-        
-        <h2 style="color: #1f2937; border-bottom: 2px solid #e5e7eb; padding-bottom: 8px; margin-top: 30px;">🏨 Hotel Recommendations</h2>
-        {hotels_html}
-        
-        <h2 style="color: #1f2937; border-bottom: 2px solid #e5e7eb; padding-bottom: 8px; margin-top: 30px;">📅 Daily Itinerary</h2>
-        {day_plan_html}
-        
-        <h2 style="color: #1f2937; border-bottom: 2px solid #e5e7eb; padding-bottom: 8px; margin-top: 30px;">🎒 Packing List</h2>
-        <ul style="color: #4b5563; columns: 2; -webkit-columns: 2; -moz-columns: 2;">
-            {packing_html}
-        </ul>
-        
-        <div style="background: #fef3c7; border-left: 4px solid #f59e0b; padding: 16px; border-radius: 8px; margin-top: 30px;">
-            <h3 style="margin: 0 0 8px 0; color: #92400e;">🍽️ Food & Culture</h3>
-            <p style="margin: 0; color: #78350f;">{food_culture.get('cuisine_summary', 'Enjoy the local cuisine!')}</p>
-        </div>
-        
-        <div style="text-align: center; margin-top: 40px; padding: 20px; background: #f9fafb; border-radius: 8px;">
-            <p style="color: #6b7280; margin: 0;">Have a wonderful trip! 🌍</p>
-            <p style="color: #6b7280; margin: 8px 0 0 0; font-size: 14px;">Generated by Trip Pick</p>
-        </div>
-    </body>
-    </html>
+class PlannerAPIView(APIView):
+    """
+    Base for the planner endpoints. Their bodies carry whole itineraries, so JSON is
+    rendered and parsed with orjson (planner/renderers.py, planner/parsers.py), and
+    ``?format=compact`` selects the compact itinerary encoding (planner/compact.py).
     """
-    return html
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer, CompactItineraryRenderer]
+    parser_classes = [ORJSONParser, FormParser, MultiPartParser]
 
 
-def _send_approval_email(email_to: str, prefs: dict, itinerary: dict) -> tuple:
-    """Send a beautifully formatted HTML itinerary email when approved. Returns (sent: bool, error: Optional[str])."""
+# ------------------------------------------------------------------------------
+# Email Sending Helpers
+# ------------------------------------------------------------------------------
+
+def _send_approval_email(email_to: str, itinerary: Itinerary) -> tuple:
+    """Queues the approval email (HTML with a plaintext alternative). Returns (queued: bool, error: Optional[str])."""
     try:
-        subject = '✅ Your Trip Itinerary is Ready to Book!'
-        html_content = _generate_itinerary_html(prefs, itinerary)
-        
-        from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None) or getattr(settings, 'EMAIL_HOST_USER', None) or 'no-reply@trippick.local'
-        
-        msg = EmailMessage(
-            subject=subject,
-            body=html_content,
-            from_email=from_email,
-            to=[email_to]
-        )
-        msg.content_subtype = "html"  # Set content type to HTML
-        msg.send(fail_silently=False)
-        
+        html_content, text_content = emails.itinerary_email(itinerary)
+        # Delivered by the outbound queue (accounts/mailqueue.py) over a reused SMTP connection
+        mailqueue.enqueue(emails.SUBJECT, text_content, [email_to], html_body=html_content)
         return True, None
     except Exception as e:
-        logger.exception('Failed to send approval email to %s', email_to)
+        logger.exception('Failed to queue approval email to %s', email_to)
         return False, str(e)
 
 
-def _send_approval_email_async(email_to: str, prefs: dict, itinerary: dict):
-    """Wraps the approval email function in a thread to run in the background."""
-    def send_sync():
-        sent, err = _send_approval_email(email_to, prefs, itinerary)
-        if not sent:
-            logger.error(f"ASYNC APPROVAL EMAIL FAILED: {err} to {email_to}")
-        else:
-            logger.info(f"Approval email sent successfully to {email_to}")
-        
-    thread = threading.Thread(target=send_sync)
-    thread.start()
-    return True, None 
+def _planner_busy(e, what):
+    """503 with Retry-After for a generation the shared agent executor had no room for."""
+    logger.error(f"{what} rejected: {e}")
+    return Response({'error': 'Planner is busy, please retry shortly.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    headers={'Retry-After': str(getattr(settings, 'PLANNER_GENERATE_RETRY_AFTER', 5))})
+
 
-class GenerateItineraryView(APIView):
+class GenerateItineraryView(PlannerAPIView):
     """
     POST /api/planner/generate/ - Generates itinerary.
     """
+    throttle_classes = [throttling.GenerationRateThrottle]
+
     def post(self, request):
         prefs = request.data.get('preferences', {})
-        result = orchestrate_itinerary({'preferences': prefs})
+        try:
+            with admission.admit(request), throttling.generation_slot():
+                result = orchestrate_itinerary({'preferences': prefs})
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ExecutorFull as e:
+            return _planner_busy(e, 'Generation')
 
         # DO NOT send email here - only send when user approves
         resp = {
@@ -210,7 +88,118 @@ class GenerateItineraryView(APIView):
         return Response(resp, status=status.HTTP_200_OK)
 
 
-class SaveItineraryView(APIView):
+class BatchGenerateItineraryView(PlannerAPIView):
+    """
+    POST /api/planner/generate/batch/ - Generates itineraries for many travellers at once.
+
+    Body: {'preferences': [{...}, {...}]}. Destination-level agents run once per
+    shared destination and flights once per origin, so a group trip costs far
+    fewer provider calls than the same number of /generate/ requests.
+    """
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [throttling.BatchGenerationRateThrottle]
+
+    def post(self, request):
+        preference_list = request.data.get('preferences')
+        limit = getattr(settings, 'PLANNER_BATCH_MAX_TRAVELLERS', 100)
+        if not isinstance(preference_list, list) or not preference_list \
+                or not all(isinstance(p, dict) for p in preference_list):
+            return Response({'error': "'preferences' must be a non-empty list of objects."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(preference_list) > limit:
+            return Response({'error': f"At most {limit} travellers per batch."}, status=status.HTTP_400_BAD_REQUEST)
+        if any(p.get('stops') for p in preference_list):
+            return Response({'error': 'Multi-city trips must be generated one at a time.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            # Up to PLANNER_BATCH_CONCURRENCY agent calls run at once, so hold a slot for each
+            slots = min(len(preference_list), getattr(settings, 'PLANNER_BATCH_CONCURRENCY', 8))
+            with admission.admit(request), throttling.generation_slot(slots):
+                result = batch_orchestrate(preference_list)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ExecutorFull as e:
+            return _planner_busy(e, 'Batch generation')
+
+        return Response({
+            'itineraries': result['itineraries'],
+            'agent_calls': result['agent_calls'],
+            'agent_calls_saved': result['agent_calls_saved'],
+            'email_sent': False,
+            'email_error': None,
+        }, status=status.HTTP_200_OK)
+
+
+class GenerationStatusView(PlannerAPIView):
+    """
+    GET /api/planner/generate/status/ - Generation load (admission queue of this process and
+    global slots) and the caller's rate budget.
+    """
+    def get(self, request):
+        return Response({
+            'admission': admission.get_controller().stats(),
+            'generation': throttling.utilisation(),
+            'rate': throttling.bucket_state(request),
+        }, status=status.HTTP_200_OK)
+
+
+class RegenerateItineraryView(PlannerAPIView):
+    """
+    POST /api/planner/regenerate/ - Reruns only the agents affected by changed preferences.
+
+    Body: {'preferences': {...changed fields...}} plus either 'itinerary_id' of a saved
+    itinerary (owner only) or 'previous': {'preferences': {...}, 'itinerary': {...}}.
+    """
+    throttle_classes = [throttling.GenerationRateThrottle]
+
+    def post(self, request):
+        changes = request.data.get('preferences') or {}
+        itinerary_id = request.data.get('itinerary_id')
+        if not isinstance(changes, dict):
+            return Response({'error': "'preferences' must be an object."}, status=status.HTTP_400_BAD_REQUEST)
+
+        if itinerary_id is not None:
+            if not request.user.is_authenticated:
+                return Response({'error': 'Login required to regenerate a saved itinerary.'}, status=status.HTTP_401_UNAUTHORIZED)
+            saved = get_object_or_404(Itinerary, pk=itinerary_id)
+            if saved.user != request.user:
+                return Response({'error': 'Not authorized to access this itinerary.'}, status=status.HTTP_403_FORBIDDEN)
+            previous_prefs, previous_itinerary = saved.preferences, saved.full_itinerary
+        else:
+            previous = request.data.get('previous') or {}
+            if not isinstance(previous, dict):
+                return Response({'error': "'previous' must be an object."}, status=status.HTTP_400_BAD_REQUEST)
+            previous_prefs = previous.get('preferences') or {}
+            previous_itinerary = previous.get('itinerary') or {}
+            if not isinstance(previous_prefs, dict) or not isinstance(previous_itinerary, dict):
+                return Response({'error': "'previous.preferences' and 'previous.itinerary' must be objects."},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+        # Accept both the bare itinerary and the {'ok': ..., 'itinerary': {...}} wrapper
+        if isinstance(previous_itinerary.get('itinerary'), dict):
+            previous_itinerary = previous_itinerary['itinerary']
+        if not previous_itinerary:
+            return Response({'error': 'A previous itinerary is required.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        new_prefs = {**previous_prefs, **changes}
+        try:
+            with admission.admit(request, regenerate=True), throttling.generation_slot():
+                result = regenerate_itinerary(previous_prefs, previous_itinerary, new_prefs)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except ExecutorFull as e:
+            return _planner_busy(e, 'Regeneration')
+
+        return Response({
+            'itinerary': {'ok': result['ok'], 'itinerary': result['itinerary']},
+            'preferences': new_prefs,
+            'regenerated': result['regenerated'],
+            'reused': result['reused'],
+            'email_sent': False,
+            'email_error': None,
+        }, status=status.HTTP_200_OK)
+
+
+class SaveItineraryView(PlannerAPIView):
     """
     POST /api/planner/save/ - Saves itinerary for the authenticated user.
     """
@@ -220,11 +209,12 @@ class SaveItineraryView(APIView):
         data = request.data
         
         # --- CRITICAL FIX: Use authenticated user object for the FK ---
-        it = Itinerary.objects.create(
+        # Committed together with concurrent saves, see planner/writebatch.py
+        it = writebatch.save_itinerary(Itinerary(
             user=request.user, # Use the request.user object (Django FK)
             preferences=data.get('preferences', {}),
             itinerary=data.get('itinerary', {})
-        )
+        ))
         serializer = ItinerarySerializer(it)
         
         # DO NOT send email here - only send when user approves
@@ -237,20 +227,174 @@ class SaveItineraryView(APIView):
         return Response(resp, status=status.HTTP_201_CREATED)
 
 
-class UserItinerariesView(APIView):
+def _filter_history(items, params):
+    """Applies the history filters; raises ValueError on malformed values."""
+    for name in ('destination', 'origin', 'status'):
+        if params.get(name):
+            items = items.filter(**{name: params[name]})
+    for name, lookup in (('start_after', 'start_date__gte'), ('start_before', 'start_date__lte')):
+        if params.get(name):
+            try:
+                items = items.filter(**{lookup: date.fromisoformat(params[name])})
+            except ValueError:
+                raise ValueError(f"{name} must be a YYYY-MM-DD date.")
+    if params.get('max_price'):
+        try:
+            items = items.filter(total_flight_price__lte=float(params['max_price']))
+        except ValueError:
+            raise ValueError("max_price must be a number.")
+    return items
+
+
+class UserItinerariesView(PlannerAPIView):
     """
     GET /api/planner/history/ - Returns list of saved itineraries for the authenticated user.
+
+    Without query parameters the full list is returned as before. Passing any of
+    ``view``, ``limit`` or ``cursor`` switches to cursor pagination:
+
+        ?view=summary|full  (default summary) - summary rows never load the
+                            heavy preferences/itinerary JSON columns
+        ?limit=N            page size (max 100)
+        ?cursor=...         ``next_cursor`` from the previous page
+
+    Both modes accept filters on the indexed summary columns: ``destination``,
+    ``origin``, ``status``, ``start_after``/``start_before`` (YYYY-MM-DD) and
+    ``max_price``.
+
+    Responses carry an ETag built from the user's ``HistoryVersion``; a matching
+    ``If-None-Match`` gets 304 without loading any itinerary.
     """
     permission_classes = [IsAuthenticated] # <--- ENFORCE LOGIN
+    # Full rows are serialized without per-field DRF validation, see ItineraryReadSerializer
+    read_serializer_class = ItineraryReadSerializer
 
     def get(self, request):
         # --- CRITICAL FIX: Filter by authenticated user object ---
-        items = Itinerary.objects.filter(user=request.user).order_by('-created_at')
-        serializer = ItinerarySerializer(items, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        items = Itinerary.objects.filter(user=request.user)
+        params = request.query_params
+        try:
+            items = _filter_history(items, params)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Read the version before the rows: a concurrent write can only make the ETag stale, never the body
+        etag = make_etag('history', request.user.pk, HistoryVersion.current(request.user.pk),
+                         request.accepted_renderer.format, sorted(params.lists()))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        if not any(key in params for key in ('view', 'limit', 'cursor')):
+            rows = Itinerary.prefetch_sections(items.order_by('-created_at'))
+            serializer = self.read_serializer_class(rows, many=True)
+            return with_validators(Response(serializer.data, status=status.HTTP_200_OK), etag)
+
+        view = params.get('view', 'summary')
+        if view == 'summary':
+            items = items.only(*ItinerarySummarySerializer.Meta.fields)
+            serializer_class = ItinerarySummarySerializer
+        elif view == 'full':
+            serializer_class = self.read_serializer_class
+        else:
+            return Response({'error': "view must be 'summary' or 'full'."}, status=status.HTTP_400_BAD_REQUEST)
+
+        limit = pagination.parse_limit(params.get('limit'))
+        try:
+            rows, next_cursor = pagination.paginate(items, params.get('cursor'), limit)
+        except pagination.InvalidCursor:
+            return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+        if view == 'full':
+            Itinerary.prefetch_sections(rows)
+
+        return with_validators(Response({
+            'results': serializer_class(rows, many=True).data,
+            'next_cursor': next_cursor,
+            'limit': limit,
+        }, status=status.HTTP_200_OK), etag)
 
 
-class ApproveItineraryView(APIView):
+class ItineraryDetailView(PlannerAPIView):
+    """
+    GET /api/planner/itineraries/<id>/ - Returns one saved itinerary with its full JSON.
+
+    The ETag follows ``Itinerary.version``; revalidation only reads the owner and version.
+    """
+    permission_classes = [IsAuthenticated]
+
+    @staticmethod
+    def _etag(request, itinerary_id, version):
+        return make_etag('itinerary', itinerary_id, version, request.accepted_renderer.format)
+
+    def get(self, request, itinerary_id):
+        row = get_object_or_404(Itinerary.objects.values('user_id', 'version'), pk=itinerary_id)
+        if row['user_id'] != request.user.pk:
+            return Response({'error': 'Not authorized to view this itinerary.'}, status=status.HTTP_403_FORBIDDEN)
+        etag = self._etag(request, itinerary_id, row['version'])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        itinerary = get_object_or_404(Itinerary, pk=itinerary_id, user=request.user)
+        data = ItinerarySerializer(itinerary).data
+        return with_validators(Response(data, status=status.HTTP_200_OK),
+                               self._etag(request, itinerary_id, itinerary.version))
+
+
+class ItineraryEmailPreviewView(PlannerAPIView):
+    """
+    GET /api/planner/itineraries/<id>/email/ - The approval email exactly as it would be sent.
+
+    Returns the HTML body (``?part=text`` for the plaintext alternative) from the
+    same content-keyed cache the approval email uses.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, itinerary_id):
+        itinerary = get_object_or_404(Itinerary, pk=itinerary_id)
+        if itinerary.user != request.user:
+            return Response({'error': 'Not authorized to view this itinerary.'}, status=status.HTTP_403_FORBIDDEN)
+        part = request.query_params.get('part', 'html')
+        if part not in ('html', 'text'):
+            return Response({'error': "part must be 'html' or 'text'."}, status=status.HTTP_400_BAD_REQUEST)
+        html_content, text_content = emails.itinerary_email(itinerary)
+        if part == 'text':
+            return HttpResponse(text_content, content_type='text/plain; charset=utf-8')
+        return HttpResponse(html_content, content_type='text/html; charset=utf-8')
+
+
+class ItineraryExportView(PlannerAPIView):
+    """
+    GET /api/planner/itineraries/<id>/export.ics|export.pdf - Downloads the itinerary for offline use.
+
+    Exports are streamed as they are generated and cached per itinerary version;
+    the ETag follows ``Itinerary.version`` like the detail endpoint.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # The body is never JSON, so an Accept header asking for text/calendar or PDF must not yield 406
+        return super().perform_content_negotiation(request, force=True)
+
+    def get(self, request, itinerary_id, kind):
+        if kind not in exports.CONTENT_TYPES:
+            return Response({'error': "Export must be 'ics' or 'pdf'."}, status=status.HTTP_404_NOT_FOUND)
+        row = get_object_or_404(Itinerary.objects.values('user_id', 'version'), pk=itinerary_id)
+        if row['user_id'] != request.user.pk:
+            return Response({'error': 'Not authorized to view this itinerary.'}, status=status.HTTP_403_FORBIDDEN)
+        etag = make_etag('export', kind, itinerary_id, row['version'])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        itinerary = get_object_or_404(Itinerary, pk=itinerary_id, user=request.user)
+        cached = cache.get(exports.cache_key(kind, itinerary.pk, itinerary.version))
+        if cached is not None:
+            response = HttpResponse(cached, content_type=exports.CONTENT_TYPES[kind])
+        else:
+            response = StreamingHttpResponse(exports.stream(kind, itinerary), content_type=exports.CONTENT_TYPES[kind])
+        response['Content-Disposition'] = f'attachment; filename="trippick-itinerary-{itinerary.pk}.{kind}"'
+        return with_validators(response, make_etag('export', kind, itinerary.pk, itinerary.version))
+
+
+class ApproveItineraryView(PlannerAPIView):
     """
     POST /api/planner/approve/ - Finalizes the itinerary status to 'APPROVED' and sends the final email.
     """
@@ -269,13 +413,13 @@ class ApproveItineraryView(APIView):
         # 2. Update Status
         try:
             itinerary.status = new_status
-            itinerary.save()
+            itinerary.save(update_fields=['status'])
             
             # 3. Send beautifully formatted approval email with HTML
             email_to = request.user.email 
             
             if email_to:
-                _send_approval_email_async(email_to, itinerary.preferences, itinerary.itinerary)
+                _send_approval_email(email_to, itinerary)
                 email_message = "Your itinerary has been sent to your email with booking details!"
             else:
                 email_message = "No email address found for user."
@@ -292,7 +436,7 @@ class ApproveItineraryView(APIView):
             return Response({'error': 'Could not save new status.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class DeleteItineraryView(APIView):
+class DeleteItineraryView(PlannerAPIView):
     """
     DELETE /api/planner/delete/<id>/ - Deletes a saved itinerary for the authenticated user.
     """
@@ -310,4 +454,147 @@ class DeleteItineraryView(APIView):
             return Response({'message': 'Itinerary deleted successfully.'}, status=status.HTTP_200_OK)
         except Exception as e:
             logger.error(f"Failed to delete itinerary: {e}")
-            return Response({'error': 'Could not delete itinerary.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({'error': 'Could not delete itinerary.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+# ------------------------------------------------------------------------------
+# Bulk operations (one query per operation, scoped to request.user)
+# ------------------------------------------------------------------------------
+
+def _bulk_limit_error(items, name):
+    """Returns an error Response when ``items`` is not a list within PLANNER_BULK_MAX_ITEMS."""
+    limit = getattr(settings, 'PLANNER_BULK_MAX_ITEMS', 500)
+    if not isinstance(items, list) or not items:
+        return Response({'error': f"'{name}' must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(items) > limit:
+        return Response({'error': f"At most {limit} {name} per request."}, status=status.HTTP_400_BAD_REQUEST)
+    return None
+
+
+def _parse_ids(raw_ids):
+    """Splits the submitted ids into ``(ids, results for invalid entries)``, keeping order."""
+    ids, invalid = [], {}
+    for raw in raw_ids:
+        try:
+            ids.append(int(raw))
+        except (TypeError, ValueError):
+            invalid[str(raw)] = {'id': raw, 'ok': False, 'error': 'Invalid id.'}
+    return list(dict.fromkeys(ids)), invalid
+
+
+class BulkSaveItinerariesView(PlannerAPIView):
+    """
+    POST /api/planner/bulk/save/ - Saves many itineraries in one transaction.
+
+    Body: ``{"itineraries": [{"preferences": {...}, "itinerary": {...}}, ...]}``.
+    Every entry gets a result in request order; malformed entries are reported
+    and skipped, the rest are inserted with a single ``bulk_create``.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get('itineraries')
+        error = _bulk_limit_error(items, 'itineraries')
+        if error:
+            return error
+
+        results, pending = [], []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(item.get('preferences', {}), dict) \
+                    or not isinstance(item.get('itinerary', {}), dict):
+                results.append({'index': index, 'ok': False, 'error': 'Each entry needs object preferences and itinerary.'})
+                continue
+            it = Itinerary(user=request.user, preferences=item.get('preferences', {}), itinerary=item.get('itinerary', {}))
+            results.append({'index': index, 'ok': True})
+            pending.append((results[-1], it))
+
+        try:
+            with transaction.atomic():
+                created = Itinerary.bulk_create_prepared([it for _, it in pending])
+        except Exception as e:
+            logger.error(f"Bulk save failed: {e}")
+            return Response({'error': 'Could not save itineraries.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        for (result, _), it in zip(pending, created):
+            result.update({'id': it.id, 'status': it.status})
+        return Response({'created': len(created), 'results': results}, status=status.HTTP_201_CREATED)
+
+
+class BulkDeleteItinerariesView(PlannerAPIView):
+    """
+    POST /api/planner/bulk/delete/ - Deletes many of the user's itineraries.
+
+    Body: ``{"ids": [1, 2, ...]}``. Ids that do not exist or belong to another
+    user are reported as not found.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        raw_ids = request.data.get('ids')
+        error = _bulk_limit_error(raw_ids, 'ids')
+        if error:
+            return error
+        ids, invalid = _parse_ids(raw_ids)
+
+        try:
+            with transaction.atomic():
+                owned = Itinerary.objects.filter(user=request.user, pk__in=ids)
+                found = set(owned.values_list('pk', flat=True))
+                # The queryset bumps the user's HistoryVersion (ItineraryQuerySet)
+                deleted = owned.delete()[1].get(Itinerary._meta.label, 0) if found else 0
+        except Exception as e:
+            logger.error(f"Bulk delete failed: {e}")
+            return Response({'error': 'Could not delete itineraries.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        results = [
+            {'id': pk, 'ok': True} if pk in found else {'id': pk, 'ok': False, 'error': 'Not found.'}
+            for pk in ids
+        ]
+        return Response({'deleted': deleted, 'results': results + list(invalid.values())}, status=status.HTTP_200_OK)
+
+
+class BulkStatusItinerariesView(PlannerAPIView):
+    """
+    POST /api/planner/bulk/status/ - Sets the status of many of the user's itineraries.
+
+    Body: ``{"ids": [...], "status": "APPROVED", "send_email": false}``. Approval
+    emails are only queued when ``send_email`` is true, one per approved trip.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        raw_ids = request.data.get('ids')
+        error = _bulk_limit_error(raw_ids, 'ids')
+        if error:
+            return error
+        new_status = request.data.get('status')
+        if new_status not in dict(STATUS_CHOICES):
+            return Response({'error': f"status must be one of {', '.join(dict(STATUS_CHOICES))}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        ids, invalid = _parse_ids(raw_ids)
+
+        try:
+            with transaction.atomic():
+                owned = Itinerary.objects.filter(user=request.user, pk__in=ids)
+                found = set(owned.values_list('pk', flat=True))
+                # The queryset bumps the user's HistoryVersion (ItineraryQuerySet)
+                updated = owned.update(status=new_status, version=F('version') + 1) if found else 0
+        except Exception as e:
+            logger.error(f"Bulk status update failed: {e}")
+            return Response({'error': 'Could not update itineraries.'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        emails_queued = 0
+        if new_status == 'APPROVED' and request.data.get('send_email') and request.user.email and found:
+            approved = Itinerary.prefetch_sections(Itinerary.objects.filter(pk__in=found))
+            for it in approved:
+                sent, _ = _send_approval_email(request.user.email, it)
+                emails_queued += bool(sent)
+
+        results = [
+            {'id': pk, 'ok': True, 'status': new_status} if pk in found else {'id': pk, 'ok': False, 'error': 'Not found.'}
+            for pk in ids
+        ]
+        return Response({
+            'updated': updated,
+            'emails_queued': emails_queued,
+            'results': results + list(invalid.values()),
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,168 @@
+"""
+Group commit for itinerary saves.
+
+Every ``/save/`` used to run as several autocommitted writes (sections, the
+row, the history version), each taking SQLite's single write lock. With many
+concurrent savers the lock churn, not the work, sets the pace, and callers
+that lose the race too often get ``database is locked``.
+
+``save_itinerary()`` queues the new row instead. The first caller to arrive
+becomes the leader: it takes up to ``PLANNER_SAVE_BATCH_MAX`` queued rows and
+writes them in one transaction with ``Itinerary.bulk_create_prepared``, while
+the others wait for their row to be committed. Rows queued meanwhile form the
+next batch, led by the oldest of them, so no request keeps committing for
+others after its own row is saved. ``PLANNER_SAVE_BATCH_WINDOW_MS`` optionally
+makes each leader wait a little for more rows to join.
+
+If a batch fails, its rows are retried one at a time so a single bad row only
+fails its own request. A caller that waits longer than
+``PLANNER_SAVE_WAIT_SECONDS`` for its batch (a stalled leader) gets a 503
+instead of hanging.
+
+Coalescing is part of the SQLite production profile and is off unless
+``PLANNER_SAVE_COALESCING`` is set (it defaults to ``SQLITE_PRODUCTION``).
+Saves made inside a transaction are never coalesced: the batch commits on the
+leader's connection, outside the caller's ``atomic()`` block.
+"""
+import logging
+import threading
+import time
+
+from django.db import transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from .conf import get_setting
+
+logger = logging.getLogger(__name__)
+
+
+class SaveTimeout(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Saving is taking too long, please retry shortly.'
+    default_code = 'save_timeout'
+
+    def __init__(self, wait):
+        super().__init__()
+        # DRF's exception handler turns this into a Retry-After header
+        self.wait = wait
+
+
+class _Pending:
+    __slots__ = ('itinerary', 'wake', 'lead', 'done', 'error')
+
+    def __init__(self, itinerary):
+        self.itinerary = itinerary
+        self.wake = threading.Event()
+        self.lead = False
+        self.done = False
+        self.error = None
+
+
+class SaveCoalescer:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = []
+        self._leading = False
+        self.batches = 0
+        self.rows = 0
+        self.largest_batch = 0
+
+    def save(self, itinerary):
+        entry = _Pending(itinerary)
+        with self._lock:
+            self._pending.append(entry)
+            if not self._leading:
+                # Invariant: the leader is always the oldest pending entry, so its batch includes it
+                self._leading = True
+                entry.lead = True
+        deadline = time.monotonic() + get_setting('PLANNER_SAVE_WAIT_SECONDS', 30.0)
+        while not entry.done:
+            if entry.lead:
+                self._run_batch()
+                continue
+            if not entry.wake.wait(max(deadline - time.monotonic(), 0)):
+                self._abandon(entry)
+                continue
+            entry.wake.clear()
+        if entry.error is not None:
+            raise entry.error
+        return itinerary
+
+    def _abandon(self, entry):
+        with self._lock:
+            if entry.done or entry.lead:
+                return  # woken just as the wait ran out
+            if entry in self._pending:
+                self._pending.remove(entry)
+                logger.warning("Gave up waiting for a save batch; the row was not saved")
+            else:
+                # Already part of the stalled batch, which may still commit it
+                logger.warning("Gave up waiting for a save batch that includes the row")
+        raise SaveTimeout(wait=max(1, round(get_setting('PLANNER_SAVE_WAIT_SECONDS', 30.0))))
+
+    def _run_batch(self):
+        window = get_setting('PLANNER_SAVE_BATCH_WINDOW_MS', 0.0)
+        if window:
+            time.sleep(window / 1000.0)
+        with self._lock:
+            size = get_setting('PLANNER_SAVE_BATCH_MAX', 64)
+            batch = self._pending[:size]
+            del self._pending[:len(batch)]
+        try:
+            self._commit(batch)
+        finally:
+            with self._lock:
+                self.batches += 1
+                self.rows += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+                if self._pending:
+                    successor = self._pending[0]
+                    successor.lead = True
+                    successor.wake.set()
+                else:
+                    self._leading = False
+            for entry in batch:
+                entry.lead = False
+                entry.done = True
+                entry.wake.set()
+
+    def _commit(self, batch):
+        from .models import Itinerary
+
+        try:
+            with transaction.atomic():
+                Itinerary.bulk_create_prepared([entry.itinerary for entry in batch])
+            return
+        except Exception as e:
+            logger.warning(f"Batched save of {len(batch)} itineraries failed, saving one at a time: {e}")
+        for entry in batch:
+            itinerary = entry.itinerary
+            # The rolled-back insert may have assigned a primary key
+            itinerary.pk = None
+            itinerary._state.adding = True
+            try:
+                itinerary.save()
+            except Exception as e:
+                entry.error = e
+
+    def stats(self):
+        with self._lock:
+            return {'batches': self.batches, 'rows': self.rows, 'largest_batch': self.largest_batch,
+                    'rows_per_batch': round(self.rows / self.batches, 2) if self.batches else None}
+
+
+_coalescer = SaveCoalescer()
+
+
+def save_itinerary(itinerary):
+    """Inserts a new ``Itinerary``, batched with concurrent saves when coalescing is on."""
+    if not get_setting('PLANNER_SAVE_COALESCING', False) or transaction.get_connection().in_atomic_block:
+        itinerary.save()
+        return itinerary
+    return _coalescer.save(itinerary)
+
+
+def stats():
+    return _coalescer.stats()